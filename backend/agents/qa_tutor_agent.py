@@ -5,8 +5,9 @@ from models import (
     QuestionRequest, QuestionResponse, Citation
 )
 from services import (
-    chroma_service, ollama_service
+    chroma_service, ollama_service, hybrid_retriever
 )
+from services.answer_cache import SemanticAnswerCache
 from config import settings
 
 class QATutorAgent:
@@ -25,6 +26,9 @@ class QATutorAgent:
         """
         self.chroma = chroma_service
         self.ollama = ollama_service
+        self.retriever = hybrid_retriever
+        # Answers to earlier questions, matched by question embedding
+        self.answer_cache = SemanticAnswerCache() if settings.ANSWER_CACHE_ENABLED else None
     
     def _create_citation(
         self,
@@ -92,16 +96,34 @@ class QATutorAgent:
         question = request.question
         logger.info(f"Processing question: {question}")
         
-        # Check if question is related to network security
-        is_relevant, relevance_confidence = self._check_relevance_to_network_security(question)
+        # Embed once for both retrieval and the answer cache. The version is
+        # read first, so an answer built from documents that change meanwhile
+        # is tagged stale.
+        collection_version = self.chroma.version
+        embedding_service = self.chroma.embedding_service
+        question_embedding = embedding_service.embed_text(question)
+        model_key = embedding_service.model_key
         
         # Step 1: Retrieve relevant context from local database
         # Reduce the number of retrieved contexts and truncate them to lower
         # latency and prompt size.
-        local_results = self.chroma.query_similar(
+        local_results = self.retriever.query(
             query_text=question,
-            n_results=2
+            n_results=2,
+            query_embedding=question_embedding,
+            model_key=model_key
         )
+        # A cached answer is only reused if it came from the same chunks
+        chunk_ids = local_results['ids'][0] if local_results.get('ids') else []
+        
+        if self.answer_cache is not None:
+            cached = self.answer_cache.get(question_embedding, collection_version, model_key, chunk_ids)
+            if cached is not None:
+                logger.info(f"Answer cache hit for question: {question}")
+                return cached.model_copy(update={'question': question, 'timestamp': datetime.now()})
+        
+        # Check if question is related to network security
+        is_relevant, relevance_confidence = self._check_relevance_to_network_security(question)
         
         citations = []
         context_texts = []
@@ -202,13 +224,17 @@ Include technical details when relevant. Always give the answers within a 150-20
                     answer = "I encountered an error while generating the answer. Please try again."
                     confidence_score = 0.0
         
-        return QuestionResponse(
+        response = QuestionResponse(
             question=question,
             answer=answer,
             citations=citations,
             confidence_score=confidence_score,
             timestamp=datetime.now()
         )
+        # Errors and "not enough information" replies score 0 and are not reused
+        if self.answer_cache is not None and confidence_score > 0:
+            self.answer_cache.put(question_embedding, response, collection_version, model_key, chunk_ids)
+        return response
 
 # Singleton instance
 qa_tutor_agent = QATutorAgent()
@@ -13,7 +13,7 @@ from models import (
     QuestionType, QuizMode, Citation
 )
 from services import (
-    chroma_service, ollama_service, embedding_service
+    chroma_service, ollama_service, embedding_service, hybrid_retriever
 )
 from config import settings
 
@@ -34,6 +34,7 @@ class QuizAgent:
         self.chroma = chroma_service
         self.ollama = ollama_service
         self.embedding = embedding_service
+        self.retriever = hybrid_retriever
         self.active_quizzes: Dict[str, QuizResponse] = {}
     
     def _extract_topic_documents(self, topic: Optional[str] = None) -> List[Dict]:
@@ -43,7 +44,7 @@ class QuizAgent:
         """Extract documents relevant to a specific topic or all documents."""
         #based on topic specific quizzes
         if topic:
-            results = self.chroma.query_similar(
+            results = self.retriever.query(
                 query_text=topic,
                 n_results=20
             )
@@ -0,0 +1,177 @@
+"""
+Embedding Coalescing Benchmark
+Fires concurrent single-text embed_text calls (as /api/qa/ask and quiz
+grading do) and compares throughput and tail latency of the direct
+per-request encode path against the micro-batching coalescer.
+
+Usage (from the backend directory):
+    python benchmarks/bench_embedding_coalescing.py --concurrency 16 --requests 512
+    python benchmarks/bench_embedding_coalescing.py --stub-model --window-ms 2 5 10
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Add backend to path
+sys.path.insert(0, str(BACKEND_DIR))
+
+from bench_ingestion import git_commit
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent embed_text with and without coalescing")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent callers (default: 16)")
+    parser.add_argument("--requests", type=int, default=512, help="Total embed_text calls per mode (default: 512)")
+    parser.add_argument("--window-ms", type=float, nargs="+", default=None,
+                        help="Coalescing windows to try (default: EMBEDDING_COALESCE_WINDOW_MS)")
+    parser.add_argument("--max-batch", type=int, default=None,
+                        help="Coalescer batch cap (default: EMBEDDING_COALESCE_MAX_BATCH)")
+    parser.add_argument("--stub-model", action="store_true",
+                        help="Simulate encode cost (fixed overhead + per-text cost) instead of loading the model")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    return parser.parse_args()
+
+class StubModel:
+    """
+    Stand-in for SentenceTransformer whose cost has a large per-call part,
+    like a real forward pass. Calls are serialized as they would be on a
+    CPU-bound model.
+    """
+    def __init__(self, dimension: int = 384, call_ms: float = 8.0, per_text_ms: float = 0.4):
+        import numpy as np
+        self._np = np
+        self.dimension = dimension
+        self.call_seconds = call_ms / 1000
+        self.per_text_seconds = per_text_ms / 1000
+        self._lock = threading.Lock()
+
+    def encode(self, texts, convert_to_numpy=True):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        with self._lock:
+            time.sleep(self.call_seconds + self.per_text_seconds * len(batch))
+        vectors = self._np.ones((len(batch), self.dimension), dtype=self._np.float32)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_load(service, concurrency: int, total: int, label: str):
+    """Call embed_text ``total`` times from ``concurrency`` threads with unique texts."""
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def caller():
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            started = time.perf_counter()
+            service.embed_text(f"{label} question {n}: how does a stateful firewall track connections?")
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=caller) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'seconds': round(wall, 4),
+        'requests_per_sec': round(total / wall, 2) if wall > 0 else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'max': round(latencies[-1] * 1000, 2) if latencies else 0.0
+        }
+    }
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix='coalesce-bench-') as workdir:
+        # Keep the benchmark away from real data and from the persistent store
+        os.environ['CHROMA_DB_PATH'] = os.path.join(workdir, 'chroma_db')
+        os.environ['COLLECTION_NAME'] = 'benchmark'
+        os.environ['EMBEDDING_PRELOAD'] = 'false'
+        os.environ['EMBEDDING_STORE_ENABLED'] = 'false'
+
+        from config import settings
+        from services.embedding_service import EmbeddingService
+        from services.embedding_batcher import EmbeddingBatcher
+
+        service = EmbeddingService()
+        if args.stub_model:
+            service.model = StubModel()
+            service.dimension = service.model.dimension
+        else:
+            service.ensure_model_loaded()
+        # Warm up so one-off initialisation is not timed
+        service._batcher = None
+        service.embed_text("warm-up")
+
+        windows = args.window_ms or [settings.EMBEDDING_COALESCE_WINDOW_MS]
+        modes = {}
+
+        service._cache.clear()
+        modes['direct'] = run_load(service, args.concurrency, args.requests, 'direct')
+        print(f"direct          {modes['direct']['requests_per_sec']:>9} req/s  "
+              f"p99 {modes['direct']['latency_ms']['p99']} ms")
+
+        for window in windows:
+            batcher = EmbeddingBatcher(service._encode, window_ms=window, max_batch=args.max_batch)
+            service._batcher = batcher
+            service._cache.clear()
+            name = f"coalesced_{window:g}ms"
+            modes[name] = run_load(service, args.concurrency, args.requests, name)
+            modes[name]['coalescer'] = batcher.stats()
+            print(f"{name:<15} {modes[name]['requests_per_sec']:>9} req/s  "
+                  f"p99 {modes[name]['latency_ms']['p99']} ms  "
+                  f"mean batch {batcher.stats()['mean_batch_size']}")
+
+    results = {
+        'benchmark': 'embedding_coalescing',
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {
+            'model': 'stub' if args.stub_model else settings.EMBEDDING_MODEL,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'max_batch': args.max_batch or settings.EMBEDDING_COALESCE_MAX_BATCH
+        },
+        'modes': modes
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(results, indent=2) + '\n')
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
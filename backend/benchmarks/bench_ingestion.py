@@ -0,0 +1,259 @@
+"""
+Ingestion Benchmark
+Runs IngestionPipeline.ingest_files over the bundled lecture corpus in a
+scratch data directory, reports the per-stage timings (parse, chunk,
+embed, store) it records in IngestionStats and writes the results as
+JSON so runs can be compared between commits.
+
+Usage (from the backend directory):
+    python benchmarks/bench_ingestion.py --stub-embeddings --output bench.json
+    python benchmarks/bench_ingestion.py --baseline bench.json
+"""
+import sys
+import os
+import json
+import time
+import hashlib
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = BACKEND_DIR.parent
+
+# Add backend to path
+sys.path.insert(0, str(BACKEND_DIR))
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def default_corpus():
+    files = sorted(str(p) for p in (BACKEND_DIR / 'data' / 'uploads').glob('*.pdf'))
+    essentials = REPO_DIR / 'Network-security-essentials.pdf'
+    if essentials.exists():
+        files.append(str(essentials))
+    return files
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the document ingestion path")
+    parser.add_argument("files", nargs="*", help="Files to ingest (default: bundled lecture corpus)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Embed/store batch size (default: INGEST_BATCH_SIZE)")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: INGEST_WORKERS)")
+    parser.add_argument("--stub-embeddings", action="store_true",
+                        help="Use deterministic fake vectors instead of loading the embedding model")
+    parser.add_argument("--use-parse-cache", action="store_true",
+                        help="Allow parse cache hits (default: always re-parse)")
+    parser.add_argument("--no-strip-boilerplate", dest="strip_boilerplate", action="store_false",
+                        help="Chunk extracted text without removing repeated footer/header lines")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false", default=None,
+                        help="Keep near-duplicate chunks (default: DEDUP_ENABLED)")
+    parser.add_argument("--no-length-bucketing", dest="length_bucketing", action="store_false",
+                        help="Encode chunks in input order instead of grouping them by token length")
+    parser.add_argument("--embedding-workers", type=int, default=None,
+                        help="Embedding processes for large batches (default: EMBEDDING_POOL_WORKERS, 1 = off)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Earlier JSON results to compare against")
+    return parser.parse_args()
+
+def isolate_storage(workdir: str, stub_embeddings: bool):
+    """Point all persistent state at a scratch directory before services import."""
+    os.environ['CHROMA_DB_PATH'] = os.path.join(workdir, 'chroma_db')
+    os.environ['INGEST_MANIFEST_PATH'] = os.path.join(workdir, 'ingest_manifest.json')
+    os.environ['PARSE_CACHE_PATH'] = os.path.join(workdir, 'parse_cache')
+    os.environ['BOILERPLATE_INDEX_PATH'] = os.path.join(workdir, 'boilerplate_index.json')
+    os.environ['EMBEDDING_STORE_PATH'] = os.path.join(workdir, 'embedding_store')
+    os.environ['COLLECTION_NAME'] = 'benchmark'
+    if stub_embeddings:
+        os.environ['EMBEDDING_PRELOAD'] = 'false'
+
+class StubEmbedder:
+    """
+    Deterministic pseudo-embeddings derived from a hash of the text.
+
+    Implements the parts of EmbeddingService the ingestion pipeline uses,
+    so it can be swapped into ChromaDBService in place of the model.
+    """
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.model_name = f"stub-{dimension}"
+        self.model_key = self.model_name
+
+    def embed_texts(self, texts):
+        import numpy as np
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+            vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+    def embed_text(self, text):
+        return self.embed_texts([text])[0]
+
+    @contextmanager
+    def process_pool(self, corpus_bytes):
+        yield
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its reaped children."""
+    if resource is None:
+        import psutil
+        return {'self': round(psutil.Process().memory_info().rss / 2**20, 1), 'children': None}
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 2**20, 1)
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+def rate(count, seconds):
+    return round(count / seconds, 2) if seconds > 0 else 0.0
+
+def run(args):
+    from config import settings
+    from services import chroma_service, embedding_service, ingestion_pipeline, ingest_manifest
+    from services.chunker import count_tokens
+
+    files = [os.path.abspath(file_path) for file_path in (args.files or default_corpus())]
+    batch_size = args.batch_size or settings.INGEST_BATCH_SIZE
+    dedup = settings.DEDUP_ENABLED if args.dedup is None else args.dedup
+
+    if args.stub_embeddings:
+        embedder = StubEmbedder()
+        # The pipeline embeds with whatever service the active collection is paired with
+        chroma_service.switch(chroma_service.collection.name, embedder)
+        model_load_seconds = 0.0
+    else:
+        embedder = embedding_service
+        # Keep one-off model loading out of the embed timing
+        started = time.perf_counter()
+        embedding_service.ensure_model_loaded()
+        model_load_seconds = round(time.perf_counter() - started, 3)
+
+    # The real pipeline, with its parse pool, batching, process pool scope and manifest
+    summary = ingestion_pipeline.ingest_files(
+        files,
+        workers=args.workers,
+        batch_size=batch_size,
+        reparse=not args.use_parse_cache,
+        dedup=dedup,
+        strip_boilerplate=args.strip_boilerplate
+    )
+
+    per_file = []
+    for file_path in files:
+        entry = ingest_manifest.get(file_path)
+        per_file.append({
+            'file': os.path.basename(file_path),
+            'bytes': os.path.getsize(file_path),
+            'chunks': len(entry['chunk_ids']) if entry else 0
+        })
+    stored = chroma_service.get_all_documents()['documents']
+    seconds = summary['stage_seconds']
+    chunks = summary['chunks_indexed']
+    pages = summary['pages_parsed']
+    total_seconds = summary['elapsed_seconds']
+    return {
+        'benchmark': 'ingestion',
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {
+            'embedder': embedder.model_name,
+            'batch_size': batch_size,
+            'parse_workers': args.workers or settings.INGEST_WORKERS,
+            'embedding_batch_size': settings.EMBEDDING_BATCH_SIZE,
+            'length_bucketing': settings.EMBEDDING_LENGTH_BUCKETING,
+            'embedding_processes': embedding_service.cache_stats()['process_pool'],
+            'chunk_tokens': settings.CHUNK_TOKENS,
+            'chunk_overlap_tokens': settings.CHUNK_OVERLAP_TOKENS,
+            'parse_cache': args.use_parse_cache,
+            'strip_boilerplate': args.strip_boilerplate,
+            'dedup': dedup,
+            'pdf_isolation': settings.PDF_ISOLATE_EXTRACTION
+        },
+        'corpus': {
+            'files': len(files),
+            'bytes': sum(item['bytes'] for item in per_file),
+            'pages': pages,
+            'chunks': chunks,
+            'tokens': sum(count_tokens(text) for text in stored),
+            'boilerplate': summary['boilerplate'],
+            'near_duplicates': summary['near_duplicates'],
+            'failures': summary['failures'],
+            'dropped_pages': summary['dropped_pages']
+        },
+        # Stage seconds are time spent in each stage as seen by the pipeline; with
+        # parallel parsing they overlap, so total_seconds is wall clock, not their sum
+        'stages': {
+            'parse': {'seconds': seconds['parse'], 'pages_per_sec': rate(pages, seconds['parse'])},
+            'chunk': {'seconds': seconds['chunk'], 'chunks_per_sec': rate(chunks, seconds['chunk'])},
+            'embed': {'seconds': seconds['embed'], 'embeddings_per_sec': summary['throughput']['embeddings_per_sec'],
+                      'model_load_seconds': model_load_seconds},
+            'store': {'seconds': seconds['store'], 'chunks_per_sec': rate(chunks, seconds['store'])}
+        },
+        'total_seconds': total_seconds,
+        'chunks_per_sec': summary['throughput']['chunks_per_sec'],
+        'peak_rss_mb': peak_rss_mb(),
+        'per_file': per_file
+    }
+
+def compare(results, baseline_path):
+    """Print per-stage time changes relative to an earlier run."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('git_commit')}):")
+    for stage, data in results['stages'].items():
+        before = baseline.get('stages', {}).get(stage, {}).get('seconds')
+        if before:
+            change = (data['seconds'] - before) / before * 100
+            print(f"   - {stage:<6} {before:>9.3f}s -> {data['seconds']:>9.3f}s ({change:+.1f}%)")
+    before = baseline.get('chunks_per_sec')
+    if before:
+        print(f"   - chunks/s {before} -> {results['chunks_per_sec']}")
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix='ingest-bench-') as workdir:
+        isolate_storage(workdir, args.stub_embeddings)
+        os.environ['EMBEDDING_LENGTH_BUCKETING'] = str(args.length_bucketing).lower()
+        if args.embedding_workers is not None:
+            os.environ['EMBEDDING_POOL_WORKERS'] = str(args.embedding_workers)
+        results = run(args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+    stages = results['stages']
+    print(f"\nParse {stages['parse']['seconds']}s | Chunk {stages['chunk']['seconds']}s | "
+          f"Embed {stages['embed']['seconds']}s | Store {stages['store']['seconds']}s | "
+          f"{results['chunks_per_sec']} chunks/s | peak RSS {results['peak_rss_mb']['self']} MB")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+ONNX Embedding Parity and Speed Benchmark
+Embeds chunks of the bundled lecture corpus with the PyTorch
+SentenceTransformer and with the ONNX backend (fp32 and/or int8), checks
+that the vectors agree (cosine similarity and nearest-neighbour overlap)
+and compares encode throughput and single-query latency.
+
+Exits with status 1 if the minimum cosine similarity of any backend falls
+below --min-cosine, so it can gate a switch to EMBEDDING_BACKEND=onnx.
+
+Usage (from the backend directory):
+    python benchmarks/bench_onnx_embeddings.py --output onnx.json
+    python benchmarks/bench_onnx_embeddings.py --variants int8 --max-chunks 500
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Add backend to path
+sys.path.insert(0, str(BACKEND_DIR))
+
+from bench_ingestion import default_corpus, isolate_storage, git_commit
+
+QUERIES = [
+    "What is the difference between symmetric and asymmetric encryption?",
+    "How does a stateful firewall track connections?",
+    "Explain how HMAC provides message integrity",
+    "What is a SYN flood attack?",
+    "How does TLS establish a session key?",
+    "What does an intrusion detection system look for?",
+    "Why are salted password hashes harder to crack?",
+    "How do digital certificates bind a public key to an identity?",
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare ONNX and PyTorch embeddings")
+    parser.add_argument("files", nargs="*", help="Documents to sample chunks from (default: lecture corpus)")
+    parser.add_argument("--variants", nargs="+", choices=["fp32", "int8"], default=["fp32", "int8"],
+                        help="ONNX graphs to compare (default: both)")
+    parser.add_argument("--max-chunks", type=int, default=1000, help="Chunks to embed (default: 1000)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Encode batch size (default: 32)")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours compared per query (default: 10)")
+    parser.add_argument("--min-cosine", type=float, default=0.98,
+                        help="Fail if any vector agrees less than this with PyTorch (default: 0.98)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    return parser.parse_args()
+
+def load_chunks(files, limit):
+    from services import document_processor
+    texts = []
+    for file_path in files:
+        sections = document_processor.extract_file(file_path)
+        texts.extend(chunk['text'] for chunk in document_processor.chunk_sections(sections))
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+def time_encode(model, texts, batch_size):
+    started = time.perf_counter()
+    vectors = model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    return vectors, time.perf_counter() - started
+
+def query_latency_ms(model, queries, rounds=5):
+    samples = []
+    for _ in range(rounds):
+        for query in queries:
+            started = time.perf_counter()
+            model.encode(query, convert_to_numpy=True)
+            samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2)
+
+def normalize(vectors):
+    import numpy as np
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+def neighbour_overlap(reference_q, reference_c, candidate_q, candidate_c, k):
+    """Mean share of each query's top-k chunks that both backends retrieve."""
+    import numpy as np
+    k = min(k, reference_c.shape[0])
+    ref_top = np.argsort(-(reference_q @ reference_c.T), axis=1)[:, :k]
+    cand_top = np.argsort(-(candidate_q @ candidate_c.T), axis=1)[:, :k]
+    return round(float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)])), 4)
+
+def run(args, workdir):
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    from config import settings
+    from onnx_embedder import OnnxSentenceEncoder, export_onnx
+
+    texts = load_chunks(args.files or default_corpus(), args.max_chunks)
+    print(f"Embedding {len(texts)} chunks and {len(QUERIES)} queries")
+
+    torch_model = SentenceTransformer(settings.EMBEDDING_MODEL, device='cpu')
+    torch_model.encode(QUERIES[:1])
+    reference, torch_seconds = time_encode(torch_model, texts, args.batch_size)
+    reference_q = normalize(torch_model.encode(QUERIES, convert_to_numpy=True))
+    reference = normalize(reference)
+    backends = {
+        'torch': {
+            'seconds': round(torch_seconds, 4),
+            'texts_per_sec': round(len(texts) / torch_seconds, 2),
+            'query_latency_ms': query_latency_ms(torch_model, QUERIES)
+        }
+    }
+
+    export_dir = os.path.join(workdir, 'onnx')
+    export_onnx(settings.EMBEDDING_MODEL, export_dir, quantize='int8' in args.variants)
+    failed = False
+    for variant in args.variants:
+        model = OnnxSentenceEncoder(settings.EMBEDDING_MODEL, model_dir=export_dir, quantized=variant == 'int8')
+        model.encode(QUERIES[:1])
+        vectors, seconds = time_encode(model, texts, args.batch_size)
+        vectors = normalize(vectors)
+        cosines = np.sum(vectors * reference, axis=1)
+        candidate_q = normalize(model.encode(QUERIES, convert_to_numpy=True))
+        result = {
+            'seconds': round(seconds, 4),
+            'texts_per_sec': round(len(texts) / seconds, 2),
+            'speedup_vs_torch': round(torch_seconds / seconds, 2),
+            'query_latency_ms': query_latency_ms(model, QUERIES),
+            'cosine': {
+                'min': round(float(cosines.min()), 5),
+                'mean': round(float(cosines.mean()), 5),
+                'p1': round(float(np.percentile(cosines, 1)), 5)
+            },
+            f'top{args.top_k}_overlap': neighbour_overlap(reference_q, reference, candidate_q, vectors, args.top_k),
+            'model_mb': round((Path(export_dir) / ('model.int8.onnx' if variant == 'int8' else 'model.onnx')).stat().st_size / 2**20, 1)
+        }
+        result['parity_ok'] = result['cosine']['min'] >= args.min_cosine
+        failed = failed or not result['parity_ok']
+        backends[f'onnx_{variant}'] = result
+
+    return {
+        'benchmark': 'onnx_embeddings',
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {
+            'model': settings.EMBEDDING_MODEL,
+            'chunks': len(texts),
+            'batch_size': args.batch_size,
+            'min_cosine': args.min_cosine
+        },
+        'backends': backends
+    }, failed
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix='onnx-bench-') as workdir:
+        isolate_storage(workdir, stub_embeddings=True)
+        results, failed = run(args, workdir)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+    for name, data in results['backends'].items():
+        line = f"{name:<10} {data['texts_per_sec']:>9} texts/s  query {data['query_latency_ms']} ms"
+        if 'cosine' in data:
+            line += (f"  x{data['speedup_vs_torch']}  min cos {data['cosine']['min']}"
+                     f"  {'OK' if data['parity_ok'] else 'FAIL'}")
+        print(line)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
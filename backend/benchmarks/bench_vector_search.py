@@ -0,0 +1,178 @@
+"""
+Vector Search Benchmark
+Compares Chroma's HNSW query path with the in-process exact NumPy index
+(VECTOR_SEARCH_BACKEND=numpy) on the same embeddings: per-query latency
+and Chroma's recall@k against the exact top-k.
+
+By default a synthetic corpus of clustered unit vectors is used, sized like
+the lecture corpus; --from-collection benchmarks the real stored chunks.
+
+Usage (from the backend directory):
+    python benchmarks/bench_vector_search.py --docs 5000 --queries 500
+    python benchmarks/bench_vector_search.py --filter --output search.json
+    python benchmarks/bench_vector_search.py --from-collection
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Add backend to path
+sys.path.insert(0, str(BACKEND_DIR))
+
+from bench_ingestion import git_commit
+from bench_embedding_coalescing import percentile
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark Chroma HNSW against exact NumPy vector search")
+    parser.add_argument("--docs", type=int, default=5000, help="Synthetic chunks (default: 5000)")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (default: 384)")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per engine (default: 300)")
+    parser.add_argument("-k", type=int, default=5, help="Results per query (default: 5)")
+    parser.add_argument("--filter", action="store_true",
+                        help="Also time queries restricted to one source document (where filter)")
+    parser.add_argument("--from-collection", action="store_true",
+                        help="Use the embeddings of the active collection instead of a synthetic corpus")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    return parser.parse_args()
+
+def synthetic_corpus(docs: int, dim: int, rng):
+    """Unit vectors around a few hundred topic centroids, spread over 40 'lecture' sources."""
+    centroids = rng.standard_normal((max(8, docs // 20), dim)).astype(np.float32)
+    assignment = rng.integers(0, len(centroids), docs)
+    vectors = centroids[assignment] + 0.6 * rng.standard_normal((docs, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"chunk-{i}" for i in range(docs)]
+    documents = [f"synthetic chunk {i}" for i in range(docs)]
+    metadatas = [{'source': f"lecture_{i % 40:02d}.pdf", 'page': i % 60} for i in range(docs)]
+    return ids, vectors, documents, metadatas
+
+def query_vectors(vectors: np.ndarray, count: int, rng) -> np.ndarray:
+    """Queries near stored chunks, like a question about a specific slide."""
+    picks = vectors[rng.integers(0, len(vectors), count)]
+    queries = picks + 0.8 * rng.standard_normal(picks.shape).astype(np.float32) / np.sqrt(picks.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def time_queries(search, queries, where_for):
+    latencies, results = [], []
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        results.append(search(query, where_for(i)))
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return results, {
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'queries_per_sec': round(len(latencies) / sum(latencies), 1) if sum(latencies) else 0.0
+    }
+
+def recall(results, truth, k: int) -> float:
+    hits = sum(len(set(found['ids'][0]) & set(exact['ids'][0])) for found, exact in zip(results, truth))
+    expected = sum(min(k, len(exact['ids'][0])) for exact in truth)
+    return round(hits / expected, 4) if expected else 1.0
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix='search-bench-') as workdir:
+        if not args.from_collection:
+            # Keep the synthetic collection away from real data
+            os.environ['CHROMA_DB_PATH'] = os.path.join(workdir, 'chroma_db')
+            os.environ['COLLECTION_NAME'] = 'benchmark'
+        os.environ['EMBEDDING_PRELOAD'] = 'false'
+        os.environ['VECTOR_SEARCH_BACKEND'] = 'chroma'
+
+        from services import chroma_service
+        from services.vector_index import ExactVectorIndex
+        collection = chroma_service.collection
+
+        if not args.from_collection:
+            ids, vectors, documents, metadatas = synthetic_corpus(args.docs, args.dim, rng)
+            for start in range(0, len(ids), 5000):
+                collection.add(
+                    ids=ids[start:start + 5000],
+                    embeddings=vectors[start:start + 5000].tolist(),
+                    documents=documents[start:start + 5000],
+                    metadatas=metadatas[start:start + 5000]
+                )
+
+        started = time.perf_counter()
+        index = ExactVectorIndex()
+        index.load(collection)
+        load_seconds = round(time.perf_counter() - started, 3)
+        if not len(index):
+            print("Collection is empty; nothing to benchmark")
+            return
+        stored = index._matrix[:len(index)]
+        sources = sorted({(metadata or {}).get('source') for metadata in index._metadatas} - {None})
+        queries = query_vectors(stored, args.queries, rng)
+
+        def chroma_search(query, where):
+            return collection.query(
+                query_embeddings=[query.tolist()], n_results=args.k, where=where,
+                include=["documents", "metadatas", "distances"]
+            )
+
+        def numpy_search(query, where):
+            return index.query(query, n_results=args.k, where=where)
+
+        scenarios = {'unfiltered': lambda i: None}
+        if args.filter and sources:
+            scenarios['source_filter'] = lambda i: {'source': sources[i % len(sources)]}
+
+        report = {}
+        for name, where_for in scenarios.items():
+            # Warm both engines (HNSW segment load, BLAS threads) before timing
+            chroma_search(queries[0], where_for(0))
+            numpy_search(queries[0], where_for(0))
+            exact, numpy_latency = time_queries(numpy_search, queries, where_for)
+            approximate, chroma_latency = time_queries(chroma_search, queries, where_for)
+            report[name] = {
+                'chroma': {**chroma_latency, 'recall_at_k': recall(approximate, exact, args.k)},
+                'numpy': {**numpy_latency, 'recall_at_k': 1.0},
+                'speedup_p50': round(chroma_latency['p50_ms'] / numpy_latency['p50_ms'], 2)
+                               if numpy_latency['p50_ms'] else None
+            }
+            print(f"{name:<14} chroma p50 {chroma_latency['p50_ms']} ms (recall@{args.k} "
+                  f"{report[name]['chroma']['recall_at_k']}) | numpy p50 {numpy_latency['p50_ms']} ms | "
+                  f"x{report[name]['speedup_p50']}")
+
+    results = {
+        'benchmark': 'vector_search',
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': {
+            'corpus': 'collection' if args.from_collection else 'synthetic',
+            'documents': len(index),
+            'dimension': int(stored.shape[1]),
+            'queries': args.queries,
+            'k': args.k
+        },
+        'numpy_index': {**index.stats(), 'load_seconds': load_seconds},
+        'scenarios': report
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(results, indent=2) + '\n')
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Answer Cache Threshold Check
+Embeds labelled pairs of network security questions with the configured
+embedding model and checks ANSWER_CACHE_SIMILARITY against them.
+Paraphrases ("what is a firewall?" / "What's a firewall") should reach the
+threshold. Near misses that differ in the protocol, port, key size or
+attack they ask about ("what port does IKE use" / "what port does ESP
+use") must stay below it. The report shows the score range of each label
+and the recall and false hits at every candidate threshold.
+
+The answer cache also requires the retrieved chunks to match the cached
+entry, so a near miss that passes the threshold can still be stopped
+there. This check covers the first layer on its own.
+
+Exits with status 1 if any non-paraphrase reaches the threshold.
+
+Usage (from the backend directory):
+    python benchmarks/check_answer_cache_threshold.py
+    python benchmarks/check_answer_cache_threshold.py --threshold 0.95 --output threshold.json
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Add backend to path
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Same question, different wording: the cached answer is correct
+PARAPHRASES = [
+    ("What is a firewall?", "What's a firewall"),
+    ("What is a firewall?", "Can you explain what a firewall is?"),
+    ("How does a stateful firewall work?", "Explain how stateful firewalls work"),
+    ("What is a SYN flood attack?", "Explain the SYN flood attack"),
+    ("How does TLS establish a session key?", "How is the session key established in TLS?"),
+    ("What is the difference between symmetric and asymmetric encryption?",
+     "Symmetric vs asymmetric encryption: what is the difference?"),
+    ("What does an intrusion detection system do?", "What is the purpose of an IDS?"),
+    ("Why are salted password hashes harder to crack?", "Why does salting make password hashes harder to crack?"),
+    ("What port does IKE use?", "Which port is used by IKE?"),
+    ("What is a man-in-the-middle attack?", "Explain a man in the middle attack"),
+    ("How does HMAC provide message integrity?", "How is message integrity provided by HMAC?"),
+    ("What is a DMZ in network security?", "What does DMZ mean in network security?"),
+    ("How do digital certificates bind a public key to an identity?",
+     "How does a digital certificate tie a public key to an identity?"),
+    ("What is phishing?", "what is phishing"),
+    ("How does a VPN protect traffic?", "How does a VPN keep traffic secure?"),
+    ("What is the purpose of a nonce in authentication protocols?",
+     "Why are nonces used in authentication protocols?"),
+]
+
+# Similar wording, different question: the cached answer would be wrong
+NON_PARAPHRASES = [
+    ("What port does IKE use?", "What port does ESP use?"),
+    ("What port does IKE use?", "What port does NAT-T use?"),
+    ("What port does HTTPS use?", "What port does SSH use?"),
+    ("What port does DNS use?", "What port does DHCP use?"),
+    ("Is TCP connection-oriented?", "Is UDP connection-oriented?"),
+    ("What is the key size of AES-128?", "What is the key size of AES-256?"),
+    ("How does a stateful firewall work?", "How does a stateless firewall work?"),
+    ("What is a SYN flood attack?", "What is a UDP flood attack?"),
+    ("What is the difference between IDS and IPS?", "What is the difference between IDS and SIEM?"),
+    ("How does WPA2 authenticate clients?", "How does WPA3 authenticate clients?"),
+    ("What is the block size of DES?", "What is the block size of AES?"),
+    ("What does the AH header protect in IPsec?", "What does the ESP header protect in IPsec?"),
+    ("What is a worm?", "What is a trojan?"),
+    ("How does TLS 1.2 negotiate cipher suites?", "How does TLS 1.3 negotiate cipher suites?"),
+    ("What is a public key used for?", "What is a private key used for?"),
+    ("How long is an MD5 hash?", "How long is a SHA-256 hash?"),
+    ("What is symmetric encryption?", "What is asymmetric encryption?"),
+    ("What is tunnel mode in IPsec?", "What is transport mode in IPsec?"),
+]
+
+CANDIDATES = [0.85, 0.88, 0.90, 0.92, 0.94, 0.95, 0.96, 0.97, 0.98]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check the answer cache similarity threshold against labelled question pairs")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Threshold to check (default: ANSWER_CACHE_SIMILARITY)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    return parser.parse_args()
+
+def load_model():
+    """The model and backend EmbeddingService would use, without opening the vector store."""
+    from config import settings
+    if settings.EMBEDDING_BACKEND.lower() == 'onnx':
+        from onnx_embedder import OnnxSentenceEncoder
+        return OnnxSentenceEncoder(settings.EMBEDDING_MODEL)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(settings.EMBEDDING_MODEL, device='cpu')
+
+def score_pairs(model, pairs):
+    import numpy as np
+    left = np.asarray(model.encode([a for a, _ in pairs], convert_to_numpy=True), dtype=np.float32)
+    right = np.asarray(model.encode([b for _, b in pairs], convert_to_numpy=True), dtype=np.float32)
+    left /= np.maximum(np.linalg.norm(left, axis=1, keepdims=True), 1e-12)
+    right /= np.maximum(np.linalg.norm(right, axis=1, keepdims=True), 1e-12)
+    return [round(float(score), 4) for score in (left * right).sum(axis=1)]
+
+def main():
+    args = parse_args()
+    from config import settings
+    threshold = settings.ANSWER_CACHE_SIMILARITY if args.threshold is None else args.threshold
+
+    model = load_model()
+    positive = score_pairs(model, PARAPHRASES)
+    negative = score_pairs(model, NON_PARAPHRASES)
+
+    print(f"Model: {settings.EMBEDDING_MODEL} ({settings.EMBEDDING_BACKEND})")
+    print(f"Paraphrases:     {len(positive)} pairs, cosine {min(positive):.4f} - {max(positive):.4f}")
+    print(f"Non-paraphrases: {len(negative)} pairs, cosine {min(negative):.4f} - {max(negative):.4f}")
+    print(f"\n{'threshold':>9}  {'recall':>6}  false hits")
+    sweep = []
+    for candidate in sorted(set(CANDIDATES + [threshold])):
+        recall = sum(score >= candidate for score in positive) / len(positive)
+        false_hits = sum(score >= candidate for score in negative)
+        sweep.append({'threshold': candidate, 'recall': round(recall, 4), 'false_hits': false_hits})
+        marker = "  <- configured" if candidate == threshold else ""
+        print(f"{candidate:>9.2f}  {recall:>6.1%}  {false_hits}{marker}")
+
+    failures = [
+        {'pair': list(pair), 'cosine': score}
+        for pair, score in zip(NON_PARAPHRASES, negative) if score >= threshold
+    ]
+    for failure in failures:
+        print(f"FALSE HIT {failure['cosine']:.4f}: {failure['pair'][0]!r} / {failure['pair'][1]!r}")
+    print(f"\nThreshold {threshold}: {'OK' if not failures else 'FAILED'} "
+          f"(lowest safe threshold above {max(negative):.4f})")
+
+    if args.output:
+        results = {
+            'model': settings.EMBEDDING_MODEL,
+            'backend': settings.EMBEDDING_BACKEND,
+            'threshold': threshold,
+            'paraphrases': [{'pair': list(pair), 'cosine': score} for pair, score in zip(PARAPHRASES, positive)],
+            'non_paraphrases': [{'pair': list(pair), 'cosine': score} for pair, score in zip(NON_PARAPHRASES, negative)],
+            'sweep': sweep,
+            'false_hits': failures
+        }
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
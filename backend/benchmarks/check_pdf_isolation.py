@@ -0,0 +1,89 @@
+"""
+PDF Isolation Check
+Verifies that the isolated PDF extractor still works when forked from a
+large server process. The parent reserves a big anonymous mapping (like a
+server with torch and the embedding model loaded) and then extracts a
+generated two-page PDF through IsolatedPDFExtractor. The worker's memory
+cap must leave room above the inherited address space.
+
+Usage (from the backend directory):
+    python benchmarks/check_pdf_isolation.py
+    python benchmarks/check_pdf_isolation.py --parent-mb 4096 --memory-mb 256
+"""
+import sys
+import mmap
+import argparse
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Add backend to path
+sys.path.insert(0, str(BACKEND_DIR))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check PDF extraction from a worker forked off a large parent")
+    parser.add_argument("--parent-mb", type=int, default=3072,
+                        help="Address space the parent reserves before extracting (default: 3072)")
+    parser.add_argument("--memory-mb", type=int, default=None,
+                        help="Worker memory cap (default: PDF_WORKER_MEMORY_MB)")
+    return parser.parse_args()
+
+def write_pdf(path: Path, pages):
+    """Write a minimal PDF with one line of Helvetica text per page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects),)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    body = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    body += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(body))
+
+def main():
+    args = parse_args()
+    from services.pdf_extractor import IsolatedPDFExtractor
+
+    expected = ["Firewalls filter packets", "IKE uses UDP port 500"]
+    with tempfile.TemporaryDirectory(prefix='pdf-isolation-') as workdir:
+        pdf_path = Path(workdir) / 'sample.pdf'
+        write_pdf(pdf_path, expected)
+
+        # Reserved but untouched, so it costs address space, not RAM
+        ballast = mmap.mmap(-1, args.parent_mb * 1024 * 1024)
+        try:
+            extractor = IsolatedPDFExtractor(memory_limit_mb=args.memory_mb)
+            pages, dropped = extractor.extract(str(pdf_path))
+        finally:
+            ballast.close()
+
+    texts = [text.strip() for _, text in pages]
+    ok = not dropped and texts == expected
+    print(f"parent reserved {args.parent_mb} MB, worker cap {extractor.memory_limit_mb} MB: "
+          f"{len(pages)} pages extracted, {len(dropped)} dropped -> {'OK' if ok else 'FAILED'}")
+    if not ok:
+        print(f"pages: {texts}\ndropped: {dropped}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
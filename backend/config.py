@@ -16,19 +16,80 @@ class Settings(BaseSettings):
     # ChromaDB
     CHROMA_DB_PATH: str = "./data/chroma_db"
     COLLECTION_NAME: str = "network_security_docs"
+    VECTOR_SEARCH_BACKEND: str = "chroma"  # "chroma" (HNSW) or "numpy" (exact in-memory search, small corpora)
+    HYBRID_SEARCH_ENABLED: bool = True  # Fuse BM25 keyword scores with vector similarity in retrieval
+    HYBRID_ALPHA: float = 0.5  # Weight of vector similarity; the rest goes to normalized BM25
+    HYBRID_CANDIDATES: int = 20  # Chunks each retriever proposes before fusion
+    HYBRID_LEXICAL_WORKERS: int = 0  # Threads for BM25 lookups; 0 = FastAPI's threadpool size (40)
+    EMBEDDING_MIGRATE_ON_START: bool = True  # Rebuild in the background when EMBEDDING_MODEL/BACKEND change
+    MIGRATION_BATCH_SIZE: int = 256  # Stored chunks re-embedded per batch during a model migration
+    MIGRATION_CATCHUP_PASSES: int = 3  # Unlocked passes copying writes made during the bulk copy
     
     # Embedding
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_PRELOAD: bool = True  # Load the model in the background at startup
+    EMBEDDING_WARMUP: bool = True  # Run throwaway encodes before reporting the model ready
+    EMBEDDING_RETRY_AFTER_SECONDS: int = 5  # Retry-After sent with 503s while the model loads
+    EMBEDDING_BACKEND: str = "torch"  # "torch" (SentenceTransformer) or "onnx" (onnxruntime, CPU)
+    EMBEDDING_ONNX_PATH: str = "./data/onnx_models"  # Exported on first use if missing
+    EMBEDDING_ONNX_QUANTIZE: bool = True  # Use the dynamically int8-quantized graph
+    EMBEDDING_ONNX_THREADS: int = 0  # onnxruntime intra-op threads (0 = library default)
+    EMBEDDING_BATCH_SIZE: int = 32  # Texts per model.encode call on the bulk path
+    EMBEDDING_LENGTH_BUCKETING: bool = True  # Batch bulk texts of similar token length together
+    EMBEDDING_POOL_WORKERS: int = 0  # Bulk-ingest embedding processes; 0 = one per 4 CPUs, 1 = off
+    EMBEDDING_POOL_MIN_CORPUS_MB: float = 4.0  # Smallest ingest/migration (total input size) that starts the pool
+    EMBEDDING_POOL_RETRY_SECONDS: int = 300  # Embed in-process for this long after the pool fails
+    EMBEDDING_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # LRU budget for cached float32 vectors
+    EMBEDDING_STORE_ENABLED: bool = True  # Persist embeddings on disk across restarts/re-ingests
+    EMBEDDING_STORE_PATH: str = "./data/embedding_store"  # Memory-mapped float32 matrix per model
+    EMBEDDING_COALESCE_ENABLED: bool = True  # Batch concurrent single-text embed requests
+    EMBEDDING_COALESCE_WINDOW_MS: float = 5.0  # How long the first request waits for company
+    EMBEDDING_COALESCE_MAX_BATCH: int = 32  # Encode immediately once this many are queued
+    
+    # Q&A answer cache
+    ANSWER_CACHE_ENABLED: bool = True  # Reuse answers to reworded questions
+    ANSWER_CACHE_SIMILARITY: float = 0.92  # Question embedding cosine needed for a hit
+    ANSWER_CACHE_MAX_ENTRIES: int = 256  # LRU bound; emptied whenever the documents change
     
     # Paths
     DOCUMENTS_PATH: str = "./data/documents"
     UPLOAD_PATH: str = "./data/uploads"
     LOGS_PATH: str = "./logs"
     
+    # Ingestion
+    INGEST_WORKERS: int = 1  # Parser processes; 1 = serial, 0 = one per CPU
+    INGEST_BATCH_SIZE: int = 64  # Chunks embedded and stored per batch
+    INGEST_MANIFEST_PATH: str = "./data/ingest_manifest.json"
+    INGEST_JOB_CONCURRENCY: int = 1  # Uploads indexed in parallel in the background
+    INGEST_JOB_HISTORY: int = 100  # Finished jobs kept for status queries
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_PATH: str = "./data/parse_cache"  # Extracted text keyed by content hash
+    PDF_ISOLATE_EXTRACTION: bool = True  # Extract PDF pages in a killable child process
+    PDF_PAGE_TIMEOUT: float = 30.0  # Seconds allowed per page before it is dropped
+    PDF_FILE_TIMEOUT: float = 300.0  # Seconds allowed per PDF; remaining pages are dropped
+    PDF_WORKER_MEMORY_MB: int = 1024  # Address space the extraction process may add after fork (0 = no cap)
+    DEDUP_ENABLED: bool = True  # Drop near-duplicate chunks (title/agenda/"Questions?" slides)
+    DEDUP_MAX_HAMMING: int = 3  # Max SimHash bit difference treated as a duplicate (0-63)
+    BOILERPLATE_STRIP_ENABLED: bool = True  # Strip repeated footers/headers before chunking
+    BOILERPLATE_INDEX_PATH: str = "./data/boilerplate_index.json"
+    BOILERPLATE_DOC_RATIO: float = 0.5  # Line on this share of a document's pages/slides is boilerplate
+    BOILERPLATE_MIN_SECTIONS: int = 4  # Per-document rule only applies to documents this long
+    BOILERPLATE_CORPUS_MIN_DOCS: int = 5  # Line found in this many documents is boilerplate
+    BOILERPLATE_MAX_LINE_CHARS: int = 120  # Longer lines are content, never boilerplate
+    WATCH_DOCUMENTS: bool = False  # Auto-index changes under DOCUMENTS_PATH while the API runs
+    WATCH_POLL_INTERVAL: float = 2.0  # Seconds between directory scans
+    WATCH_DEBOUNCE_SECONDS: float = 5.0  # Quiet period before a burst of changes is applied
+    WATCH_MAX_RETRIES: int = 3  # Attempts at a file that fails to ingest before waiting for its next change
+    
+    # Chunking (token estimates for the embedding model's tokenizer)
+    CHUNK_TOKENS: int = 128  # Max tokens per chunk; MiniLM truncates at 256
+    CHUNK_OVERLAP_TOKENS: int = 24  # Trailing tokens repeated in the next chunk
+    
     # Security
     ENCRYPTION_KEY: Optional[str] = None
     ENABLE_AUDIT_LOGGING: bool = True
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes read per step while streaming uploads
     
     # Quiz
     QUIZ_POOL_SIZE: int = 100
@@ -0,0 +1,33 @@
+"""
+Entry points of the embedding process pool's workers.
+
+The workers are spawned, so they import the module of the function they
+run. This module sits outside the ``services`` package on purpose:
+importing anything under ``services`` runs ``services/__init__``, which
+opens ChromaDB and starts loading the server's embedding model, and every
+worker would do that before loading its own copy. For the same reason the
+entry points keep ``services`` out of their top level (a spawned worker
+re-runs the launching script as ``__mp_main__``): scripts/ingest_documents.py
+imports it inside its functions, and ``python main.py`` hands over to the
+uvicorn CLI before importing anything.
+"""
+import os
+from typing import List
+
+# Set once per worker by the pool initializer
+_model = None
+
+def init_worker(model_name: str, threads: int):
+    """Limit this worker's intra-op threads and load its copy of the model."""
+    global _model
+    # Read by OpenMP/MKL when torch is first imported in this process
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['MKL_NUM_THREADS'] = str(threads)
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads)
+    _model = SentenceTransformer(model_name, device='cpu')
+
+def encode_shard(texts: List[str], batch_size: int):
+    """Encode one contiguous shard of a batch with this worker's model."""
+    return _model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
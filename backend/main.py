@@ -3,13 +3,33 @@ Main FastAPI application for Network Security Tutor & Quiz Bot.
 Defines API endpoints for Q&A, quiz, document management, and health checks.
 Initializes services, configures CORS, and logging.
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+import os
+import sys
+
+if __name__ == "__main__":
+    # Serve through the uvicorn CLI instead of from this script. Worker
+    # processes spawned later (the embedding pool) re-run the launching
+    # script's top level, and this module opens ChromaDB and loads the model.
+    from config import settings
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+        "--host", settings.HOST,
+        "--port", str(settings.PORT)
+    ]
+    if settings.DEBUG:
+        command.append("--reload")
+    os.execv(sys.executable, command)
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from typing import List
-import os
-import shutil
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
+import hashlib
+import tempfile
 from pathlib import Path
+import aiofiles
 from loguru import logger
 
 from config import settings
@@ -21,7 +41,9 @@ from models import (
 )
 from agents import qa_tutor_agent, quiz_agent
 from services import (
-    chroma_service, ollama_service, document_processor
+    chroma_service, ollama_service,
+    ingestion_pipeline, ingest_manifest, ingestion_jobs,
+    document_watcher, model_migration
 )
 
 # Initialize FastAPI app
@@ -58,6 +80,25 @@ os.makedirs(settings.LOGS_PATH, exist_ok=True)
 os.makedirs(settings.CHROMA_DB_PATH, exist_ok=True)
     # Create necessary directories for document management
 
+# Multipart overhead allowed on top of MAX_UPLOAD_SIZE before rejecting by header
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """
+    Reject oversized uploads from the Content-Length header before the body
+    is read. Chunked uploads without a length are still capped while streaming.
+    """
+    if request.url.path == "/api/documents/upload":
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and \
+                int(content_length) > settings.MAX_UPLOAD_SIZE + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File exceeds maximum upload size of {settings.MAX_UPLOAD_SIZE} bytes"}
+            )
+    return await call_next(request)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
@@ -72,8 +113,25 @@ async def startup_event():
         logger.warning("Ollama service not available. Please start Ollama and pull the model.")
     
     logger.info(f"ChromaDB initialized with {chroma_service.count_documents()} documents")
+    
+    if settings.WATCH_DOCUMENTS:
+        document_watcher.start()
+    
+    # EMBEDDING_MODEL changed: keep serving the old collection while the new one is built
+    if settings.EMBEDDING_MIGRATE_ON_START and model_migration.start_if_pending():
+        logger.info(f"Migrating embeddings to {settings.EMBEDDING_MODEL} in the background")
+    
     logger.info("Application started successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the document watcher, background ingestion jobs and any model migration."""
+    document_watcher.stop()
+    model_migration.cancel()
+    ingestion_jobs.shutdown()
+    if chroma_service.lexical_index is not None:
+        chroma_service.lexical_index.save()
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -96,20 +154,103 @@ async def health_check():
     ollama_available = ollama_service.check_availability()
     chroma_initialized = chroma_service.count_documents() >= 0
     documents_count = chroma_service.count_documents()
+    embedding_model = chroma_service.embedding_service.readiness()
     
-    status = "healthy" if (ollama_available and chroma_initialized) else "degraded"
+    ready = ollama_available and chroma_initialized and embedding_model['state'] == 'ready'
+    status = "healthy" if ready else "degraded"
     
     return HealthResponse(
         status=status,
         ollama_available=ollama_available,
         chroma_initialized=chroma_initialized,
-        documents_indexed=documents_count
+        documents_indexed=documents_count,
+        embedding_model=embedding_model
+    )
+
+def _require_embedding_model():
+    """
+    Answer with 503 and Retry-After while the embedding model is still
+    loading, instead of holding the request until the load finishes.
+    Starts (or retries) the load if nothing is loading it yet.
+    """
+    embedding_service = chroma_service.embedding_service
+    if embedding_service.is_ready:
+        return
+    error = embedding_service.load_error
+    embedding_service.start_loading()
+    detail = "Embedding model is loading, please retry shortly"
+    if error:
+        detail = f"Embedding model failed to load ({error}); retrying"
+    raise HTTPException(
+        status_code=503,
+        detail=detail,
+        headers={"Retry-After": str(settings.EMBEDDING_RETRY_AFTER_SECONDS)}
     )
 
 # ============================================================================
 # Q&A Tutor Endpoints
 # ============================================================================
 
+@app.get("/api/embeddings/cache")
+async def get_embedding_cache_stats():
+    """Hit/miss/eviction counters and memory use of the embedding cache."""
+    return chroma_service.embedding_service.cache_stats()
+
+@app.get("/api/collections")
+async def get_collections():
+    """Active, building and rollback collections with the progress of any model migration."""
+    return model_migration.status()
+
+@app.post("/api/collections/migrate", status_code=202)
+async def migrate_collection(model: Optional[str] = None, backend: Optional[str] = None):
+    """
+    Re-embed the stored documents with another model in a new collection.
+    
+    - **model**: Target embedding model (defaults to EMBEDDING_MODEL)
+    - **backend**: torch or onnx (defaults to EMBEDDING_BACKEND)
+    
+    The current collection keeps serving until the new one has caught up,
+    then reads switch over. Poll /api/collections for progress.
+    """
+    try:
+        return model_migration.start(model, backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting model migration: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/collections/migrate/cancel")
+async def cancel_collection_migration():
+    """Stop a running migration; a later migration to the same model resumes it."""
+    return model_migration.cancel()
+
+@app.post("/api/collections/rollback")
+async def rollback_collection():
+    """Switch back to the collection replaced by the last migration."""
+    try:
+        return await run_in_threadpool(model_migration.rollback)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rolling back collection: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/api/collections/previous")
+async def drop_previous_collection():
+    """Delete the collection kept for rollback."""
+    try:
+        previous = model_migration.drop_previous()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if previous is None:
+        raise HTTPException(status_code=404, detail="No previous collection")
+    return {"message": "Previous collection deleted", "collection": previous}
+
 @app.post("/api/qa/ask", response_model=QuestionResponse)
 async def ask_question(request: QuestionRequest):
     """
@@ -121,14 +262,24 @@ async def ask_question(request: QuestionRequest):
     Endpoint for asking questions to the Q&A Tutor Agent.
     Processes the request and returns the answer.
     """
+    _require_embedding_model()
     try:
         logger.info(f"Received question: {request.question}")
-        response = qa_tutor_agent.answer_question(request)
+        # Run off the event loop so concurrent questions can share embedding batches
+        response = await run_in_threadpool(qa_tutor_agent.answer_question, request)
         return response
     except Exception as e:
         logger.error(f"Error processing question: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/qa/cache")
+async def get_answer_cache_stats():
+    """Hit/miss counters of the semantic answer cache."""
+    answer_cache = qa_tutor_agent.answer_cache
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.stats()}
+
 # ============================================================================
 # Quiz Agent Endpoints
 # ============================================================================
@@ -147,6 +298,7 @@ async def generate_quiz(request: QuizGenerationRequest):
     Endpoint for generating a new quiz.
     Accepts quiz parameters and returns the generated quiz.
     """
+    _require_embedding_model()
     try:
         logger.info(f"Generating quiz: {request}")
         quiz = quiz_agent.generate_quiz(request)
@@ -167,9 +319,10 @@ async def grade_quiz(quiz_id: str, submissions: List[AnswerSubmission]):
     Endpoint for grading a quiz submission.
     Accepts quiz ID and submissions, returns grading results.
     """
+    _require_embedding_model()
     try:
         logger.info(f"Grading quiz: {quiz_id}")
-        grading = quiz_agent.grade_quiz(quiz_id, submissions)
+        grading = await run_in_threadpool(quiz_agent.grade_quiz, quiz_id, submissions)
         return grading
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -181,11 +334,8 @@ async def grade_quiz(quiz_id: str, submissions: List[AnswerSubmission]):
 # Document Management Endpoints
 # ============================================================================
 
-@app.post("/api/documents/upload")
-async def upload_document(
-    file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = None
-):
+@app.post("/api/documents/upload", status_code=202)
+async def upload_document(file: UploadFile = File(...)):
     """
     Upload a document to be indexed.
     
@@ -193,7 +343,8 @@ async def upload_document(
     """
     """
     Endpoint for uploading documents to be indexed.
-    Validates file type and processes the document.
+    Validates file type, saves the document and queues it for background
+    indexing. Poll /api/documents/jobs/{job_id} for progress.
     """
     try:
         # Validate file type
@@ -206,34 +357,39 @@ async def upload_document(
                 detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Save file
-        file_path = os.path.join(settings.UPLOAD_PATH, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Stream to disk, enforcing the size limit and hashing as we go
+        filename = os.path.basename(file.filename)
+        file_path = os.path.join(settings.UPLOAD_PATH, filename)
+        part_path, size, sha256 = await _stream_upload_to_disk(file, file_path)
         
-        logger.info(f"Uploaded file: {file.filename}")
+        # Identical content is already indexed: nothing to parse or embed
+        existing_path = ingest_manifest.find_by_sha256(sha256)
+        if existing_path:
+            os.remove(part_path)
+            entry = ingest_manifest.get(existing_path)
+            logger.info(f"Upload {filename} matches already indexed {existing_path}")
+            return JSONResponse(status_code=200, content={
+                "message": "Document already indexed",
+                "filename": filename,
+                "sha256": sha256,
+                "duplicate_of": os.path.basename(existing_path),
+                "chunks_indexed": len(entry['chunk_ids']) if entry else 0
+            })
         
-        # Process and index document
-        chunks = document_processor.process_file(file_path)
+        os.replace(part_path, file_path)
+        logger.info(f"Uploaded file: {filename} ({size} bytes)")
         
-        if chunks:
-            texts = [chunk['text'] for chunk in chunks]
-            metadatas = [chunk['metadata'] for chunk in chunks]
-            
-            doc_ids = chroma_service.add_documents(texts, metadatas)
-            
-            logger.info(f"Indexed {len(doc_ids)} chunks from {file.filename}")
-            
-            return {
-                "message": "Document uploaded and indexed successfully",
-                "filename": file.filename,
-                "chunks_indexed": len(doc_ids)
-            }
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Failed to extract content from document"
-            )
+        # Parse and index in the background
+        job = ingestion_jobs.submit(file_path, filename)
+        
+        return {
+            "message": "Document uploaded and queued for indexing",
+            "filename": filename,
+            "sha256": sha256,
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/documents/jobs/{job.id}"
+        }
     
     except HTTPException:
         raise
@@ -241,16 +397,103 @@ async def upload_document(
         logger.error(f"Error uploading document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _stream_upload_to_disk(file: UploadFile, file_path: str) -> Tuple[str, int, str]:
+    """
+    Copy an upload to a uniquely named temporary '.part' file next to
+    ``file_path`` in fixed-size chunks, computing its SHA-256 in the same
+    pass. Concurrent uploads of the same name each get their own file, and
+    the caller moves the finished one into place with an atomic rename.
+    
+    Returns:
+        (part_path, size_in_bytes, sha256_hex)
+    
+    Raises:
+        HTTPException: 413 as soon as the upload exceeds MAX_UPLOAD_SIZE
+    """
+    fd, part_path = tempfile.mkstemp(
+        dir=os.path.dirname(file_path),
+        prefix=f".{os.path.basename(file_path)}.",
+        suffix=".part"
+    )
+    os.close(fd)
+    # mkstemp creates the file owner-only; give the upload the usual permissions
+    os.chmod(part_path, 0o644)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(part_path, "wb") as buffer:
+            while True:
+                block = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds maximum upload size of {settings.MAX_UPLOAD_SIZE} bytes"
+                    )
+                digest.update(block)
+                await buffer.write(block)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return part_path, size, digest.hexdigest()
+
+@app.get("/api/documents/jobs")
+async def list_ingestion_jobs():
+    """List recent background ingestion jobs."""
+    return {"jobs": [job.to_dict() for job in ingestion_jobs.list_jobs()]}
+
+@app.get("/api/documents/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """
+    Get the status of a background ingestion job.
+    
+    Reports pages parsed, chunks embedded and any errors.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+@app.post("/api/documents/jobs/{job_id}/cancel")
+async def cancel_ingestion_job(job_id: str):
+    """Cancel a queued or running ingestion job."""
+    job = ingestion_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+@app.get("/api/documents/watcher")
+async def get_watcher_status():
+    """Status of the DOCUMENTS_PATH watcher and its last incremental sync."""
+    return document_watcher.status()
+
 @app.post("/api/documents/ingest-directory")
-async def ingest_directory(directory_path: str = None):
+async def ingest_directory(
+    directory_path: str = None,
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    force: bool = False,
+    reparse: bool = False,
+    dedup: Optional[bool] = None,
+    strip_boilerplate: Optional[bool] = None
+):
     """
     Ingest all documents from a directory.
     
     - **directory_path**: Path to directory (defaults to DOCUMENTS_PATH)
+    - **workers**: Parser processes (defaults to INGEST_WORKERS, 0 = one per CPU)
+    - **batch_size**: Chunks embedded and stored per batch (defaults to INGEST_BATCH_SIZE)
+    - **force**: Re-ingest files even if they are unchanged since the last run
+    - **reparse**: Ignore the parse cache and re-run the parsers (implies force)
+    - **dedup**: Drop near-duplicate chunks (defaults to DEDUP_ENABLED)
+    - **strip_boilerplate**: Remove repeated footer/header lines (defaults to BOILERPLATE_STRIP_ENABLED)
     """
     """
     Endpoint for ingesting all documents from a specified directory.
-    Processes and indexes documents found in the directory.
+    Only new or modified files are parsed; chunks of removed files are deleted.
     """
     try:
         path = directory_path or settings.DOCUMENTS_PATH
@@ -259,27 +502,32 @@ async def ingest_directory(directory_path: str = None):
             raise HTTPException(status_code=404, detail=f"Directory not found: {path}")
         
         logger.info(f"Ingesting documents from: {path}")
-        chunks = document_processor.process_directory(path)
+        # Parsing and embedding a whole directory blocks; keep it off the event loop
+        summary = await run_in_threadpool(
+            ingestion_pipeline.ingest_directory,
+            path,
+            workers=workers,
+            batch_size=batch_size,
+            force=force,
+            reparse=reparse,
+            dedup=dedup,
+            strip_boilerplate=strip_boilerplate
+        )
         
-        if chunks:
-            texts = [chunk['text'] for chunk in chunks]
-            metadatas = [chunk['metadata'] for chunk in chunks]
-            
-            doc_ids = chroma_service.add_documents(texts, metadatas)
-            
-            logger.info(f"Indexed {len(doc_ids)} chunks from directory")
-            
-            return {
-                "message": "Directory ingested successfully",
-                "directory": path,
-                "chunks_indexed": len(doc_ids),
-                "total_documents": chroma_service.count_documents()
-            }
+        if summary['chunks_indexed']:
+            logger.info(f"Indexed {summary['chunks_indexed']} chunks from directory")
+            message = "Directory ingested successfully"
+        elif summary['files_unchanged'] or summary['files_removed']:
+            message = "Directory is up to date"
         else:
-            return {
-                "message": "No documents found or processed",
-                "directory": path
-            }
+            message = "No documents found or processed"
+        
+        return {
+            "message": message,
+            "directory": path,
+            **summary,
+            "total_documents": chroma_service.count_documents()
+        }
     
     except HTTPException:
         raise
@@ -309,18 +557,102 @@ async def clear_documents():
     Use with caution as this will delete all documents.
     """
     try:
-        chroma_service.delete_all()
+        # Waits for a running ingest instead of clearing underneath it
+        await run_in_threadpool(ingestion_pipeline.clear)
         logger.warning("All documents cleared from database")
         return {"message": "All documents cleared successfully"}
     except Exception as e:
         logger.error(f"Error clearing documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "backend.main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=settings.DEBUG
-    )
+@app.get("/api/documents")
+async def list_documents():
+    """
+    List indexed source documents.
+    
+    Each entry has a stable doc_id (derived from the file path) used by the
+    per-document delete and reindex endpoints.
+    """
+    try:
+        documents = [
+            {
+                "doc_id": entry['doc_id'],
+                "source": os.path.basename(entry['path']),
+                "path": entry['path'],
+                "sha256": entry['sha256'],
+                "size": entry['size'],
+                "chunks": len(entry['chunk_ids']),
+                "indexed_at": entry['indexed_at']
+            }
+            for entry in ingest_manifest.documents()
+        ]
+        return {"documents": documents, "total": len(documents)}
+    except Exception as e:
+        logger.error(f"Error listing documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _indexed_path(doc_id: str) -> str:
+    """Resolve a document id to its indexed file path or raise 404."""
+    path = ingest_manifest.find_by_document_id(doc_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Document not found: {doc_id}")
+    return path
+
+@app.delete("/api/documents/{doc_id}")
+async def delete_document(doc_id: str, delete_file: bool = False):
+    """
+    Remove one source document's chunks from the index.
+    
+    - **delete_file**: Also delete the file from disk. Otherwise a later
+      directory ingest will index it again.
+    """
+    try:
+        path = _indexed_path(doc_id)
+        # May re-ingest documents whose duplicate chunks this one held
+        result = await run_in_threadpool(ingestion_pipeline.remove_files, [path])
+        if delete_file and os.path.exists(path):
+            os.remove(path)
+        logger.info(f"Deleted document {doc_id} ({path}): {result['chunks_deleted']} chunks")
+        return {
+            "message": "Document deleted",
+            "doc_id": doc_id,
+            "source": os.path.basename(path),
+            "chunks_deleted": result['chunks_deleted'],
+            "files_rechecked": result['files_rechecked'],
+            "file_deleted": delete_file
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting document {doc_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/documents/{doc_id}/reindex", status_code=202)
+async def reindex_document(doc_id: str):
+    """
+    Re-parse and re-embed one source document in the background.
+    
+    Only this document's chunks are replaced; chunk ids are derived from the
+    source, location and content, so the rest of the collection is untouched.
+    """
+    try:
+        path = _indexed_path(doc_id)
+        if not os.path.exists(path):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Source file no longer exists: {path}. Delete the document instead."
+            )
+        job = ingestion_jobs.submit(path, os.path.basename(path), force=True)
+        return {
+            "message": "Document queued for reindexing",
+            "doc_id": doc_id,
+            "source": os.path.basename(path),
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/documents/jobs/{job.id}"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reindexing document {doc_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
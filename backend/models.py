@@ -118,3 +118,4 @@ class HealthResponse(BaseModel):
     ollama_available: bool
     chroma_initialized: bool
     documents_indexed: int
+    embedding_model: Dict[str, Any]
@@ -0,0 +1,157 @@
+"""
+ONNX export and inference for the embedding model (EMBEDDING_BACKEND=onnx).
+
+This module sits outside the ``services`` package so that
+scripts/export_onnx_model.py and the benchmarks can import it without
+running ``services/__init__``, which opens ChromaDB and loads the
+server's embedding model.
+"""
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union
+import numpy as np
+from loguru import logger
+from config import settings
+
+def onnx_model_dir(model_name: str, root: Optional[str] = None) -> Path:
+    """Directory holding the exported ONNX files for a model."""
+    return Path(root or settings.EMBEDDING_ONNX_PATH) / model_name.replace('/', '_')
+
+def export_onnx(
+    model_name: str,
+    output_dir: Optional[str] = None,
+    quantize: bool = True
+) -> Path:
+    """
+    Export a SentenceTransformer's transformer to ONNX, with an optional
+    dynamically int8-quantized copy.
+
+    The tokenizer and the pooling/normalization settings are saved alongside
+    so OnnxSentenceEncoder can reproduce ``SentenceTransformer.encode``.
+    Requires torch (installed with sentence-transformers) and onnxruntime.
+
+    Returns:
+        The export directory
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out = Path(output_dir) if output_dir else onnx_model_dir(model_name)
+    out.mkdir(parents=True, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    tokenizer.save_pretrained(str(out))
+
+    pooling = next((module for module in st_model if type(module).__name__ == 'Pooling'), None)
+    if pooling is not None and not getattr(pooling, 'pooling_mode_mean_tokens', True):
+        raise ValueError(f"{model_name} does not use mean pooling; ONNX export is not supported")
+
+    sample = tokenizer(["export sample"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            str(out / 'model.onnx'),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(str(out / 'model.onnx'), str(out / 'model.int8.onnx'), weight_type=QuantType.QInt8)
+
+    with open(out / 'encoder_config.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'model': model_name,
+            'max_seq_length': st_model.max_seq_length,
+            'dimension': st_model.get_sentence_embedding_dimension(),
+            'normalize': any(type(module).__name__ == 'Normalize' for module in st_model)
+        }, f, indent=2)
+    logger.info(f"Exported {model_name} to ONNX at {out} (quantized: {quantize})")
+    return out
+
+class OnnxSentenceEncoder:
+    """
+    CPU embedding backend running an exported transformer through onnxruntime.
+
+    Mirrors the parts of the SentenceTransformer API that EmbeddingService
+    uses (``encode`` and ``get_sentence_embedding_dimension``): tokenize with
+    truncation, run the graph, mean-pool over the attention mask and
+    L2-normalize when the original model does. The model is exported on
+    first use if no export exists yet.
+    """
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        model_dir: Optional[str] = None,
+        quantized: Optional[bool] = None,
+        threads: Optional[int] = None
+    ):
+        try:
+            import onnxruntime
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=onnx requires onnxruntime (pip install onnxruntime)"
+            ) from e
+
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.quantized = settings.EMBEDDING_ONNX_QUANTIZE if quantized is None else quantized
+        directory = Path(model_dir) if model_dir else onnx_model_dir(self.model_name)
+        model_file = directory / ('model.int8.onnx' if self.quantized else 'model.onnx')
+        if not model_file.exists():
+            export_onnx(self.model_name, str(directory), quantize=self.quantized)
+
+        with open(directory / 'encoder_config.json', 'r', encoding='utf-8') as f:
+            self.config: Dict[str, Any] = json.load(f)
+        self.max_seq_length = self.config['max_seq_length']
+        self.normalize = self.config['normalize']
+        self.tokenizer = AutoTokenizer.from_pretrained(str(directory))
+
+        options = onnxruntime.SessionOptions()
+        threads = settings.EMBEDDING_ONNX_THREADS if threads is None else threads
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_file), sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self._input_names = {node.name for node in self.session.get_inputs()}
+        logger.info(f"ONNX embedding backend ready: {model_file}")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config['dimension']
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        **_: Any
+    ) -> np.ndarray:
+        """Embed one text (1-D result) or a list of texts (2-D float32 result)."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+            hidden = self.session.run(None, feeds)[0]
+            mask = encoded['attention_mask'][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            outputs.append(pooled.astype(np.float32))
+        vectors = np.concatenate(outputs) if outputs else np.zeros((0, self.get_sentence_embedding_dimension()), np.float32)
+        return vectors[0] if single else vectors
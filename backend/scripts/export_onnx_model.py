@@ -0,0 +1,48 @@
+"""
+Export ONNX Embedding Model Script
+Exports EMBEDDING_MODEL to ONNX (plus an int8-quantized copy) for
+EMBEDDING_BACKEND=onnx. The backend also exports on first use; run this
+ahead of time to keep the export off the serving path.
+"""
+import sys
+import os
+import argparse
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import settings
+from onnx_embedder import export_onnx, onnx_model_dir
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument(
+        "--model",
+        default=settings.EMBEDDING_MODEL,
+        help="SentenceTransformer model to export (default: EMBEDDING_MODEL)"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Export directory (default: EMBEDDING_ONNX_PATH/<model>)"
+    )
+    parser.add_argument(
+        "--no-quantize",
+        dest="quantize",
+        action="store_false",
+        help="Only export the fp32 graph"
+    )
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    output = export_onnx(args.model, args.output or str(onnx_model_dir(args.model)), quantize=args.quantize)
+    print(f"\n✅ Exported {args.model} to {output}")
+    for name in ('model.onnx', 'model.int8.onnx'):
+        path = output / name
+        if path.exists():
+            print(f"   - {name}: {path.stat().st_size / 2**20:.1f} MB")
+    print("   Set EMBEDDING_BACKEND=onnx to use it.")
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,258 @@
 """
 Ingest Sample Documents Script
 Run this script to populate the database with sample documents
+
+Progress is checkpointed after every stored batch: if a run is interrupted,
+running the same command again resumes where it stopped.
 """
 import sys
 import os
+import time
+import argparse
 
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from services import document_processor, chroma_service
+# The services package is imported inside the functions that use it: spawned
+# embedding workers re-run this script's top level, and importing services
+# opens ChromaDB and starts loading the model
 from config import settings
 from loguru import logger
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest documents into ChromaDB")
+    parser.add_argument(
+        "--directory",
+        default=settings.DOCUMENTS_PATH,
+        help="Directory to ingest (default: DOCUMENTS_PATH)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parser processes (default: INGEST_WORKERS, 0 = one per CPU)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Chunks embedded and stored per batch (default: INGEST_BATCH_SIZE)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-ingest every file, even if unchanged since the last run"
+    )
+    parser.add_argument(
+        "--reparse",
+        action="store_true",
+        help="Ignore the parse cache and re-run the document parsers (implies --force)"
+    )
+    parser.add_argument(
+        "--no-dedup",
+        dest="dedup",
+        action="store_false",
+        default=None,
+        help="Keep near-duplicate chunks (default: DEDUP_ENABLED)"
+    )
+    parser.add_argument(
+        "--no-strip-boilerplate",
+        dest="strip_boilerplate",
+        action="store_false",
+        default=None,
+        help="Keep repeated footer/header lines (default: BOILERPLATE_STRIP_ENABLED)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Parse and chunk without embedding or storing; print chunk and token totals"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard checkpoints of an interrupted run instead of resuming it"
+    )
+    parser.add_argument(
+        "--no-progress",
+        dest="show_progress",
+        action="store_false",
+        help="Do not print the live progress line"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After the initial run, keep watching the directory and index changes as they happen"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=None,
+        help="Seconds between directory scans in watch mode (default: WATCH_POLL_INTERVAL)"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=None,
+        help="Quiet seconds before changes are applied in watch mode (default: WATCH_DEBOUNCE_SECONDS)"
+    )
+    return parser.parse_args()
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def print_progress(stats):
+    """Rewrite a single status line with files, chunks, rate and ETA."""
+    eta = stats.eta_seconds()
+    rate = stats.chunks / stats.elapsed if stats.elapsed > 0 else 0.0
+    line = (f"[{stats.files_committed}/{stats.files_planned} files] "
+            f"{stats.pages} pages parsed, {stats.chunks} chunks embedded")
+    if stats.chunks_resumed:
+        line += f" ({stats.chunks_resumed} resumed)"
+    line += f" | {rate:.1f} chunks/s | ETA {format_duration(eta) if eta is not None else '--'}"
+    sys.stderr.write(f"\r{line:<100}")
+    sys.stderr.flush()
+
+def dry_run(args):
+    """Report what an ingest would do, without embedding anything."""
+    from services import ingestion_pipeline
+    estimate = ingestion_pipeline.estimate(
+        ingestion_pipeline.processor.list_files(args.directory),
+        workers=args.workers,
+        force=args.force,
+        reparse=args.reparse,
+        strip_boilerplate=args.strip_boilerplate
+    )
+    for failure in estimate['failures']:
+        logger.warning(f"Would skip {failure['file']}: {failure['error']}")
+    
+    print("\n🔎 Dry run (nothing embedded or stored)")
+    for item in estimate['per_file']:
+        print(f"   - {os.path.basename(item['file'])}: {item['pages']} pages, "
+              f"{item['chunks']} chunks, {item['tokens']} tokens")
+    batch_size = args.batch_size or settings.INGEST_BATCH_SIZE
+    batches = -(-estimate['chunks'] // batch_size)
+    print(f"   Files to process: {estimate['files_to_process']} "
+          f"({estimate['files_unchanged']} unchanged, {len(estimate['failures'])} failed)")
+    print(f"   Totals: {estimate['pages']} pages, {estimate['chunks']} chunks, "
+          f"{estimate['tokens']} tokens in {batches} batches of {batch_size}")
+
+def report(summary):
+    """Log and print the outcome of an ingestion run."""
+    from services import chroma_service
+    for failure in summary['failures']:
+        logger.warning(f"Skipped {failure['file']}: {failure['error']}")
+    for dropped in summary['dropped_pages']:
+        logger.warning(f"Dropped page {dropped['page']} of {dropped['file']}: {dropped['reason']}")
+    
+    if not summary['chunks_indexed']:
+        if summary['chunks_resumed']:
+            print(f"\n✅ Resumed run finished: {summary['chunks_resumed']} chunks were already stored")
+        elif summary['files_unchanged'] or summary['files_removed']:
+            print(f"\n✅ Up to date: {summary['files_unchanged']} unchanged files, "
+                  f"{summary['files_removed']} removed")
+        else:
+            logger.warning("No documents found or processed")
+        return
+    
+    logger.info(f"Successfully indexed {summary['chunks_indexed']} chunks")
+    logger.info(f"Total documents in database: {chroma_service.count_documents()}")
+    
+    throughput = summary['throughput']
+    print("\n✅ Document ingestion complete!")
+    print(f"   - Processed {summary['chunks_indexed']} chunks from {summary['files_processed']} files")
+    print(f"   - Skipped {summary['files_unchanged']} unchanged files, removed {summary['files_removed']}")
+    if summary['chunks_resumed']:
+        print(f"   - Resumed {summary['chunks_resumed']} chunks stored by an interrupted run")
+    if summary['failures']:
+        print(f"   - Failed files: {len(summary['failures'])}")
+    if summary['dropped_pages']:
+        print(f"   - Dropped PDF pages: {len(summary['dropped_pages'])} (see log for reasons)")
+    near_duplicates = summary['near_duplicates']
+    if near_duplicates['chunks_dropped']:
+        print(f"   - Dropped {near_duplicates['chunks_dropped']} near-duplicate chunks "
+              f"(~{near_duplicates['storage_bytes_saved'] // 1024} KB saved)")
+    boilerplate = summary['boilerplate']
+    if boilerplate['lines_removed']:
+        print(f"   - Stripped {boilerplate['lines_removed']} boilerplate lines "
+              f"({boilerplate['token_reduction_pct']}% fewer tokens)")
+    print(f"   - Throughput: {throughput['pages_per_sec']} pages/s, "
+          f"{throughput['chunks_per_sec']} chunks/s, {throughput['embeddings_per_sec']} embeddings/s")
+    print(f"   - Total documents: {chroma_service.count_documents()}")
+
+def watch(args):
+    """Poll the directory until interrupted, applying changes incrementally."""
+    from services import ingestion_pipeline
+    from services.document_watcher import DocumentWatcher
+    watcher = DocumentWatcher(
+        ingestion_pipeline,
+        args.directory,
+        poll_interval=args.poll_interval,
+        debounce=args.debounce
+    )
+    # The initial run already reconciled the directory; start from its current state
+    watcher.baseline()
+    print(f"\n👀 Watching {args.directory} for changes (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(watcher.poll_interval)
+            watcher.poll()
+            summary = watcher.flush()
+            if summary is None:
+                continue
+            if 'chunks_indexed' in summary:
+                report(summary)
+            else:
+                print(f"\n✅ Removed {summary['files_removed']} files "
+                      f"({summary['chunks_deleted']} chunks)")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
 def main():
+    args = parse_args()
+    from services import ingestion_pipeline, ingest_manifest
     logger.info("Starting document ingestion...")
     
     # Check if documents directory exists
-    if not os.path.exists(settings.DOCUMENTS_PATH):
-        logger.error(f"Documents directory not found: {settings.DOCUMENTS_PATH}")
+    if not os.path.exists(args.directory):
+        logger.error(f"Documents directory not found: {args.directory}")
         return
     
-    # Process all documents in the directory
-    chunks = document_processor.process_directory(settings.DOCUMENTS_PATH)
-    
-    if not chunks:
-        logger.warning("No documents found or processed")
+    if args.dry_run:
+        dry_run(args)
         return
     
-    # Add to ChromaDB
-    texts = [chunk['text'] for chunk in chunks]
-    metadatas = [chunk['metadata'] for chunk in chunks]
+    checkpoints = ingest_manifest.checkpoint_count()
+    if checkpoints and not args.restart:
+        logger.info(f"Resuming interrupted run ({checkpoints} partly stored files)")
     
-    doc_ids = chroma_service.add_documents(texts, metadatas)
-    
-    logger.info(f"Successfully indexed {len(doc_ids)} chunks")
-    logger.info(f"Total documents in database: {chroma_service.count_documents()}")
+    # Stream all documents in the directory into ChromaDB
+    try:
+        summary = ingestion_pipeline.ingest_directory(
+            args.directory,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            force=args.force,
+            reparse=args.reparse,
+            dedup=args.dedup,
+            strip_boilerplate=args.strip_boilerplate,
+            progress=print_progress if args.show_progress else None,
+            resume=not args.restart
+        )
+    except KeyboardInterrupt:
+        sys.stderr.write("\n")
+        print("\n⏸  Interrupted. Progress is checkpointed; run the same command again to resume.")
+        return
+    if args.show_progress:
+        sys.stderr.write("\n")
+    report(summary)
     
-    print("\n✅ Document ingestion complete!")
-    print(f"   - Processed {len(chunks)} chunks")
-    print(f"   - Total documents: {chroma_service.count_documents()}")
+    if args.watch:
+        watch(args)
 
 if __name__ == "__main__":
     main()
@@ -2,10 +2,24 @@
 from services.embedding_service import embedding_service, chroma_service
 from services.ollama_service import ollama_service
 from services.document_processor import document_processor
+from services.ingest_manifest import ingest_manifest
+from services.boilerplate import boilerplate_filter
+from services.ingestion_service import ingestion_pipeline
+from services.ingestion_jobs import ingestion_jobs
+from services.document_watcher import document_watcher
+from services.model_migration import model_migration
+from services.hybrid_retriever import hybrid_retriever
 
 __all__ = [
     'embedding_service',
     'chroma_service',
     'ollama_service',
-    'document_processor'
+    'document_processor',
+    'ingest_manifest',
+    'boilerplate_filter',
+    'ingestion_pipeline',
+    'ingestion_jobs',
+    'document_watcher',
+    'model_migration',
+    'hybrid_retriever'
 ]
@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+from config import settings
+
+class SemanticAnswerCache:
+    """
+    LRU cache of Q&A answers looked up by question meaning, not spelling.
+
+    Rewordings such as "what is a firewall?" and "What's a firewall" miss
+    OllamaService's exact-prompt cache but embed almost identically. Each
+    entry holds the unit-normalized question embedding (the one already
+    computed for retrieval), so a lookup is one matrix-vector product over
+    at most ``max_entries`` rows. The best match at or above
+    ``similarity`` cosine is a hit.
+
+    Similarity alone cannot tell "what port does IKE use" from "what port
+    does ESP use", which MiniLM scores above 0.92. Each entry therefore
+    also keeps the ids of the chunks its answer was generated from, and a
+    lookup only considers entries whose chunk ids equal the ones retrieved
+    for the new question: the answer is reused only when it would have been
+    generated from the same context. ``benchmarks/check_answer_cache_threshold.py``
+    measures the threshold against labelled question pairs.
+
+    Answers depend on the stored documents, so every entry is tagged with
+    ChromaDBService's ``version``. Any write, delete or collection switch
+    bumps it, and the first lookup or store that sees a newer version
+    empties the cache, so an answer generated while the collection changed
+    is never served.
+    """
+    def __init__(self, max_entries: Optional[int] = None, similarity: Optional[float] = None):
+        self.max_entries = settings.ANSWER_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.similarity = settings.ANSWER_CACHE_SIMILARITY if similarity is None else similarity
+        self._entries: "OrderedDict[int, Any]" = OrderedDict()
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._chunk_ids: Dict[int, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self._next_key = 0
+        self.version = 0
+        self.model_key: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Similar enough, but retrieval found different chunks
+        self.context_mismatches = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _sync(self, version: int, model_key: str) -> bool:
+        """Drop every entry if the collection moved on; False if ``version`` is older than the cache."""
+        if version < self.version:
+            return False
+        if version > self.version or model_key != self.model_key:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._vectors.clear()
+            self._chunk_ids.clear()
+            self.version = version
+            self.model_key = model_key
+        return True
+
+    def get(
+        self,
+        embedding,
+        version: int,
+        model_key: str,
+        chunk_ids: Sequence[str]
+    ) -> Optional[Any]:
+        """
+        Find the answer to the most similar cached question with the same context.
+
+        Args:
+            embedding: Question embedding from ``model_key``
+            version: Collection version the caller is about to answer from
+            model_key: Embedding model of the active collection
+            chunk_ids: Ids of the chunks retrieved for the question, in rank order
+
+        Returns:
+            The cached answer, or None below the similarity threshold or
+            if the similar questions were answered from other chunks
+        """
+        query = self._normalize(embedding)
+        chunk_ids = tuple(chunk_ids)
+        with self._lock:
+            if not self._sync(version, model_key) or not self._entries:
+                self.misses += 1
+                return None
+            keys = list(self._vectors)
+            scores = np.stack([self._vectors[key] for key in keys]) @ query
+            similar = [i for i in np.argsort(-scores) if scores[i] >= self.similarity]
+            match = next((keys[i] for i in similar if self._chunk_ids[keys[i]] == chunk_ids), None)
+            if match is None:
+                if similar:
+                    self.context_mismatches += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            self.hits += 1
+            return self._entries[match]
+
+    def put(self, embedding, answer: Any, version: int, model_key: str, chunk_ids: Sequence[str]):
+        """
+        Store an answer computed from collection ``version``, evicting the least recently used entry.
+
+        Args:
+            embedding: Question embedding from ``model_key``
+            answer: The response to reuse
+            version: Collection version the answer was generated from
+            model_key: Embedding model of the active collection
+            chunk_ids: Ids of the chunks the answer was generated from, in rank order
+        """
+        if self.max_entries <= 0:
+            return
+        vector = self._normalize(embedding)
+        with self._lock:
+            if not self._sync(version, model_key):
+                return
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = answer
+            self._vectors[key] = vector
+            self._chunk_ids[key] = tuple(chunk_ids)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                del self._vectors[old_key]
+                del self._chunk_ids[old_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._chunk_ids.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'similarity': self.similarity,
+                'collection_version': self.version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'context_mismatches': self.context_mismatches,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
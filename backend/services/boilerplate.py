@@ -0,0 +1,156 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from loguru import logger
+from config import settings
+from services.chunker import count_tokens
+
+_DIGIT_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+# What is left of a page/slide number or date line once its digits are removed
+_PAGE_NUMBER_RE = re.compile(r"(?:page|slide|pg|p|of|[\W_])*")
+
+def line_key(line: str) -> str:
+    """
+    Normalize a line and hash it.
+
+    Case and spacing are ignored. Digits are only ignored in page-number-like
+    lines ("Page 3 of 40", "- 12 -", "10/05/2023"), so those share a key
+    across pages; any other line must repeat exactly, so "Port 22 is SSH"
+    and "Port 80 is HTTP" stay distinct.
+    """
+    normalized = _SPACE_RE.sub(' ', line.strip().lower())
+    if _DIGIT_RE.search(normalized) and _PAGE_NUMBER_RE.fullmatch(_DIGIT_RE.sub('', normalized)):
+        normalized = _DIGIT_RE.sub('0', normalized)
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+class BoilerplateFilter:
+    """
+    Strips repeated boilerplate lines (footers, course codes, slide numbers,
+    copyright notices) from extracted sections before chunking.
+
+    A line is boilerplate if it appears on at least ``doc_ratio`` of the
+    sections of its own document, or in at least ``corpus_min_docs``
+    different documents. The corpus-wide line index is persisted so
+    incremental runs and single uploads benefit from earlier ingestion.
+    """
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        doc_ratio: Optional[float] = None,
+        min_sections: Optional[int] = None,
+        corpus_min_docs: Optional[int] = None,
+        max_line_chars: Optional[int] = None
+    ):
+        self.index_path = Path(index_path or settings.BOILERPLATE_INDEX_PATH)
+        self.doc_ratio = doc_ratio or settings.BOILERPLATE_DOC_RATIO
+        self.min_sections = min_sections or settings.BOILERPLATE_MIN_SECTIONS
+        self.corpus_min_docs = corpus_min_docs or settings.BOILERPLATE_CORPUS_MIN_DOCS
+        self.max_line_chars = max_line_chars or settings.BOILERPLATE_MAX_LINE_CHARS
+        self._lock = threading.Lock()
+        # Held across snapshot and write, so concurrent saves land in order
+        self._save_lock = threading.Lock()
+        self._documents: Dict[str, List[str]] = self._load()
+        self._corpus_counts: Counter = Counter(
+            key for keys in self._documents.values() for key in keys
+        )
+
+    def _load(self) -> Dict[str, List[str]]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('documents', {})
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable boilerplate index {self.index_path}: {e}")
+            return {}
+
+    def save(self):
+        """Atomically write the corpus line index to disk."""
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps({'version': 1, 'documents': self._documents})
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            # The CLI and the server may save at the same time
+            tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.index_path)
+
+    def _set_document(self, doc_key: str, keys: List[str]):
+        with self._lock:
+            self._corpus_counts.subtract(self._documents.pop(doc_key, []))
+            self._documents[doc_key] = keys
+            self._corpus_counts.update(keys)
+
+    def forget(self, doc_key: str):
+        """Remove a deleted document from the corpus index."""
+        with self._lock:
+            self._corpus_counts.subtract(self._documents.pop(doc_key, []))
+
+    def clear(self):
+        """Forget every document, e.g. after the collection is wiped."""
+        with self._lock:
+            self._documents = {}
+            self._corpus_counts = Counter()
+        self.save()
+
+    def strip(
+        self,
+        doc_key: str,
+        sections: List[Dict[str, Any]],
+        record: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Record a document's lines in the corpus index and strip boilerplate.
+
+        Args:
+            doc_key: Stable key of the document (its absolute path)
+            sections: Extracted sections of the document
+            record: Update the corpus index; pass False to preview (dry runs)
+
+        Returns:
+            (sections, stats) where empty sections are dropped and stats holds
+            'lines_removed', 'tokens_before' and 'tokens_after'
+        """
+        section_lines = [
+            [(line, line_key(line)) for line in section['text'].split('\n') if line.strip()]
+            for section in sections
+        ]
+        doc_counts = Counter(key for lines in section_lines for key in {k for _, k in lines})
+        candidates = sorted({
+            key for lines in section_lines for line, key in lines
+            if len(line.strip()) <= self.max_line_chars
+        })
+        if record:
+            self._set_document(doc_key, candidates)
+
+        per_doc_min = max(2, self.doc_ratio * len(sections))
+        with self._lock:
+            # When previewing, count this document as if it had been recorded
+            unrecorded = set() if record else set(candidates) - set(self._documents.get(doc_key, ()))
+            boilerplate = {
+                key for key in candidates
+                if (len(sections) >= self.min_sections and doc_counts[key] >= per_doc_min)
+                or self._corpus_counts[key] + (key in unrecorded) >= self.corpus_min_docs
+            }
+
+        stripped = []
+        stats = {'lines_removed': 0, 'tokens_before': 0, 'tokens_after': 0}
+        for section, lines in zip(sections, section_lines):
+            kept = [line for line, key in lines if key not in boilerplate]
+            stats['lines_removed'] += len(lines) - len(kept)
+            text = '\n'.join(kept).strip()
+            stats['tokens_before'] += count_tokens(section['text'])
+            stats['tokens_after'] += count_tokens(text)
+            if text:
+                stripped.append({'text': text, 'metadata': section['metadata']})
+        return stripped, stats
+
+# Singleton instance
+boilerplate_filter = BoilerplateFilter()
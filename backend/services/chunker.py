@@ -0,0 +1,179 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from config import settings
+
+# Rough WordPiece approximation: every word or punctuation mark is at least
+# one token and long words are split into ~6 character pieces. This tracks
+# the MiniLM tokenizer closely enough for sizing windows without loading it.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?;])\s+(?=["\'(\[]?[A-Z0-9])')
+_BULLET_RE = re.compile(r"^\s*(?:[-*•▪◦●]|\d+[.)])\s+")
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of embedding-model tokens in a piece of text."""
+    return sum(max(1, (len(token) + 5) // 6) for token in _TOKEN_RE.findall(text))
+
+def _is_heading(line: str) -> bool:
+    """Heuristically detect a heading line (markdown, numbered or short title-like)."""
+    stripped = line.strip()
+    if not stripped:
+        return False
+    if stripped.startswith('#'):
+        return True
+    if len(stripped) > 80 or stripped[-1] in '.,;:!?' or _BULLET_RE.match(stripped):
+        return False
+    words = stripped.split()
+    return len(words) <= 8 and (stripped.isupper() or stripped.istitle())
+
+class TextChunker:
+    """
+    Token-aware sliding-window chunker.
+
+    Text is split into units at heading, paragraph/line and sentence
+    boundaries, then packed into windows of at most ``max_tokens`` tokens.
+    Consecutive windows share about ``overlap_tokens`` tokens of trailing
+    sentences, except across a heading, which always starts a new chunk.
+    Chunk text is an exact slice of the input so offsets can be cited.
+    """
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None
+    ):
+        self.max_tokens = max_tokens or settings.CHUNK_TOKENS
+        overlap = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.overlap_tokens = max(0, min(overlap, self.max_tokens // 2))
+
+    def _split_long(self, text: str, start: int, end: int) -> List[Tuple[int, int, int]]:
+        """Hard-split an over-long sentence on word boundaries."""
+        pieces = []
+        piece_start = None
+        piece_tokens = 0
+        for match in re.finditer(r"\S+", text[start:end]):
+            tokens = count_tokens(match.group())
+            if piece_start is not None and piece_tokens + tokens > self.max_tokens:
+                pieces.append((piece_start, piece_end, piece_tokens))
+                piece_start, piece_tokens = None, 0
+            if piece_start is None:
+                piece_start = start + match.start()
+            piece_end = start + match.end()
+            piece_tokens += tokens
+        if piece_start is not None:
+            pieces.append((piece_start, piece_end, piece_tokens))
+        return pieces
+
+    def _units(self, text: str) -> List[Dict[str, Any]]:
+        """Split text into sentence/heading units with character offsets."""
+        units = []
+        for line_match in re.finditer(r"[^\n]+", text):
+            line = line_match.group()
+            if not line.strip():
+                continue
+            line_start = line_match.start()
+
+            if _is_heading(line):
+                units.append({
+                    'start': line_start + (len(line) - len(line.lstrip())),
+                    'end': line_start + len(line.rstrip()),
+                    'tokens': count_tokens(line),
+                    'heading': True
+                })
+                continue
+
+            sentence_start = 0
+            bounds = [m.start() for m in _SENTENCE_END_RE.finditer(line)] + [len(line)]
+            for bound in bounds:
+                sentence = line[sentence_start:bound]
+                if sentence.strip():
+                    start = line_start + sentence_start + (len(sentence) - len(sentence.lstrip()))
+                    end = line_start + sentence_start + len(sentence.rstrip())
+                    for piece_start, piece_end, tokens in self._split_long(text, start, end):
+                        units.append({
+                            'start': piece_start,
+                            'end': piece_end,
+                            'tokens': tokens,
+                            'heading': False
+                        })
+                sentence_start = bound
+        return units
+
+    def split(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Split text into overlapping token windows.
+
+        Returns:
+            List of dicts with 'text', 'char_start', 'char_end' and 'tokens'
+        """
+        units = self._units(text)
+        chunks: List[Dict[str, Any]] = []
+        window: List[Dict[str, Any]] = []
+        window_tokens = 0
+
+        def flush(carry_overlap: bool):
+            nonlocal window, window_tokens
+            # Never end a chunk on a dangling heading; it belongs to the next one.
+            trailing = []
+            while window and window[-1]['heading']:
+                trailing.insert(0, window.pop())
+            if window:
+                chunks.append({
+                    'text': text[window[0]['start']:window[-1]['end']],
+                    'char_start': window[0]['start'],
+                    'char_end': window[-1]['end'],
+                    'tokens': sum(unit['tokens'] for unit in window)
+                })
+            carried = []
+            if carry_overlap and not trailing:
+                carried_tokens = 0
+                for unit in reversed(window[1:]):
+                    if carried_tokens + unit['tokens'] > self.overlap_tokens:
+                        break
+                    carried.insert(0, unit)
+                    carried_tokens += unit['tokens']
+            window = carried + trailing
+            window_tokens = sum(unit['tokens'] for unit in window)
+
+        for unit in units:
+            if unit['heading'] and any(not u['heading'] for u in window):
+                flush(carry_overlap=False)
+            elif window_tokens + unit['tokens'] > self.max_tokens and window:
+                flush(carry_overlap=True)
+                if window_tokens + unit['tokens'] > self.max_tokens:
+                    # No room for overlap next to this unit; keep only headings.
+                    window = [u for u in window if u['heading']]
+                    window_tokens = sum(u['tokens'] for u in window)
+            window.append(unit)
+            window_tokens += unit['tokens']
+
+        if window:
+            # Emit headings-only tails too rather than dropping text.
+            if all(unit['heading'] for unit in window):
+                chunks.append({
+                    'text': text[window[0]['start']:window[-1]['end']],
+                    'char_start': window[0]['start'],
+                    'char_end': window[-1]['end'],
+                    'tokens': window_tokens
+                })
+            else:
+                flush(carry_overlap=False)
+
+        return chunks
+
+    def chunk(self, text: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Split a section of a document into chunks carrying offset metadata."""
+        return [
+            {
+                'text': piece['text'],
+                'metadata': {
+                    **metadata,
+                    'chunk_index': index,
+                    'char_start': piece['char_start'],
+                    'char_end': piece['char_end'],
+                    'tokens': piece['tokens']
+                }
+            }
+            for index, piece in enumerate(self.split(text))
+        ]
+
+# Singleton instance
+text_chunker = TextChunker()
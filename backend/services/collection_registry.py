@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+from loguru import logger
+from config import settings
+
+def collection_entry(name: str, model: str, backend: str) -> Dict[str, Any]:
+    return {
+        'name': name,
+        'model': model,
+        'backend': backend.lower(),
+        'created_at': datetime.now().isoformat()
+    }
+
+class CollectionRegistry:
+    """
+    Persistent record of which Chroma collection serves reads and which
+    embedding model produced its vectors.
+
+    Collections are versioned (``<COLLECTION_NAME>_v<n>``) so a collection
+    for a new model can be built next to the one being served. The registry
+    tracks three slots: ``active`` (queried and written), ``building`` (a
+    migration in progress) and ``previous`` (the collection replaced by the
+    last switch, kept for rollback). Without a registry file the unversioned
+    ``COLLECTION_NAME`` collection is assumed to hold vectors of the
+    configured model, which is how databases from before versioning look.
+    """
+    def __init__(self, registry_path: Optional[str] = None):
+        self.registry_path = Path(registry_path or os.path.join(settings.CHROMA_DB_PATH, 'collections.json'))
+        self.base_name = settings.COLLECTION_NAME
+        self._lock = threading.Lock()
+        # One save at a time; a stale snapshot must not replace a newer one
+        self._save_lock = threading.Lock()
+        data = self._load()
+        self.active: Dict[str, Any] = data.get('active') or collection_entry(
+            self.base_name, settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND
+        )
+        self.building: Optional[Dict[str, Any]] = data.get('building')
+        self.previous: Optional[Dict[str, Any]] = data.get('previous')
+        self._next_version: int = data.get('next_version', 1)
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.registry_path.exists():
+            return {}
+        try:
+            with open(self.registry_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable collection registry {self.registry_path}: {e}")
+            return {}
+        if not self._owns(data.get('active')):
+            logger.warning(
+                f"Collection registry {self.registry_path} belongs to another COLLECTION_NAME; ignoring it"
+            )
+            return {}
+        return data
+
+    def _owns(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return bool(entry) and re.fullmatch(rf"{re.escape(self.base_name)}(_v\d+)?", entry['name']) is not None
+
+    def save(self):
+        """Atomically write the registry to disk."""
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps({
+                    'version': 1,
+                    'active': self.active,
+                    'building': self.building,
+                    'previous': self.previous,
+                    'next_version': self._next_version
+                }, indent=2)
+            self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.registry_path.with_name(f"{self.registry_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.registry_path)
+
+    @staticmethod
+    def same_model(entry: Optional[Dict[str, Any]], model: str, backend: str) -> bool:
+        return bool(entry) and entry['model'] == model and entry['backend'] == backend.lower()
+
+    def begin_build(self, model: str, backend: str) -> Dict[str, Any]:
+        """
+        Reserve a collection for the given model, reusing an unfinished build
+        for the same model so an interrupted migration resumes.
+        """
+        with self._lock:
+            if not self.same_model(self.building, model, backend):
+                self.building = collection_entry(f"{self.base_name}_v{self._next_version}", model, backend)
+                self._next_version += 1
+            building = self.building
+        self.save()
+        return building
+
+    def abandon_build(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            building, self.building = self.building, None
+        self.save()
+        return building
+
+    def activate_build(self) -> Optional[Dict[str, Any]]:
+        """
+        Make the finished build active and keep the replaced collection as
+        ``previous``.
+
+        Returns:
+            The previous ``previous`` entry, whose collection is no longer
+            referenced and can be dropped
+        """
+        with self._lock:
+            released = self.previous
+            self.previous = self.active
+            self.active = dict(self.building, activated_at=datetime.now().isoformat())
+            self.building = None
+        self.save()
+        return released
+
+    def swap_previous(self):
+        """Make ``previous`` active again (rollback); the rolled-back collection becomes ``previous``."""
+        with self._lock:
+            self.active, self.previous = dict(self.previous, activated_at=datetime.now().isoformat()), self.active
+        self.save()
+
+    def release_previous(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            previous, self.previous = self.previous, None
+        self.save()
+        return previous
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'active': self.active,
+                'building': self.building,
+                'previous': self.previous
+            }
@@ -1,6 +1,9 @@
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterator
 from pypdf import PdfReader
 from docx import Document
 from pptx import Presentation
@@ -8,6 +11,14 @@ import markdown
 from bs4 import BeautifulSoup
 from loguru import logger
 from config import settings
+from services.chunker import text_chunker
+from services.parse_cache import parse_cache
+from services.ingest_manifest import file_sha256
+from services.pdf_extractor import pdf_extractor
+
+# Version of the text extraction logic. Bump it whenever extract_* output
+# changes so stale parse cache entries are ignored.
+PARSER_VERSION = "1"
 
 class DocumentProcessor:
     """
@@ -21,153 +32,347 @@ class DocumentProcessor:
         Initialize DocumentProcessor with supported file extensions.
         """
         self.supported_extensions = {'.pdf', '.docx', '.pptx', '.txt', '.md'}
+        self.chunker = text_chunker
+        self.parse_cache = parse_cache
     
-    def process_pdf(self, file_path: str) -> List[Dict[str, Any]]:
+    def extract_pdf(
+        self,
+        file_path: str,
+        dropped: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Extract text from PDF file and return as chunks with metadata.
+        Extract one section of text per non-empty PDF page.
+        
+        With PDF_ISOLATE_EXTRACTION, pages are extracted in a child process
+        under per-page/per-file time budgets and a memory cap; pages that
+        exceed them are skipped and appended to ``dropped``.
         """
-        """Extract text from PDF file."""
-        chunks = []
-        try:
+        sections = []
+        filename = os.path.basename(file_path)
+        
+        if settings.PDF_ISOLATE_EXTRACTION:
+            page_texts, skipped = pdf_extractor.extract(file_path)
+            if dropped is not None:
+                dropped.extend(skipped)
+        else:
             reader = PdfReader(file_path)
-            filename = os.path.basename(file_path)
-            
-            for page_num, page in enumerate(reader.pages, start=1):
-                text = page.extract_text()
-                if text.strip():
-                    chunks.append({
-                        'text': text.strip(),
-                        'metadata': {
-                            'source': filename,
-                            'page': page_num,
-                            'type': 'pdf'
-                        }
-                    })
-            
-            logger.info(f"Extracted {len(chunks)} pages from PDF: {filename}")
-        except Exception as e:
-            logger.error(f"Error processing PDF {file_path}: {e}")
+            page_texts = [
+                (page_num, page.extract_text())
+                for page_num, page in enumerate(reader.pages, start=1)
+            ]
         
-        return chunks
-    
-    def process_docx(self, file_path: str) -> List[Dict[str, Any]]:
-        """
-        Extract text from DOCX file and return as chunks with metadata.
-        """
-        """Extract text from DOCX file."""
-        chunks = []
-        try:
-            doc = Document(file_path)
-            filename = os.path.basename(file_path)
-            
-            full_text = []
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    full_text.append(para.text.strip())
-            
-            # Combine into larger chunks (by paragraphs)
-            text = "\n\n".join(full_text)
-            if text:
-                chunks.append({
-                    'text': text,
+        for page_num, text in page_texts:
+            if text.strip():
+                sections.append({
+                    'text': text.strip(),
                     'metadata': {
                         'source': filename,
-                        'type': 'docx'
+                        'page': page_num,
+                        'type': 'pdf'
                     }
                 })
-            
-            logger.info(f"Extracted text from DOCX: {filename}")
-        except Exception as e:
-            logger.error(f"Error processing DOCX {file_path}: {e}")
         
-        return chunks
+        logger.info(f"Extracted {len(sections)} pages from PDF: {filename}")
+        return sections
     
-    def process_pptx(self, file_path: str) -> List[Dict[str, Any]]:
-        """Extract text from PPTX file."""
-        chunks = []
-        try:
-            prs = Presentation(file_path)
-            filename = os.path.basename(file_path)
-            
-            for slide_num, slide in enumerate(prs.slides, start=1):
-                text_parts = []
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text.strip():
-                        text_parts.append(shape.text.strip())
-                
-                if text_parts:
-                    chunks.append({
-                        'text': "\n".join(text_parts),
-                        'metadata': {
-                            'source': filename,
-                            'slide': slide_num,
-                            'type': 'pptx'
-                        }
-                    })
-            
-            logger.info(f"Extracted {len(chunks)} slides from PPTX: {filename}")
-        except Exception as e:
-            logger.error(f"Error processing PPTX {file_path}: {e}")
+    def extract_docx(self, file_path: str) -> List[Dict[str, Any]]:
+        """Extract the paragraphs of a DOCX file as a single section."""
+        sections = []
+        doc = Document(file_path)
+        filename = os.path.basename(file_path)
         
-        return chunks
+        full_text = []
+        for para in doc.paragraphs:
+            if para.text.strip():
+                full_text.append(para.text.strip())
+        
+        # Paragraph breaks become chunk boundaries where the window allows
+        text = "\n\n".join(full_text)
+        if text:
+            sections.append({
+                'text': text,
+                'metadata': {
+                    'source': filename,
+                    'type': 'docx'
+                }
+            })
+        
+        logger.info(f"Extracted text from DOCX: {filename}")
+        return sections
     
-    def process_text(self, file_path: str) -> List[Dict[str, Any]]:
-        """Extract text from plain text or markdown file."""
-        chunks = []
-        try:
-            filename = os.path.basename(file_path)
-            ext = os.path.splitext(file_path)[1].lower()
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+    def extract_pptx(self, file_path: str) -> List[Dict[str, Any]]:
+        """Extract one section of text per non-empty slide."""
+        sections = []
+        prs = Presentation(file_path)
+        filename = os.path.basename(file_path)
+        
+        for slide_num, slide in enumerate(prs.slides, start=1):
+            text_parts = []
+            for shape in slide.shapes:
+                if hasattr(shape, "text") and shape.text.strip():
+                    text_parts.append(shape.text.strip())
             
-            if text.strip():
-                chunks.append({
-                    'text': text.strip(),
+            if text_parts:
+                sections.append({
+                    'text': "\n".join(text_parts),
                     'metadata': {
                         'source': filename,
-                        'type': ext[1:]  # Remove the dot
+                        'slide': slide_num,
+                        'type': 'pptx'
                     }
                 })
-            
-            logger.info(f"Extracted text from {ext.upper()}: {filename}")
-        except Exception as e:
-            logger.error(f"Error processing text file {file_path}: {e}")
         
+        logger.info(f"Extracted {len(sections)} slides from PPTX: {filename}")
+        return sections
+    
+    def extract_text(self, file_path: str) -> List[Dict[str, Any]]:
+        """Extract a plain text or markdown file as a single section."""
+        sections = []
+        filename = os.path.basename(file_path)
+        ext = os.path.splitext(file_path)[1].lower()
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        
+        if text.strip():
+            sections.append({
+                'text': text.strip(),
+                'metadata': {
+                    'source': filename,
+                    'type': ext[1:]  # Remove the dot
+                }
+            })
+        
+        logger.info(f"Extracted text from {ext.upper()}: {filename}")
+        return sections
+    
+    def chunk_sections(self, sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Split extracted sections (pages, slides, files) into embedding-sized chunks."""
+        chunks = []
+        for section in sections:
+            chunks.extend(self.chunker.chunk(section['text'], section['metadata']))
         return chunks
     
-    def process_file(self, file_path: str) -> List[Dict[str, Any]]:
-        """Process a file based on its extension."""
+    def _process(self, file_path: str, extract, label: str, raise_errors: bool) -> List[Dict[str, Any]]:
+        """Run an extractor and chunk its output, logging (or re-raising) failures."""
+        try:
+            return self.chunk_sections(extract(file_path))
+        except Exception as e:
+            logger.error(f"Error processing {label} {file_path}: {e}")
+            if raise_errors:
+                raise
+            return []
+    
+    def process_pdf(self, file_path: str, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """Extract text from PDF file and return as chunks with metadata."""
+        return self._process(file_path, self.extract_pdf, "PDF", raise_errors)
+    
+    def process_docx(self, file_path: str, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """Extract text from DOCX file and return as chunks with metadata."""
+        return self._process(file_path, self.extract_docx, "DOCX", raise_errors)
+    
+    def process_pptx(self, file_path: str, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """Extract text from PPTX file and return as chunks with metadata."""
+        return self._process(file_path, self.extract_pptx, "PPTX", raise_errors)
+    
+    def process_text(self, file_path: str, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """Extract text from plain text or markdown file."""
+        return self._process(file_path, self.extract_text, "text file", raise_errors)
+    
+    def extract_file(
+        self,
+        file_path: str,
+        use_cache: bool = True,
+        dropped: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract sections from a file, reusing the parse cache when possible.
+        
+        The cache is keyed by content hash and PARSER_VERSION; with
+        ``use_cache=False`` the file is always re-parsed and the cache entry
+        refreshed. Results with dropped PDF pages are not cached so the
+        pages are retried on the next re-parse.
+        
+        Raises:
+            ValueError: If the file type is not supported
+        """
         ext = os.path.splitext(file_path)[1].lower()
+        extractors = {
+            '.pdf': self.extract_pdf,
+            '.docx': self.extract_docx,
+            '.pptx': self.extract_pptx,
+            '.txt': self.extract_text,
+            '.md': self.extract_text
+        }
+        if ext not in extractors:
+            raise ValueError(f"Unsupported file type: {ext}")
         
+        sha256 = file_sha256(file_path)
+        if use_cache:
+            sections = self.parse_cache.get(sha256, PARSER_VERSION)
+            if sections is not None:
+                # Cached under the name the content was first seen with
+                filename = os.path.basename(file_path)
+                for section in sections:
+                    section['metadata']['source'] = filename
+                logger.debug(f"Parse cache hit: {filename}")
+                return sections
+        
+        skipped: List[Dict[str, Any]] = []
         if ext == '.pdf':
-            return self.process_pdf(file_path)
-        elif ext == '.docx':
-            return self.process_docx(file_path)
-        elif ext == '.pptx':
-            return self.process_pptx(file_path)
-        elif ext in {'.txt', '.md'}:
-            return self.process_text(file_path)
+            sections = self.extract_pdf(file_path, skipped)
+        else:
+            sections = extractors[ext](file_path)
+        
+        if skipped:
+            if dropped is not None:
+                dropped.extend(skipped)
         else:
+            self.parse_cache.put(sha256, PARSER_VERSION, sections)
+        return sections
+    
+    def process_file(
+        self,
+        file_path: str,
+        raise_errors: bool = False,
+        use_cache: bool = True,
+        dropped: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Process a file based on its extension, using the parse cache."""
+        ext = os.path.splitext(file_path)[1].lower()
+        
+        if ext not in self.supported_extensions:
             logger.warning(f"Unsupported file type: {ext}")
             return []
+        
+        try:
+            return self.chunk_sections(self.extract_file(file_path, use_cache, dropped))
+        except Exception as e:
+            logger.error(f"Error processing {ext[1:].upper()} {file_path}: {e}")
+            if raise_errors:
+                raise
+            return []
     
-    def process_directory(self, directory_path: str) -> List[Dict[str, Any]]:
-        """Process all supported documents in a directory."""
-        all_chunks = []
+    def list_files(self, directory_path: str) -> List[str]:
+        """List supported documents under a directory in a stable, sorted order."""
         directory = Path(directory_path)
-        
         if not directory.exists():
             logger.error(f"Directory does not exist: {directory_path}")
-            return all_chunks
+            return []
+        
+        return sorted(
+            str(file_path) for file_path in directory.rglob('*')
+            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions
+        )
+    
+    def iter_files(
+        self,
+        file_paths: List[str],
+        workers: Optional[int] = None,
+        use_cache: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily parse files, yielding one result dict per file in input order.
+        
+        With a process pool only a small window of files is in flight at
+        once, so a slow consumer (e.g. embedding) holds back parsing instead
+        of letting parsed chunks pile up in memory.
+        
+        Yields:
+            Dict with 'file', extracted 'sections', 'dropped_pages' and
+            'error' (None on success)
+        """
+        workers = resolve_workers(workers)
+        
+        if workers <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                yield _process_file_worker(file_path, use_cache)
+            return
+        
+        workers = min(workers, len(file_paths))
+        logger.info(f"Parsing {len(file_paths)} files with {workers} worker processes")
+        remaining = iter(file_paths)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque(
+                pool.submit(_process_file_worker, file_path, use_cache)
+                for file_path in islice(remaining, workers * 2)
+            )
+            while pending:
+                result = pending.popleft().result()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    pending.append(pool.submit(_process_file_worker, next_path, use_cache))
+                yield result
+    
+    def process_files(
+        self,
+        file_paths: List[str],
+        workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse a batch of files, optionally fanning out to a process pool.
         
-        for file_path in directory.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
-                chunks = self.process_file(str(file_path))
-                all_chunks.extend(chunks)
+        Chunks are merged back in the order of ``file_paths`` regardless of
+        which worker finishes first. A file that fails to parse is reported
+        in ``failures`` and does not abort the rest of the batch.
+        
+        Args:
+            file_paths: Files to process
+            workers: Pool size (1 = serial, 0 = one per CPU). Defaults to
+                settings.INGEST_WORKERS.
+        
+        Returns:
+            Dict with 'chunks', 'failures' and 'files_processed'
+        """
+        all_chunks = []
+        failures = []
+        files_seen = 0
+        for result in self.iter_files(file_paths, workers):
+            files_seen += 1
+            if result['error']:
+                logger.error(f"Failed to process {result['file']}: {result['error']}")
+                failures.append({'file': result['file'], 'error': result['error']})
+            else:
+                all_chunks.extend(self.chunk_sections(result['sections']))
+        
+        return {
+            'chunks': all_chunks,
+            'failures': failures,
+            'files_processed': files_seen - len(failures)
+        }
+    
+    def process_directory(
+        self,
+        directory_path: str,
+        workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Process all supported documents in a directory."""
+        result = self.process_files(self.list_files(directory_path), workers)
+        all_chunks = result['chunks']
         
         logger.info(f"Processed {len(all_chunks)} total chunks from directory: {directory_path}")
         return all_chunks
 
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """Resolve a worker count, where 0 means one worker per CPU."""
+    if workers is None:
+        workers = settings.INGEST_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+def _process_file_worker(file_path: str, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Extract one file in a pool worker. Errors are returned rather than raised
+    so a single bad document cannot take down the whole batch.
+    """
+    dropped: List[Dict[str, Any]] = []
+    try:
+        sections = document_processor.extract_file(file_path, use_cache=use_cache, dropped=dropped)
+        return {'file': file_path, 'sections': sections, 'dropped_pages': dropped, 'error': None}
+    except Exception as e:
+        logger.error(f"Error processing {file_path}: {e}")
+        return {'file': file_path, 'sections': [], 'dropped_pages': dropped, 'error': f"{type(e).__name__}: {e}"}
+
 # Singleton instance
 document_processor = DocumentProcessor()
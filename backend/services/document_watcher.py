@@ -0,0 +1,238 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple, Callable
+from loguru import logger
+from config import settings
+from services.ingestion_service import IngestionPipeline, ingestion_pipeline
+from services.ingestion_jobs import IngestionJobQueue, ingestion_jobs
+
+class DocumentWatcher:
+    """
+    Keeps the vector store in sync with a documents directory.
+
+    The directory is polled with ``os.scandir`` and compared by
+    (size, mtime) against the previous snapshot, which needs no extra
+    dependency and works on network mounts where inotify does not. Changes
+    are collected until the directory has been quiet for ``debounce``
+    seconds, so a burst of copies (or one large file still being written)
+    triggers a single incremental run. Only added and modified files are
+    parsed and embedded; removed files just have their chunks deleted.
+
+    With a ``jobs`` queue, syncs run on the queue's threads in turn with
+    uploads. A file that fails to ingest (e.g. it was still being copied
+    when the debounce fired) stays pending and is retried after another
+    quiet period, up to ``max_retries`` times or until it changes again.
+    """
+    def __init__(
+        self,
+        pipeline: IngestionPipeline,
+        directory_path: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        debounce: Optional[float] = None,
+        jobs: Optional[IngestionJobQueue] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.pipeline = pipeline
+        self.jobs = jobs
+        self.directory_path = directory_path or settings.DOCUMENTS_PATH
+        self.poll_interval = poll_interval or settings.WATCH_POLL_INTERVAL
+        self.debounce = settings.WATCH_DEBOUNCE_SECONDS if debounce is None else debounce
+        self.max_retries = settings.WATCH_MAX_RETRIES if max_retries is None else max_retries
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._changed: set = set()
+        self._removed: set = set()
+        # Failed ingest attempts per path since it last changed
+        self._attempts: Dict[str, int] = {}
+        self._last_change = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.syncs = 0
+        self.last_sync: Optional[datetime] = None
+        self.last_summary: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Map every supported file under the directory to (size, mtime_ns)."""
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        extensions = self.pipeline.processor.supported_extensions
+        stack = [self.directory_path]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions:
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    # Vanished between listing and stat; the next poll sees it gone
+                    continue
+        return snapshot
+
+    def poll(self) -> bool:
+        """
+        Scan once and record differences against the previous snapshot.
+
+        Returns:
+            True if anything was added, modified or removed
+        """
+        snapshot = self._scan()
+        changed = {path for path, signature in snapshot.items() if self._snapshot.get(path) != signature}
+        removed = set(self._snapshot) - set(snapshot)
+        self._snapshot = snapshot
+        if not changed and not removed:
+            return False
+
+        self._changed = (self._changed - removed) | changed
+        self._removed = (self._removed - changed) | removed
+        for path in changed | removed:
+            self._attempts.pop(path, None)
+        self._last_change = time.monotonic()
+        return True
+
+    def _record(self, summary: Dict[str, Any]):
+        self.syncs += 1
+        self.last_sync = datetime.now()
+        self.last_summary = summary
+        self.last_error = None
+
+    def baseline(self):
+        """Treat the directory's current contents as indexed and clear pending changes."""
+        self._snapshot = self._scan()
+        self._changed, self._removed = set(), set()
+        self._attempts.clear()
+
+    def sync_all(self) -> Dict[str, Any]:
+        """Reconcile the whole directory with the manifest (e.g. on start-up)."""
+        self.baseline()
+        summary = self._run(self.pipeline.ingest_directory, self.directory_path)
+        self._retry_failures(summary)
+        self._record(summary)
+        return summary
+
+    def _run(self, fn: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+        """Run a pipeline call through the job queue if there is one, waiting for it."""
+        if self.jobs is None:
+            return fn(*args)
+        return self.jobs.call(fn, *args).result()
+
+    def _retry_failures(self, summary: Dict[str, Any]):
+        """Keep files that failed to ingest pending until they run out of attempts."""
+        failed = {failure['file'] for failure in summary.get('failures', [])}
+        for path in failed - self._removed:
+            attempts = self._attempts.get(path, 0) + 1
+            self._attempts[path] = attempts
+            if attempts < self.max_retries:
+                self._changed.add(path)
+            else:
+                logger.warning(f"Watcher giving up on {path} after {attempts} failed attempts until it changes")
+        if failed & self._changed:
+            # Retry after another quiet period, giving a file being written time to finish
+            self._last_change = time.monotonic()
+
+    def flush(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Apply pending changes once the debounce window has passed.
+
+        Args:
+            force: Apply immediately, ignoring the debounce window
+
+        Returns:
+            Combined summary, or None if nothing was applied
+
+        Raises:
+            Exception: Whatever the pipeline raised; unapplied changes stay pending
+            and are retried by the next flush
+        """
+        if not self._changed and not self._removed:
+            return None
+        if not force and time.monotonic() - self._last_change < self.debounce:
+            return None
+
+        changed, removed = sorted(self._changed), sorted(self._removed)
+        self._changed, self._removed = set(), set()
+        logger.info(
+            f"Watcher applying {len(changed)} added/modified and {len(removed)} removed files "
+            f"in {self.directory_path}"
+        )
+        summary: Dict[str, Any] = {'files_removed': 0, 'chunks_deleted': 0}
+        try:
+            if removed:
+                summary.update(self._run(self.pipeline.remove_files, removed))
+                removed = []
+            if changed:
+                removal = dict(summary)
+                summary = self._run(self.pipeline.ingest_files, changed)
+                summary['files_removed'] += removal['files_removed']
+                summary['chunks_deleted'] += removal['chunks_deleted']
+        except BaseException:
+            # The snapshot already holds the new signatures, so put back whatever
+            # was not applied; changes seen by a poll in the meantime take precedence
+            self._changed |= set(changed) - self._removed
+            self._removed |= set(removed) - self._changed
+            raise
+        self._retry_failures(summary)
+        self._record(summary)
+        return summary
+
+    def _loop(self):
+        try:
+            self.sync_all()
+        except Exception as e:
+            logger.error(f"Initial sync of {self.directory_path} failed: {e}")
+            self.last_error = str(e)
+
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.poll()
+                self.flush()
+            except Exception as e:
+                logger.error(f"Watcher sync of {self.directory_path} failed: {e}")
+                self.last_error = str(e)
+
+    def start(self):
+        """Start watching in a background thread."""
+        if self.running:
+            return
+        os.makedirs(self.directory_path, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="document-watcher", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Watching {self.directory_path} every {self.poll_interval}s "
+            f"(debounce {self.debounce}s)"
+        )
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the watcher, letting an in-progress sync finish."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'directory': self.directory_path,
+            'poll_interval': self.poll_interval,
+            'debounce_seconds': self.debounce,
+            'files_tracked': len(self._snapshot),
+            'pending_changes': len(self._changed) + len(self._removed),
+            'syncs': self.syncs,
+            'last_sync': self.last_sync.isoformat() if self.last_sync else None,
+            'last_summary': self.last_summary,
+            'last_error': self.last_error
+        }
+
+# Singleton instance
+document_watcher = DocumentWatcher(ingestion_pipeline, jobs=ingestion_jobs)
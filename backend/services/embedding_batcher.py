@@ -0,0 +1,95 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, List, Optional
+import numpy as np
+from loguru import logger
+from config import settings
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batched encodes.
+
+    Callers submit a text and block on a future. A worker thread takes the
+    first waiting request, keeps collecting for up to ``window_ms`` (or until
+    ``max_batch`` texts are queued), encodes them in one call and hands each
+    caller its own row. A lone request therefore pays at most the window in
+    extra latency, while bursts share one forward pass.
+    """
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        window_ms: Optional[float] = None,
+        max_batch: Optional[int] = None
+    ):
+        self.encode = encode
+        self.window = (settings.EMBEDDING_COALESCE_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch = max_batch or settings.EMBEDDING_COALESCE_MAX_BATCH
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, text: str) -> "Future[np.ndarray]":
+        """Queue a text and return a future for its vector."""
+        self._ensure_worker()
+        future: "Future[np.ndarray]" = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    def _collect(self) -> List[tuple]:
+        """Block for one request, then gather more until the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            # Identical concurrent questions are encoded once
+            unique: Dict[str, int] = {}
+            for text, _ in batch:
+                unique.setdefault(text, len(unique))
+            try:
+                vectors = self.encode(list(unique))
+            except Exception as e:
+                logger.error(f"Batched embedding of {len(unique)} texts failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for text, future in batch:
+                future.set_result(vectors[unique[text]])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'window_ms': self.window * 1000,
+            'max_batch': self.max_batch,
+            'batches': self.batches,
+            'requests': self.requests,
+            'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else 0.0
+        }
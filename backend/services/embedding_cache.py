@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import numpy as np
+from config import settings
+
+# Rough per-entry bookkeeping cost (OrderedDict node, key object, ndarray header)
+_ENTRY_OVERHEAD_BYTES = 200
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of embeddings bounded by memory rather than entries.
+
+    Vectors are stored as contiguous float32 arrays (1.5 KB for a 384-dim
+    vector, versus ~12 KB as a list of Python floats) and keyed by a 16-byte
+    digest of the text, so long chunks do not inflate the key size. All
+    access goes through one lock because FastAPI's threadpool, ingestion
+    jobs and the background model loader may embed concurrently.
+    """
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = settings.EMBEDDING_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    @staticmethod
+    def _size(key: bytes, vector: np.ndarray) -> int:
+        return vector.nbytes + len(key) + _ENTRY_OVERHEAD_BYTES
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached vector for a text (marking it recently used), or None."""
+        key = self.key(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, vector) -> np.ndarray:
+        """Store a vector as float32, evicting least recently used entries over budget."""
+        key = self.key(text)
+        vector = np.ascontiguousarray(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        size = self._size(key, vector)
+        if size > self.max_bytes:
+            return vector
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._size(key, previous)
+            self._entries[key] = vector
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, old_vector = self._entries.popitem(last=False)
+                self._bytes -= self._size(old_key, old_vector)
+                self.evictions += 1
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
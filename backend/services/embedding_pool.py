@@ -0,0 +1,155 @@
+import os
+import math
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+import numpy as np
+from loguru import logger
+from config import settings
+import embedding_worker
+
+class EmbeddingProcessPool:
+    """
+    Shards bulk embedding batches across worker processes.
+
+    Each worker holds its own copy of the SentenceTransformer model, so a
+    bulk ingest can use every core instead of one process. The pool is
+    expensive to start, so whether to use it is decided once per run: a
+    ``session()`` whose corpus is at least ``min_corpus_bytes`` opts the
+    calling thread in, its batches are sharded from the first one on, and
+    the pool is stopped when the last such session ends. Smaller runs and
+    other threads keep embedding in-process. Workers are spawned and set
+    their own thread count in the pool initializer, so the server's
+    environment is never touched. After a failure the pool stays off for
+    ``retry_seconds`` and is then tried again. Encodes are serialized so
+    concurrent runs do not oversubscribe the cores.
+    """
+    def __init__(
+        self,
+        model_name: str,
+        workers: Optional[int] = None,
+        min_corpus_mb: Optional[float] = None,
+        retry_seconds: Optional[float] = None
+    ):
+        self.model_name = model_name
+        workers = settings.EMBEDDING_POOL_WORKERS if workers is None else workers
+        # Each worker runs its own intra-op thread pool, so leave a few cores per process
+        self.workers = workers or (os.cpu_count() or 1) // 4
+        min_corpus_mb = settings.EMBEDDING_POOL_MIN_CORPUS_MB if min_corpus_mb is None else min_corpus_mb
+        self.min_corpus_bytes = int(min_corpus_mb * 1024 * 1024)
+        self.retry_seconds = settings.EMBEDDING_POOL_RETRY_SECONDS if retry_seconds is None else retry_seconds
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._sessions = 0
+        # Sessions of the current thread that opted in
+        self._local = threading.local()
+        self._failed_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.batches = 0
+        self.texts = 0
+
+    @property
+    def enabled(self) -> bool:
+        if self.workers <= 1:
+            return False
+        return self._failed_at is None or time.monotonic() - self._failed_at >= self.retry_seconds
+
+    @contextmanager
+    def session(self, corpus_bytes: int):
+        """
+        Let the calling thread's batches use the pool if the run is large enough.
+
+        Args:
+            corpus_bytes: Total size of what the run will embed, e.g. the
+                files an ingest is about to parse
+        """
+        if not self.enabled or corpus_bytes < self.min_corpus_bytes:
+            yield self
+            return
+        with self._lock:
+            self._sessions += 1
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.depth -= 1
+            with self._lock:
+                self._sessions -= 1
+                if self._sessions == 0:
+                    self._stop()
+
+    def should_use(self, count: int) -> bool:
+        # One text per worker at least, or sharding costs more than it saves
+        return getattr(self._local, 'depth', 0) > 0 and self.enabled and count >= self.workers
+
+    def _start(self):
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # Forking would copy the server's torch thread pools into the workers
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=embedding_worker.init_worker,
+            initargs=(self.model_name, threads)
+        )
+        logger.info(f"Started embedding process pool: {self.workers} workers x {threads} threads")
+
+    def _stop(self):
+        if self._pool is None:
+            return
+        try:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            logger.info("Stopped embedding process pool")
+        except Exception as e:
+            logger.warning(f"Error stopping embedding process pool: {e}")
+        finally:
+            self._pool = None
+
+    def encode(self, texts: List[str], batch_size: int) -> Optional[np.ndarray]:
+        """
+        Encode texts across the pool.
+
+        Texts are already ordered by length, so each worker gets one
+        contiguous shard of similar-length texts.
+
+        Returns:
+            The vectors in input order, or None if the pool could not be used
+            (the caller then encodes in-process)
+        """
+        with self._lock:
+            if not self._sessions or not self.enabled:
+                return None
+            try:
+                if self._pool is None:
+                    self._start()
+                shard = math.ceil(len(texts) / self.workers)
+                futures = [
+                    self._pool.submit(embedding_worker.encode_shard, texts[start:start + shard], batch_size)
+                    for start in range(0, len(texts), shard)
+                ]
+                vectors = np.concatenate([future.result() for future in futures])
+            except Exception as e:
+                logger.warning(
+                    f"Embedding process pool failed, encoding in-process for {self.retry_seconds}s: {e}"
+                )
+                self._failed_at = time.monotonic()
+                self.last_error = str(e)
+                self._stop()
+                return None
+            self._failed_at = None
+            self.batches += 1
+            self.texts += len(texts)
+            return np.asarray(vectors, dtype=np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'min_corpus_mb': round(self.min_corpus_bytes / (1024 * 1024), 2),
+            'enabled': self.enabled,
+            'running': self._pool is not None,
+            'batches': self.batches,
+            'texts': self.texts,
+            'last_error': self.last_error
+        }
@@ -1,87 +1,261 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import uuid
+import numpy as np
 from loguru import logger
 from config import settings
 import threading
-from collections import OrderedDict
 import time
+from contextlib import contextmanager
+from services.embedding_cache import EmbeddingCache
+from services.embedding_store import EmbeddingStore
+from services.embedding_batcher import EmbeddingBatcher
+from services.embedding_pool import EmbeddingProcessPool
+from services.collection_registry import CollectionRegistry
+from services.vector_index import ExactVectorIndex
+from services.lexical_index import BM25Index
 
 class EmbeddingService:
     """
     Service for generating text embeddings using Sentence Transformers.
     Provides methods for embedding text and managing ChromaDB.
     """
-    def __init__(self):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        backend: Optional[str] = None,
+        preload: Optional[bool] = None
+    ):
         """
         Initialize the embedding service with sentence transformers.
+
+        Args:
+            model_name: Model to load (defaults to settings.EMBEDDING_MODEL)
+            backend: "torch" or "onnx" (defaults to settings.EMBEDDING_BACKEND)
+            preload: Start loading in the background (defaults to settings.EMBEDDING_PRELOAD)
         """
-        """Initialize the embedding service with sentence transformers."""
         # Defer heavy model loading until first use so the application can start
         # quickly. Loading at import time blocks the FastAPI startup when the
         # model files are downloaded from the hub (which can be large).
         self.model = None
         self.dimension = None
-        self.model_name = settings.EMBEDDING_MODEL
-        logger.info(f"EmbeddingService initialized (model deferred): {self.model_name}")
-        # Simple in-memory LRU cache for single-text embeddings to speed up
-        # repeated requests. Keys are strings, values are embedding lists.
-        self._cache = OrderedDict()
-        self._cache_max = 1024
-
-        # Start background loader so the model is fetched without blocking
-        # the startup path. This warms the model in the background.
-        def _background_load():
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.backend = (backend or settings.EMBEDDING_BACKEND).lower()
+        # Vectors from different backends differ slightly, so they are stored apart
+        self.model_key = self.model_name
+        if self.backend == 'onnx':
+            self.model_key += '@onnx-int8' if settings.EMBEDDING_ONNX_QUANTIZE else '@onnx'
+        logger.info(f"EmbeddingService initialized (model deferred): {self.model_key}")
+        # Thread-safe LRU of float32 vectors, bounded by EMBEDDING_CACHE_MAX_BYTES
+        self._cache = EmbeddingCache()
+        # Persistent (model, text hash) -> vector store shared across restarts
+        self._store = EmbeddingStore(model_name=self.model_key) if settings.EMBEDDING_STORE_ENABLED else None
+        # Concurrent single-text requests (questions, grading) share one encode
+        self._batcher = EmbeddingBatcher(self._encode) if settings.EMBEDDING_COALESCE_ENABLED else None
+        # Worker processes for large bulk batches (SentenceTransformer backend only)
+        self._pool = EmbeddingProcessPool(self.model_name) if self.backend == 'torch' else None
+
+        # Single-flight model loading: one loader runs, other callers wait on it
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self.state = 'idle'  # idle -> loading -> ready, or failed
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+        # Load in the background so the startup path is not blocked by the
+        # model download; requests can check is_ready instead of waiting.
+        if settings.EMBEDDING_PRELOAD if preload is None else preload:
+            self.start_loading()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == 'ready'
+
+    def start_loading(self) -> bool:
+        """
+        Start loading the model in a background thread unless it is already
+        loading or loaded. A failed load is retried.
+
+        Returns:
+            True if a loader thread was started
+        """
+        # Not the load lock: that is held for the whole load and this must not block
+        with self._state_lock:
+            if self.state in ('loading', 'ready'):
+                return False
+            self.state = 'loading'
+        threading.Thread(target=self._background_load, name="embedding-loader", daemon=True).start()
+        return True
+
+    def _background_load(self):
+        try:
+            logger.info("Background embedding model loader starting")
+            self.ensure_model_loaded()
+            logger.info("Background embedding model loader finished")
+        except Exception as e:
+            logger.warning(f"Background model load failed: {e}")
+
+    def ensure_model_loaded(self):
+        """
+        Load the model and warm it up, blocking until it is ready.
+
+        Concurrent callers share one load: the first takes the lock and the
+        rest wait for it instead of loading a second copy.
+        """
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is not None:
+                return
+            self.state = 'loading'
+            started = time.perf_counter()
             try:
-                # Small delay to let the application finish startup logs.
-                time.sleep(1)
-                logger.info("Background embedding model loader starting")
-                self.ensure_model_loaded()
-                logger.info("Background embedding model loader finished")
+                logger.info(f"Loading embedding model: {self.model_key}")
+                if self.backend == 'onnx':
+                    from onnx_embedder import OnnxSentenceEncoder
+                    model = OnnxSentenceEncoder(self.model_name)
+                else:
+                    model = SentenceTransformer(self.model_name)
+                try:
+                    self.dimension = model.get_sentence_embedding_dimension()
+                except Exception:
+                    # If the model doesn't expose that method, leave dimension None
+                    self.dimension = None
+                if settings.EMBEDDING_WARMUP:
+                    self._warm_up(model)
             except Exception as e:
-                logger.warning(f"Background model load failed: {e}")
+                self.state = 'failed'
+                self.load_error = str(e)
+                logger.error(f"Embedding model failed to load: {e}")
+                raise
+            # Publish the model only once it is warm
+            self.model = model
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.load_error = None
+            self.state = 'ready'
+            logger.info(f"Embedding model loaded in {self.load_seconds}s. Dimension: {self.dimension}")
 
-        t = threading.Thread(target=_background_load, daemon=True)
-        t.start()
+    @staticmethod
+    def _warm_up(model):
+        """Run throwaway encodes so the first real request does not pay for kernel and thread pool set-up."""
+        started = time.perf_counter()
+        sample = "A stateful firewall tracks TCP connections and filters packets that do not match them."
+        model.encode("warm-up", convert_to_numpy=True)
+        model.encode([sample, sample * 8], batch_size=2, convert_to_numpy=True)
+        logger.info(f"Embedding model warmed up in {time.perf_counter() - started:.2f}s")
 
-    def ensure_model_loaded(self):
+    def readiness(self) -> Dict[str, Any]:
+        """Load state of the embedding model, as reported by /health."""
+        return {
+            'state': self.state,
+            'model': self.model_key,
+            'dimension': self.dimension,
+            'load_seconds': self.load_seconds,
+            'error': self.load_error
+        }
+
+    def _loaded_model(self):
+        self.ensure_model_loaded()
+        return self.model
+
+    @contextmanager
+    def process_pool(self, corpus_bytes: int):
         """
-        Load the SentenceTransformer model if it hasn't been loaded yet.
+        Scope of one bulk run. If its corpus is at least
+        EMBEDDING_POOL_MIN_CORPUS_MB, the run's batches are sharded across
+        worker processes; the pool starts on the first batch and is shut
+        down when the last scope that uses it exits.
+
+        Args:
+            corpus_bytes: Total size of the input the run will embed
         """
-        """Load the SentenceTransformer model if it hasn't been loaded yet."""
-        if self.model is None:
-            logger.info(f"Loading embedding model: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
+        if self._pool is None:
+            yield
+            return
+        with self._pool.session(corpus_bytes):
+            yield
+
+    def _encode(self, texts: List[str]):
+        """Encode a batch of texts with the model, loading it if needed."""
+        self.ensure_model_loaded()
+        return self.model.encode(texts, convert_to_numpy=True)
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Token count per text (capped at the model's sequence limit), or characters as a fallback."""
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        if tokenizer is not None:
+            max_length = getattr(self.model, 'max_seq_length', None)
             try:
-                self.dimension = self.model.get_sentence_embedding_dimension()
-            except Exception:
-                # If the model doesn't expose that method, leave dimension None
-                self.dimension = None
-            logger.info(f"Embedding model loaded. Dimension: {self.dimension}")
-    
+                encoded = tokenizer(
+                    texts,
+                    add_special_tokens=False,
+                    truncation=bool(max_length),
+                    max_length=max_length
+                )
+                return [len(ids) for ids in encoded['input_ids']]
+            except Exception as e:
+                logger.debug(f"Tokenizer length lookup failed, bucketing by characters: {e}")
+        return [len(text) for text in texts]
+
+    def _encode_bulk(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode many texts in batches of similar token length.
+
+        Each batch is padded to its longest member, so mixing slide titles
+        with full PDF pages wastes most of a batch on padding. Texts are
+        sorted by token count, encoded EMBEDDING_BATCH_SIZE at a time and the
+        rows are put back in input order. Inside a ``process_pool()`` scope
+        that opted in, batches are sharded across worker processes instead.
+        """
+        self.ensure_model_loaded()
+        batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+        use_pool = self._pool is not None and self._pool.should_use(len(texts))
+        if len(texts) <= 1 or not (settings.EMBEDDING_LENGTH_BUCKETING or use_pool):
+            return np.asarray(self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True))
+
+        # Longest first, so a batch that does not fit in memory fails straight away
+        order = np.argsort(self._token_lengths(texts), kind='stable')[::-1]
+        vectors: Optional[np.ndarray] = None
+        if use_pool:
+            pooled = self._pool.encode([texts[i] for i in order], batch_size)
+            if pooled is not None:
+                vectors = np.empty_like(pooled)
+                vectors[order] = pooled
+                return vectors
+
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            batch = self.model.encode([texts[i] for i in rows], batch_size=len(rows), convert_to_numpy=True)
+            if vectors is None:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[rows] = batch
+        return vectors
+
     def embed_text(self, text: str) -> List[float]:
         """
         Generate embeddings for a single text.
         """
         """Generate embeddings for a single text."""
         # Check cache first
-        if text in self._cache:
-            # move to end to mark as recently used
-            self._cache.move_to_end(text)
-            return self._cache[text]
-
-        self.ensure_model_loaded()
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        emb_list = embedding.tolist()
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached.tolist()
+        # The persistent store is only read here: questions and answers being
+        # graded are one-off texts, and appending them would take the store's
+        # file lock and fsync on the request path and grow it without bound
+        if self._store is not None:
+            stored = self._store.get(text)
+            if stored is not None:
+                return self._cache.put(text, stored).tolist()
 
-        # insert into cache and evict oldest if necessary
-        self._cache[text] = emb_list
-        if len(self._cache) > self._cache_max:
-            self._cache.popitem(last=False)
-
-        return emb_list
+        if self._batcher is not None:
+            embedding = self._batcher.embed(text)
+        else:
+            self.ensure_model_loaded()
+            embedding = self.model.encode(text, convert_to_numpy=True)
+        return self._cache.put(text, embedding).tolist()
     
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for multiple texts."""
@@ -91,33 +265,61 @@ class EmbeddingService:
         compute_indices: List[int] = []
 
         for i, t in enumerate(texts):
-            if t in self._cache:
-                self._cache.move_to_end(t)
-                results.append(self._cache[t])
+            cached = self._cache.get(t)
+            if cached is not None:
+                results.append(cached.tolist())
             else:
                 # placeholder to keep ordering
                 results.append(None)
                 to_compute.append(t)
                 compute_indices.append(i)
 
+        if to_compute and self._store is not None:
+            # Second tier: vectors persisted by earlier runs, read from the mmap
+            missing_texts: List[str] = []
+            missing_indices: List[int] = []
+            for t, i, stored in zip(to_compute, compute_indices, self._store.get_many(to_compute)):
+                if stored is not None:
+                    results[i] = self._cache.put(t, stored).tolist()
+                else:
+                    missing_texts.append(t)
+                    missing_indices.append(i)
+            to_compute, compute_indices = missing_texts, missing_indices
+
         if to_compute:
-            self.ensure_model_loaded()
-            embeddings = self.model.encode(to_compute, convert_to_numpy=True).tolist()
+            embeddings = self._encode_bulk(to_compute)
+            if self._store is not None:
+                self._store.put_many(to_compute, embeddings)
             for idx, emb in enumerate(embeddings):
-                i = compute_indices[idx]
-                results[i] = emb
                 # cache single items
-                key = to_compute[idx]
-                self._cache[key] = emb
-                if len(self._cache) > self._cache_max:
-                    self._cache.popitem(last=False)
+                results[compute_indices[idx]] = self._cache.put(to_compute[idx], emb).tolist()
 
         return results
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and memory use of the embedding cache."""
+        stats = self._cache.stats()
+        stats['store'] = self._store.stats() if self._store is not None else None
+        stats['coalescer'] = self._batcher.stats() if self._batcher is not None else None
+        stats['process_pool'] = self._pool.stats() if self._pool is not None else None
+        return stats
+
 class ChromaDBService:
-    def __init__(self, embedding_service: EmbeddingService):
+    """
+    Vector store backed by the active versioned Chroma collection.
+
+    The active collection and the embedding service whose model produced
+    its vectors are held as one pair and swapped together, so a query never
+    embeds with one model and searches vectors of another. Writes are
+    serialized with the switch so none land in a collection that is being
+    replaced. With VECTOR_SEARCH_BACKEND=numpy the pair also carries an
+    in-memory exact index of the collection that answers similarity queries.
+    ``version`` is bumped by every change to the stored documents so caches
+    of answers derived from them can tell when they are stale.
+    """
+    def __init__(self, embedding_service: EmbeddingService, registry: CollectionRegistry):
         """Initialize ChromaDB client and collection."""
-        self.embedding_service = embedding_service
+        self.registry = registry
         
         # Initialize ChromaDB client
         logger.info(f"Initializing ChromaDB at: {settings.CHROMA_DB_PATH}")
@@ -128,52 +330,165 @@ class ChromaDBService:
                 allow_reset=True
             )
         )
+        # Held by writes and by a collection switch (and a migration's final catch-up)
+        self.write_lock = threading.RLock()
+        # Bumped under write_lock by every write, delete, clear and switch
+        self.version = 0
+        # BM25 index of the chunk texts, shared by all collection versions (same ids)
+        self.lexical_index = BM25Index() if settings.HYBRID_SEARCH_ENABLED else None
         
         # Get or create collection
         try:
-            self.collection = self.client.get_or_create_collection(
-                name=settings.COLLECTION_NAME,
-                metadata={"hnsw:space": "cosine"}
+            collection = self.get_collection(registry.active['name'])
+            self._active = (collection, embedding_service, self._new_index())
+            logger.info(
+                f"Collection '{collection.name}' ({registry.active['model']}) initialized "
+                f"with {collection.count()} documents"
             )
-            logger.info(f"Collection '{settings.COLLECTION_NAME}' initialized with {self.collection.count()} documents")
         except Exception as e:
             logger.error(f"Error initializing collection: {e}")
             raise
+
+    @property
+    def collection(self):
+        return self._active[0]
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        return self._active[1]
+
+    @property
+    def vector_index(self) -> Optional[ExactVectorIndex]:
+        return self._active[2]
+
+    def current(self) -> Tuple[Any, EmbeddingService, Optional[ExactVectorIndex]]:
+        """The active collection, its embedding service and exact index, read as one consistent triple."""
+        return self._active
+
+    @staticmethod
+    def _new_index() -> Optional[ExactVectorIndex]:
+        # Loaded from the collection on the first query
+        return ExactVectorIndex() if settings.VECTOR_SEARCH_BACKEND.lower() == 'numpy' else None
+
+    def get_collection(self, name: str):
+        """Open (or create) a collection by name with the cosine space used throughout."""
+        return self.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+
+    def switch(self, name: str, embedding_service: EmbeddingService):
+        """Atomically route reads and writes to another collection and its embedding model."""
+        with self.write_lock:
+            self._active = (self.get_collection(name), embedding_service, self._new_index())
+            self.version += 1
+        logger.info(f"Switched active collection to '{name}' ({embedding_service.model_key})")
+
+    def _embeddings_for(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        model_key: Optional[str]
+    ) -> List[List[float]]:
+        """Keep supplied embeddings unless they came from a model the active collection no longer uses."""
+        if model_key is None or model_key == self.embedding_service.model_key:
+            return embeddings
+        logger.info(f"Re-embedding {len(texts)} documents made with {model_key} after a model switch")
+        return self.embedding_service.embed_texts(texts)
     
     def add_documents(
         self,
         texts: List[str],
         metadatas: List[Dict[str, Any]],
-        ids: Optional[List[str]] = None
+        ids: Optional[List[str]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        model_key: Optional[str] = None
     ) -> List[str]:
-        """Add documents to the collection."""
+        """
+        Add documents to the collection, embedding them unless embeddings are supplied.
+        ``model_key`` names the model that made supplied embeddings.
+        """
         if not ids:
             ids = [str(uuid.uuid4()) for _ in texts]
         
         # Generate embeddings
-        embeddings = self.embedding_service.embed_texts(texts)
+        if embeddings is None:
+            embedding_service = self.embedding_service
+            embeddings = embedding_service.embed_texts(texts)
+            model_key = embedding_service.model_key
         
-        # Add to collection
-        self.collection.add(
-            documents=texts,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+        with self.write_lock:
+            embeddings = self._embeddings_for(texts, embeddings, model_key)
+            
+            # Add to collection
+            self.collection.add(
+                documents=texts,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids
+            )
+            if self.vector_index is not None:
+                self.vector_index.upsert(ids, embeddings, texts, metadatas)
+            if self.lexical_index is not None:
+                self.lexical_index.add(ids, texts)
+            self.version += 1
         
         logger.info(f"Added {len(texts)} documents to collection")
         return ids
     
+    def upsert_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings: Optional[List[List[float]]] = None,
+        model_key: Optional[str] = None
+    ) -> List[str]:
+        """
+        Insert or overwrite documents by id, so re-storing a chunk is idempotent.
+        ``model_key`` names the model that made supplied embeddings.
+        """
+        if embeddings is None:
+            embedding_service = self.embedding_service
+            embeddings = embedding_service.embed_texts(texts)
+            model_key = embedding_service.model_key
+        
+        with self.write_lock:
+            embeddings = self._embeddings_for(texts, embeddings, model_key)
+            self.collection.upsert(
+                documents=texts,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids
+            )
+            if self.vector_index is not None:
+                self.vector_index.upsert(ids, embeddings, texts, metadatas)
+            if self.lexical_index is not None:
+                self.lexical_index.add(ids, texts)
+            self.version += 1
+        
+        logger.info(f"Upserted {len(texts)} documents to collection")
+        return ids
+    
     def query_similar(
         self,
         query_text: str,
         n_results: int = 5,
-        where: Optional[Dict[str, Any]] = None
+        where: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+        model_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Query for similar documents."""
-        query_embedding = self.embedding_service.embed_text(query_text)
+        """
+        Query for similar documents. A precomputed ``query_embedding`` made
+        with ``model_key`` is used instead of embedding ``query_text``
+        again, unless the active collection has since moved to another model.
+        """
+        collection, embedding_service, vector_index = self.current()
+        if query_embedding is None or model_key != embedding_service.model_key:
+            query_embedding = embedding_service.embed_text(query_text)
         
-        results = self.collection.query(
+        if vector_index is not None:
+            vector_index.ensure_loaded(collection)
+            return vector_index.query(query_embedding, n_results=n_results, where=where)
+        
+        results = collection.query(
             query_embeddings=[query_embedding],
             n_results=n_results,
             where=where,
@@ -192,15 +507,56 @@ class ChromaDBService:
         """Get the total number of documents in the collection."""
         return self.collection.count()
     
+    def delete_documents(self, ids: List[str]) -> int:
+        """Delete documents from the collection by id."""
+        if not ids:
+            return 0
+        with self.write_lock:
+            self.collection.delete(ids=ids)
+            if self.vector_index is not None:
+                self.vector_index.delete(ids)
+            if self.lexical_index is not None:
+                self.lexical_index.remove(ids)
+            self.version += 1
+        logger.info(f"Deleted {len(ids)} documents from collection")
+        return len(ids)
+    
+    def get_ids(self, where: Dict[str, Any]) -> List[str]:
+        """Ids of the documents whose metadata matches a filter."""
+        return self.collection.get(where=where, include=[])['ids']
+    
+    def delete_where(self, where: Dict[str, Any]) -> int:
+        """Delete every document whose metadata matches a filter."""
+        with self.write_lock:
+            ids = self.get_ids(where)
+            if not ids:
+                return 0
+            self.collection.delete(where=where)
+            if self.vector_index is not None:
+                self.vector_index.delete(ids)
+            if self.lexical_index is not None:
+                self.lexical_index.remove(ids)
+            self.version += 1
+        logger.info(f"Deleted {len(ids)} documents matching {where}")
+        return len(ids)
+    
     def delete_all(self):
         """Delete all documents from the collection."""
-        self.client.delete_collection(name=settings.COLLECTION_NAME)
-        self.collection = self.client.create_collection(
-            name=settings.COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"}
-        )
+        with self.write_lock:
+            collection, embedding_service, _ = self._active
+            self.client.delete_collection(name=collection.name)
+            self._active = (self.get_collection(collection.name), embedding_service, self._new_index())
+            if self.lexical_index is not None:
+                self.lexical_index.clear()
+            self.version += 1
         logger.info("All documents deleted from collection")
 
 # Singleton instances
-embedding_service = EmbeddingService()
-chroma_service = ChromaDBService(embedding_service)
+collection_registry = CollectionRegistry()
+# Serve with the model that built the active collection, which differs from
+# EMBEDDING_MODEL until a migration to the configured model has finished
+embedding_service = EmbeddingService(
+    model_name=collection_registry.active['model'],
+    backend=collection_registry.active['backend']
+)
+chroma_service = ChromaDBService(embedding_service, collection_registry)
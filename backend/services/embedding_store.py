@@ -0,0 +1,158 @@
+import os
+import re
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence
+import numpy as np
+from loguru import logger
+from config import settings
+from services.embedding_cache import EmbeddingCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: only one process should write the store at a time
+    fcntl = None
+
+_KEY_BYTES = 16
+
+class EmbeddingStore:
+    """
+    Persistent embedding store for one model, keyed by a digest of the text.
+
+    Vectors are appended to a raw float32 matrix (``vectors.f32``) that is
+    read through ``np.memmap``, and the digest of each row's text is appended
+    to ``keys.idx`` in the same order, so the row number of a key is its
+    position in the index file. Lookups return views into the mapped matrix
+    without copying. Vectors are written before their keys, so a crash can
+    at worst leave unindexed rows, which the next writer truncates.
+    Appends take an exclusive file lock and first pick up rows written by
+    other processes (e.g. the ingest script while the API is running).
+    """
+    def __init__(self, root: Optional[str] = None, model_name: Optional[str] = None):
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", self.model_name)
+        self.directory = Path(root or settings.EMBEDDING_STORE_PATH) / safe_name
+        self.vectors_path = self.directory / 'vectors.f32'
+        self.keys_path = self.directory / 'keys.idx'
+        self.meta_path = self.directory / 'meta.json'
+        self.dimension: Optional[int] = None
+        self._index: Dict[bytes, int] = {}
+        self._rows = 0
+        self._matrix: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.meta_path.exists():
+            return
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.dimension = int(json.load(f)['dimension'])
+            self._refresh()
+            logger.info(f"Embedding store for {self.model_name}: {self._rows} vectors")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding store {self.directory}: {e}")
+            self.dimension = None
+            self._index, self._rows = {}, 0
+
+    def _refresh(self):
+        """Index keys appended since the last read (by this or another process)."""
+        if not self.keys_path.exists() or not self.dimension:
+            return
+        vector_rows = self.vectors_path.stat().st_size // (self.dimension * 4) if self.vectors_path.exists() else 0
+        with open(self.keys_path, 'rb') as f:
+            f.seek(self._rows * _KEY_BYTES)
+            data = f.read()
+        new_rows = min(len(data) // _KEY_BYTES, vector_rows - self._rows)
+        for offset in range(new_rows):
+            key = data[offset * _KEY_BYTES:(offset + 1) * _KEY_BYTES]
+            self._index.setdefault(key, self._rows + offset)
+        self._rows += max(0, new_rows)
+
+    @staticmethod
+    def _truncate(path: Path, size: int):
+        if path.exists() and path.stat().st_size > size:
+            os.truncate(path, size)
+
+    def _view(self) -> Optional[np.ndarray]:
+        """Memory-map the matrix, remapping when rows were appended."""
+        if not self._rows:
+            return None
+        if self._matrix is None or self._matrix.shape[0] < self._rows:
+            self._matrix = np.memmap(
+                self.vectors_path, dtype=np.float32, mode='r', shape=(self._rows, self.dimension)
+            )
+        return self._matrix
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._rows
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Return a read-only row view per text, or None where the text is not stored."""
+        keys = [EmbeddingCache.key(text) for text in texts]
+        with self._lock:
+            rows = [self._index.get(key) for key in keys]
+            if all(row is None for row in rows):
+                return [None] * len(texts)
+            matrix = self._view()
+        return [None if row is None else matrix[row] for row in rows]
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        """Append vectors for texts that are not stored yet."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or not len(texts):
+            return
+        with self._lock:
+            if self.dimension is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self.dimension = vectors.shape[1]
+                with open(self.meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'model': self.model_name, 'dimension': self.dimension, 'dtype': 'float32'}, f)
+            elif vectors.shape[1] != self.dimension:
+                logger.warning(
+                    f"Not storing {vectors.shape[1]}-dim vectors in {self.dimension}-dim store {self.directory}"
+                )
+                return
+
+            with open(self.keys_path, 'ab') as keys_file:
+                if fcntl is not None:
+                    fcntl.flock(keys_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    # Cut off anything a crashed writer left past the last indexed row
+                    self._truncate(self.keys_path, self._rows * _KEY_BYTES)
+                    self._truncate(self.vectors_path, self._rows * self.dimension * 4)
+                    fresh: Dict[bytes, int] = {}
+                    for position, text in enumerate(texts):
+                        key = EmbeddingCache.key(text)
+                        if key not in self._index and key not in fresh:
+                            fresh[key] = position
+                    if not fresh:
+                        return
+                    with open(self.vectors_path, 'ab') as vectors_file:
+                        vectors_file.write(vectors[list(fresh.values())].tobytes())
+                        vectors_file.flush()
+                        os.fsync(vectors_file.fileno())
+                    keys_file.write(b''.join(fresh))
+                    keys_file.flush()
+                    for key in fresh:
+                        self._index[key] = self._rows
+                        self._rows += 1
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                'model': self.model_name,
+                'path': str(self.directory),
+                'vectors': self._rows,
+                'dimension': self.dimension,
+                'bytes': self._rows * (self.dimension or 0) * 4
+            }
@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import numpy as np
+from loguru import logger
+from config import settings
+from services.embedding_service import ChromaDBService, chroma_service
+
+class HybridRetriever:
+    """
+    Retrieval that fuses BM25 and vector similarity.
+
+    The vector query (embedding plus Chroma or the exact index) runs on the
+    calling thread while the BM25 lookup runs on a helper thread, so the
+    lexical side adds little latency and concurrent requests never queue
+    behind each other's vector queries.
+    Each side proposes HYBRID_CANDIDATES chunks. The cosine similarity of
+    chunks found only by BM25 is computed from their stored embeddings.
+    Each candidate's score is ``alpha * similarity + (1 - alpha) *
+    bm25 / max_bm25``. Results keep Chroma's query shape, with the true
+    cosine distance, so callers that read distances as confidence are
+    unaffected.
+    """
+    def __init__(
+        self,
+        chroma: ChromaDBService,
+        alpha: Optional[float] = None,
+        candidates: Optional[int] = None,
+        lexical_workers: Optional[int] = None
+    ):
+        self.chroma = chroma
+        self.alpha = settings.HYBRID_ALPHA if alpha is None else alpha
+        self.candidates = candidates or settings.HYBRID_CANDIDATES
+        # One per request thread FastAPI may run (anyio's default limiter is 40)
+        workers = lexical_workers or settings.HYBRID_LEXICAL_WORKERS or 40
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hybrid-lexical")
+
+    def _lexical(self, query_text: str, n_results: int, where: Optional[Dict[str, Any]]):
+        lexical_index = self.chroma.lexical_index
+        lexical_index.ensure_loaded(self.chroma.collection)
+        allowed = set(self.chroma.get_ids(where)) if where else None
+        return lexical_index.search(query_text, n_results=n_results, allowed_ids=allowed)
+
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+        model_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Top chunks for a query by fused lexical and vector score (Chroma result
+        shape). ``query_embedding``/``model_key`` are as for ``query_similar``.
+        """
+        if self.chroma.lexical_index is None:
+            return self.chroma.query_similar(
+                query_text=query_text, n_results=n_results, where=where,
+                query_embedding=query_embedding, model_key=model_key
+            )
+
+        pool = max(n_results, self.candidates)
+        lexical_future = self._executor.submit(self._lexical, query_text, pool, where)
+        vector = self.chroma.query_similar(
+            query_text=query_text, n_results=pool, where=where,
+            query_embedding=query_embedding, model_key=model_key
+        )
+        try:
+            lexical = lexical_future.result()
+        except Exception as e:
+            logger.warning(f"BM25 lookup failed, using vector results only: {e}")
+            lexical = []
+
+        candidates: Dict[str, Dict[str, Any]] = {}
+        for chunk_id, document, metadata, distance in zip(
+            vector['ids'][0], vector['documents'][0], vector['metadatas'][0], vector['distances'][0]
+        ):
+            candidates[chunk_id] = {'document': document, 'metadata': metadata, 'distance': distance}
+
+        lexical_scores = dict(lexical)
+        lexical_only = [chunk_id for chunk_id in lexical_scores if chunk_id not in candidates]
+        if lexical_only:
+            self._add_lexical_only(query_text, lexical_only, candidates, query_embedding, model_key)
+
+        top_lexical = max(lexical_scores.values(), default=0.0) or 1.0
+        ranked = sorted(
+            candidates.items(),
+            key=lambda item: self.alpha * (1.0 - item[1]['distance'])
+            + (1 - self.alpha) * lexical_scores.get(item[0], 0.0) / top_lexical,
+            reverse=True
+        )[:n_results]
+        return {
+            'ids': [[chunk_id for chunk_id, _ in ranked]],
+            'documents': [[hit['document'] for _, hit in ranked]],
+            'metadatas': [[hit['metadata'] for _, hit in ranked]],
+            'distances': [[hit['distance'] for _, hit in ranked]]
+        }
+
+    def _add_lexical_only(
+        self,
+        query_text: str,
+        ids: List[str],
+        candidates: Dict[str, Dict[str, Any]],
+        query_embedding: Optional[List[float]] = None,
+        model_key: Optional[str] = None
+    ):
+        """Fetch chunks found only by BM25 and score them against the (cached) query embedding."""
+        collection, embedding_service, _ = self.chroma.current()
+        stored = collection.get(ids=ids, include=["documents", "metadatas", "embeddings"])
+        if not stored['ids']:
+            return
+        if query_embedding is None or model_key != embedding_service.model_key:
+            query_embedding = embedding_service.embed_text(query_text)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        vectors = np.asarray(stored['embeddings'], dtype=np.float32)
+        similarity = vectors @ query / np.clip(
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(query), 1e-12, None
+        )
+        for chunk_id, document, metadata, score in zip(
+            stored['ids'], stored['documents'], stored['metadatas'], similarity
+        ):
+            candidates[chunk_id] = {'document': document, 'metadata': metadata, 'distance': float(1.0 - score)}
+
+# Singleton instance
+hybrid_retriever = HybridRetriever(chroma_service)
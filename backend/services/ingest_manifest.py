@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from loguru import logger
+from config import settings
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Hash a file's content without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def document_id(file_path: str) -> str:
+    """Stable id of a source document, derived from its absolute path."""
+    return hashlib.sha256(IngestManifest.key(file_path).encode('utf-8')).hexdigest()[:16]
+
+class IngestManifest:
+    """
+    Persistent record of what has been ingested, keyed by absolute file path.
+
+    Each entry stores the file's size, mtime and SHA-256 together with the
+    Chroma ids of its chunks, so re-ingestion can skip unchanged files and
+    remove the chunks of files that were modified or deleted. Chunks
+    dropped as near-duplicates of another document's chunks are listed by
+    the ids they matched (``duplicate_of``), so the file can be re-checked
+    when those chunks go away.
+
+    Files that were only partly stored when a run stopped keep a checkpoint
+    (content hash plus the ids already written) so the next run can resume
+    them instead of embedding them again.
+    """
+    def __init__(self, manifest_path: Optional[str] = None):
+        self.manifest_path = Path(manifest_path or settings.INGEST_MANIFEST_PATH)
+        self._lock = threading.Lock()
+        # Serializes whole saves so the newest snapshot is written last
+        self._save_lock = threading.Lock()
+        data = self._load()
+        self._entries: Dict[str, Dict[str, Any]] = data.get('files', {})
+        self._checkpoints: Dict[str, Dict[str, Any]] = data.get('checkpoints', {})
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable ingest manifest {self.manifest_path}: {e}")
+            return {}
+
+    def save(self):
+        """Atomically write the manifest to disk."""
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps({
+                    'version': 1,
+                    'files': self._entries,
+                    'checkpoints': self._checkpoints
+                })
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            # Per-process name: another process may be saving the same file
+            tmp_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def key(file_path: str) -> str:
+        return str(Path(file_path).resolve())
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(self.key(file_path))
+
+    def check(self, file_path: str) -> Dict[str, Any]:
+        """
+        Compare a file on disk against its manifest entry.
+
+        Size and mtime are checked first so unchanged files are recognised
+        without hashing; the SHA-256 is only computed when they differ.
+
+        Returns:
+            Dict with 'status' ('new', 'modified' or 'unchanged'), the file
+            fingerprint and the previous entry (if any)
+        """
+        stat = os.stat(file_path)
+        entry = self.get(file_path)
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return {'status': 'unchanged', 'sha256': entry['sha256'], **fingerprint, 'previous': entry}
+
+        sha256 = file_sha256(file_path)
+        if entry and entry['sha256'] == sha256:
+            # Touched but not changed: refresh the stat fingerprint only.
+            self.record(file_path, sha256, stat.st_size, stat.st_mtime_ns, entry['chunk_ids'])
+            return {'status': 'unchanged', 'sha256': sha256, **fingerprint, 'previous': entry}
+
+        status = 'modified' if entry else 'new'
+        return {'status': status, 'sha256': sha256, **fingerprint, 'previous': entry}
+
+    def record(
+        self,
+        file_path: str,
+        sha256: str,
+        size: int,
+        mtime_ns: int,
+        chunk_ids: List[str],
+        duplicate_of: Optional[List[str]] = None
+    ):
+        with self._lock:
+            self._checkpoints.pop(self.key(file_path), None)
+            previous = self._entries.get(self.key(file_path))
+            if duplicate_of is None:
+                # Same content re-recorded (touched file); its links still hold
+                duplicate_of = previous.get('duplicate_of', []) if previous else []
+            self._entries[self.key(file_path)] = {
+                'sha256': sha256,
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'chunk_ids': chunk_ids,
+                'duplicate_of': sorted(set(duplicate_of)),
+                'indexed_at': datetime.now().isoformat()
+            }
+
+    def remove(self, file_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._checkpoints.pop(self.key(file_path), None)
+            return self._entries.pop(self.key(file_path), None)
+
+    def checkpoint(self, file_path: str, sha256: str, chunk_ids: List[str]):
+        """Remember the chunks stored so far for a file that is not finished yet."""
+        with self._lock:
+            self._checkpoints[self.key(file_path)] = {
+                'sha256': sha256,
+                'chunk_ids': list(chunk_ids),
+                'updated_at': datetime.now().isoformat()
+            }
+
+    def get_checkpoint(self, file_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._checkpoints.get(self.key(file_path))
+
+    def discard_checkpoint(self, file_path: str):
+        with self._lock:
+            self._checkpoints.pop(self.key(file_path), None)
+
+    def checkpoint_count(self) -> int:
+        with self._lock:
+            return len(self._checkpoints)
+
+    def paths_under(self, directory_path: str) -> List[str]:
+        """List manifest paths located under a directory."""
+        root = self.key(directory_path).rstrip(os.sep) + os.sep
+        with self._lock:
+            return [path for path in self._entries if path.startswith(root)]
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """List indexed files with their document ids, sorted by path."""
+        with self._lock:
+            items = sorted(self._entries.items())
+        return [{'doc_id': document_id(path), 'path': path, **entry} for path, entry in items]
+
+    def find_by_document_id(self, doc_id: str) -> Optional[str]:
+        """Return the path of the indexed file with the given document id, if any."""
+        with self._lock:
+            paths = list(self._entries)
+        for path in paths:
+            if document_id(path) == doc_id:
+                return path
+        return None
+
+    def dependents(self, chunk_ids) -> List[str]:
+        """Paths of files that had chunks dropped as near-duplicates of any of ``chunk_ids``."""
+        chunk_ids = set(chunk_ids)
+        if not chunk_ids:
+            return []
+        with self._lock:
+            return sorted(
+                path for path, entry in self._entries.items()
+                if chunk_ids.intersection(entry.get('duplicate_of', ()))
+            )
+
+    def find_by_sha256(self, sha256: str) -> Optional[str]:
+        """Return the path of an indexed file with the given content hash, if any."""
+        with self._lock:
+            for path, entry in self._entries.items():
+                if entry['sha256'] == sha256:
+                    return path
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._checkpoints = {}
+        self.save()
+
+# Singleton instance
+ingest_manifest = IngestManifest()
@@ -0,0 +1,172 @@
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+from loguru import logger
+from config import settings
+from services.ingestion_service import (
+    IngestionPipeline, IngestionStats, IngestionCancelled, ingestion_pipeline
+)
+
+class IngestionJob:
+    """
+    State of a single background ingestion job.
+    """
+    def __init__(self, file_path: str, filename: str, force: bool = False):
+        self.id = str(uuid.uuid4())
+        self.file_path = file_path
+        self.filename = filename
+        self.force = force
+        self.status = "queued"
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.pages_parsed = 0
+        self.chunks_embedded = 0
+        self.errors: List[str] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in {"completed", "failed", "cancelled"}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "progress": {
+                "pages_parsed": self.pages_parsed,
+                "chunks_embedded": self.chunks_embedded
+            },
+            "errors": self.errors,
+            "result": self.result
+        }
+
+class IngestionJobQueue:
+    """
+    Runs document ingestion off the request path on a small thread pool.
+
+    Uploads are queued and processed with at most ``max_concurrency`` jobs
+    at once so indexing cannot starve the API of CPU. Finished jobs are kept
+    for status queries up to ``history`` entries. The document watcher's
+    syncs are queued on the same threads with ``call``, so they take their
+    turn with uploads instead of racing them.
+    """
+    def __init__(
+        self,
+        pipeline: IngestionPipeline,
+        max_concurrency: Optional[int] = None,
+        history: Optional[int] = None
+    ):
+        self.pipeline = pipeline
+        self.max_concurrency = max_concurrency or settings.INGEST_JOB_CONCURRENCY
+        self.history = history or settings.INGEST_JOB_HISTORY
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="ingest-job"
+        )
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, file_path: str, filename: str, force: bool = False) -> IngestionJob:
+        """
+        Queue a file for ingestion and return its job immediately.
+
+        Args:
+            file_path: File to ingest
+            filename: Display name reported in the job status
+            force: Re-index the file even if it is unchanged
+        """
+        job = IngestionJob(file_path, filename, force)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        logger.info(f"Queued ingestion job {job.id} for {filename}")
+        return job
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue a pipeline call (e.g. a watcher sync) behind the jobs already submitted."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond the history limit."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: IngestionJob):
+        if job.cancel_event.is_set():
+            return
+
+        def progress(stats: IngestionStats):
+            job.pages_parsed = stats.pages
+            job.chunks_embedded = stats.chunks
+
+        job.status = "running"
+        job.started_at = datetime.now()
+        try:
+            summary = self.pipeline.ingest_files(
+                [job.file_path],
+                force=job.force,
+                progress=progress,
+                cancel_event=job.cancel_event
+            )
+            job.result = summary
+            job.errors.extend(failure['error'] for failure in summary['failures'])
+            if summary['failures']:
+                job.status = "failed"
+            elif not summary['chunks_indexed'] and not summary['files_unchanged']:
+                job.status = "failed"
+                job.errors.append("Failed to extract content from document")
+            else:
+                job.status = "completed"
+        except IngestionCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Ingestion job {job.id} failed: {e}")
+            job.status = "failed"
+            job.errors.append(str(e))
+        finally:
+            job.finished_at = datetime.now()
+            logger.info(f"Ingestion job {job.id} {job.status}: {job.filename}")
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestionJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Request cancellation of a job.
+
+        Queued jobs never start; running jobs stop before their next batch
+        and remove any chunks they had already stored.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_event.set()
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = datetime.now()
+        return job
+
+    def shutdown(self):
+        """Cancel outstanding jobs and wait for running ones to stop."""
+        for job in self.list_jobs():
+            job.cancel_event.set()
+        self._executor.shutdown(wait=True)
+
+# Singleton instance
+ingestion_jobs = IngestionJobQueue(ingestion_pipeline)
@@ -0,0 +1,702 @@
+import os
+import time
+import hashlib
+import threading
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable
+from loguru import logger
+from config import settings
+from services.document_processor import DocumentProcessor, document_processor
+from services.embedding_service import ChromaDBService, chroma_service
+from services.ingest_manifest import IngestManifest, ingest_manifest, document_id
+from services.near_duplicates import NearDuplicateIndex
+from services.boilerplate import BoilerplateFilter, boilerplate_filter
+from services.chunker import count_tokens
+
+def chunk_id(doc_id: str, metadata: Dict[str, Any], text: str) -> str:
+    """
+    Deterministic chunk id from the source document, the chunk's location
+    (page/slide/paragraph and position) and its content hash, so re-indexing
+    a file yields the same ids for unchanged chunks.
+    """
+    location = '/'.join(
+        f"{key}={metadata[key]}"
+        for key in ('page', 'slide', 'paragraph', 'chunk_index', 'char_start')
+        if key in metadata
+    )
+    content = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    digest = hashlib.sha256(f"{doc_id}\0{location}\0{content}".encode('utf-8')).hexdigest()
+    return f"{doc_id}-{digest[:24]}"
+
+class IngestionCancelled(Exception):
+    """Raised inside the pipeline when a caller cancels an ingestion run."""
+
+class IngestionStats:
+    """
+    Counters and per-stage wall-clock timings for one ingestion run.
+    """
+    def __init__(self):
+        self.files_planned = 0
+        self.files_committed = 0
+        self.files_processed = 0
+        self.files_unchanged = 0
+        self.files_removed = 0
+        self.failures: List[Dict[str, str]] = []
+        self.dropped_pages: List[Dict[str, Any]] = []
+        self.pages = 0
+        self.chunks = 0
+        self.chunks_deleted = 0
+        self.deleted_ids: set = set()
+        self.chunks_resumed = 0
+        self.embeddings = 0
+        self.batches = 0
+        self.duplicates_dropped = 0
+        self.duplicate_bytes_saved = 0
+        self.files_rechecked = 0
+        self.boilerplate_lines_removed = 0
+        self.tokens_before_strip = 0
+        self.tokens_after_strip = 0
+        self.stage_seconds = {'parse': 0.0, 'chunk': 0.0, 'embed': 0.0, 'store': 0.0}
+        self._started = time.perf_counter()
+
+    def add_time(self, stage: str, seconds: float):
+        self.stage_seconds[stage] += seconds
+
+    @staticmethod
+    def _rate(count: int, seconds: float) -> float:
+        return round(count / seconds, 2) if seconds > 0 else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated time left, extrapolated from the files finished so far."""
+        if not self.files_committed or not self.files_planned:
+            return None
+        remaining = max(0, self.files_planned - self.files_committed)
+        return self.elapsed / self.files_committed * remaining
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the run, including per-stage throughput."""
+        elapsed = self.elapsed
+        return {
+            'files_planned': self.files_planned,
+            'files_processed': self.files_processed,
+            'files_unchanged': self.files_unchanged,
+            'files_removed': self.files_removed,
+            'failures': self.failures,
+            'dropped_pages': self.dropped_pages,
+            'pages_parsed': self.pages,
+            'chunks_indexed': self.chunks,
+            'chunks_deleted': self.chunks_deleted,
+            'chunks_resumed': self.chunks_resumed,
+            'batches': self.batches,
+            'near_duplicates': {
+                'chunks_dropped': self.duplicates_dropped,
+                'embeddings_saved': self.duplicates_dropped,
+                'storage_bytes_saved': self.duplicate_bytes_saved,
+                'files_rechecked': self.files_rechecked
+            },
+            'boilerplate': {
+                'lines_removed': self.boilerplate_lines_removed,
+                'tokens_before': self.tokens_before_strip,
+                'tokens_after': self.tokens_after_strip,
+                'token_reduction_pct': round(
+                    100 * (1 - self.tokens_after_strip / self.tokens_before_strip), 2
+                ) if self.tokens_before_strip else 0.0
+            },
+            'elapsed_seconds': round(elapsed, 3),
+            'stage_seconds': {k: round(v, 3) for k, v in self.stage_seconds.items()},
+            'throughput': {
+                'pages_per_sec': self._rate(self.pages, self.stage_seconds['parse']),
+                'chunks_per_sec': self._rate(self.chunks, elapsed),
+                'embeddings_per_sec': self._rate(self.embeddings, self.stage_seconds['embed'])
+            }
+        }
+
+class IngestionPipeline:
+    """
+    Streaming ingestion: parse -> chunk -> embed in fixed-size batches -> store.
+
+    Files are parsed lazily and each batch is embedded and written to Chroma
+    before the next one is pulled from the parser, so memory use is bounded
+    by the batch size rather than by the size of the corpus. The ingest
+    manifest is consulted up front so unchanged files are never parsed, and
+    a file is recorded in it once all of its chunks have been stored.
+
+    A re-ingested file keeps its old chunks until the new ones are all
+    stored and recorded; only then are the ids it no longer produces
+    deleted. A failed, cancelled or crashed run therefore leaves the
+    previous version searchable and its manifest entry accurate.
+
+    The near-duplicate index is seeded from the collection once and then
+    kept in step with the pipeline's own writes and deletes. A file whose
+    chunks were dropped as duplicates of another document's chunks is
+    re-ingested when those chunks are deleted, so the content stays indexed.
+
+    Ingests, removals and clears run one at a time; a second caller waits
+    for the running one to finish.
+    """
+    def __init__(
+        self,
+        processor: DocumentProcessor,
+        chroma: ChromaDBService,
+        manifest: IngestManifest,
+        boilerplate: BoilerplateFilter
+    ):
+        self.processor = processor
+        self.chroma = chroma
+        self.manifest = manifest
+        self.boilerplate = boilerplate
+        self._duplicates: Optional[NearDuplicateIndex] = None
+        self._duplicates_collection = None
+        self._duplicates_lock = threading.Lock()
+        # Held for a whole ingest, removal or clear. Runs share the manifest,
+        # the dedup and boilerplate indexes and the collection, so writers
+        # (upload jobs, the watcher, API calls) take turns. Re-entrant because
+        # removals and ingests re-ingest duplicate dependents.
+        self._run_lock = threading.RLock()
+
+    def _plan(
+        self,
+        file_paths: List[str],
+        force: bool,
+        prune_directory: Optional[str],
+        stats: IngestionStats,
+        resume: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Decide which files need (re-)ingesting. Their current chunks stay in
+        place until the new version is committed.
+
+        Chunks recorded in a checkpoint for the same file content are kept
+        so an interrupted run does not embed them again, and a file with a
+        checkpoint is resumed even if it is otherwise unchanged.
+
+        Returns:
+            Manifest check results for the files that must be parsed, keyed by
+            path, with the ids of already stored chunks under 'stored'
+        """
+        plan: Dict[str, Dict[str, Any]] = {}
+        for file_path in file_paths:
+            try:
+                check = self.manifest.check(file_path)
+            except OSError as e:
+                stats.failures.append({'file': file_path, 'error': f"{type(e).__name__}: {e}"})
+                continue
+
+            checkpoint = self.manifest.get_checkpoint(file_path)
+            if check['status'] == 'unchanged' and not force and not checkpoint:
+                stats.files_unchanged += 1
+                continue
+
+            live = self._live_ids(check)
+            if checkpoint and (not resume or checkpoint['sha256'] != check['sha256']):
+                # Partial chunks of an abandoned version; the live ones stay
+                self._delete_ids(set(checkpoint['chunk_ids']) - live, stats)
+                self.manifest.discard_checkpoint(file_path)
+                checkpoint = None
+            check['stored'] = set(checkpoint['chunk_ids']) if checkpoint else set()
+            plan[file_path] = check
+
+        if prune_directory:
+            present = {self.manifest.key(file_path) for file_path in file_paths}
+            for path in self.manifest.paths_under(prune_directory):
+                if path not in present:
+                    self._remove(path, stats)
+                    stats.files_removed += 1
+                    logger.info(f"Removed chunks of deleted file: {path}")
+
+        return plan
+
+    @staticmethod
+    def _live_ids(check: Dict[str, Any]) -> set:
+        """Ids of the chunks recorded for a file's currently indexed version."""
+        return set(check['previous']['chunk_ids']) if check['previous'] else set()
+
+    def _delete_ids(self, ids, stats: Optional[IngestionStats] = None) -> int:
+        """Delete chunks by id from the store and the near-duplicate index, noting them in ``stats``."""
+        ids = sorted(set(ids))
+        if not ids:
+            return 0
+        self.chroma.delete_documents(ids)
+        duplicates = self._duplicates
+        if duplicates is not None:
+            duplicates.remove(ids)
+        if stats is not None:
+            stats.chunks_deleted += len(ids)
+            stats.deleted_ids.update(ids)
+        return len(ids)
+
+    def _delete_chunks(
+        self,
+        file_path: str,
+        entry: Optional[Dict[str, Any]],
+        stats: IngestionStats,
+        keep: Optional[set] = None
+    ) -> int:
+        """Delete a file's stored chunks except ``keep``; returns how many were deleted."""
+        # The doc_id lookup also catches chunks left behind by an interrupted run
+        ids = set(entry['chunk_ids'] if entry else []) | set(self.chroma.get_ids({'doc_id': document_id(file_path)}))
+        return self._delete_ids(ids - (keep or set()), stats)
+
+    def _remove(self, file_path: str, stats: IngestionStats) -> int:
+        """Drop a file's chunks and manifest entry; returns the number of chunks deleted."""
+        entry = self.manifest.remove(file_path)
+        self.boilerplate.forget(self.manifest.key(file_path))
+        return self._delete_chunks(file_path, entry, stats)
+
+    def _load_lexical_index(self):
+        """Load the BM25 index before writing, so this run's adds and deletes reach it and get saved."""
+        if self.chroma.lexical_index is not None:
+            self.chroma.lexical_index.ensure_loaded(self.chroma.collection)
+
+    def remove_files(self, file_paths: List[str]) -> Dict[str, int]:
+        """
+        Remove indexed files from the vector store and the manifest.
+
+        Returns:
+            Dict with 'files_removed', 'chunks_deleted' and 'files_rechecked'
+        """
+        with self._run_lock:
+            self._load_lexical_index()
+            stats = IngestionStats()
+            for file_path in file_paths:
+                if self.manifest.get(file_path) is None:
+                    continue
+                self._remove(file_path, stats)
+                stats.files_removed += 1
+                logger.info(f"Removed chunks of deleted file: {file_path}")
+            self.manifest.save()
+            self.boilerplate.save()
+            if self.chroma.lexical_index is not None:
+                self.chroma.lexical_index.save()
+            files_rechecked = self._recheck_duplicates(stats.deleted_ids, file_paths)
+            return {
+                'files_removed': stats.files_removed,
+                'chunks_deleted': stats.chunks_deleted,
+                'files_rechecked': files_rechecked
+            }
+
+    def _duplicate_index(self) -> NearDuplicateIndex:
+        """
+        The near-duplicate index of the active collection, seeded from the
+        stored chunks on first use and again after the collection is
+        replaced (clear, model switch).
+        """
+        with self._duplicates_lock:
+            collection = self.chroma.collection
+            if self._duplicates is None or self._duplicates_collection is not collection:
+                index = NearDuplicateIndex()
+                existing = collection.get(include=["documents"])
+                for chunk_id, text in zip(existing['ids'], existing['documents'] or []):
+                    index.add(text, chunk_id)
+                logger.info(f"Seeded near-duplicate index with {len(index)} stored chunks")
+                self._duplicates, self._duplicates_collection = index, collection
+            return self._duplicates
+
+    def _reset_duplicates(self):
+        """Drop the near-duplicate index; it may hold chunks an aborted run never stored."""
+        with self._duplicates_lock:
+            self._duplicates = None
+
+    def _drop_duplicates(
+        self,
+        file_path: str,
+        chunks: List[Dict[str, Any]],
+        dedup: Dict[str, Any],
+        stats: IngestionStats
+    ) -> Tuple[List[Dict[str, Any]], set]:
+        """
+        Drop chunks that nearly duplicate a chunk already indexed or seen this run.
+
+        Returns:
+            The kept chunks and the ids of other documents' chunks that
+            dropped ones matched
+        """
+        kept = []
+        matched = set()
+        doc_id = document_id(file_path)
+        fresh = dedup['fresh']
+        replacing = dedup['replacing']
+        # Old chunks of documents this run re-ingests are about to be replaced
+        stale = lambda key: key not in fresh and key.split('-', 1)[0] in replacing
+        embedding_bytes = 4 * (self.chroma.embedding_service.dimension or 384)
+        for chunk in chunks:
+            # A resumed chunk matches its own stored copy, which is not a duplicate
+            match = dedup['index'].check_and_add(chunk['text'], chunk['id'], skip=stale)
+            if match is None or match == chunk['id']:
+                kept.append(chunk)
+                fresh.add(chunk['id'])
+            else:
+                if match.split('-', 1)[0] != doc_id:
+                    matched.add(match)
+                stats.duplicates_dropped += 1
+                stats.duplicate_bytes_saved += len(chunk['text'].encode('utf-8')) + embedding_bytes
+        return kept, matched
+
+    def _recheck_duplicates(self, deleted_ids: set, exclude: List[str]) -> int:
+        """
+        Re-ingest files whose dropped near-duplicates matched chunks that
+        were just deleted, so their copy of that content gets indexed.
+
+        Returns:
+            Number of files re-ingested
+        """
+        skip = {self.manifest.key(file_path) for file_path in exclude}
+        paths = [
+            path for path in self.manifest.dependents(deleted_ids)
+            if path not in skip and os.path.exists(path)
+        ]
+        if not paths:
+            return 0
+        logger.info(f"Re-checking {len(paths)} files whose near-duplicate chunks matched deleted chunks")
+        self.ingest_files(paths, force=True)
+        return len(paths)
+
+    def _commit_file(self, file_path: str, pending: Dict[str, Any], stats: IngestionStats):
+        """Record a fully stored file, then delete the chunks its previous version had and this one lacks."""
+        stats.files_committed += 1
+        check = pending['check']
+        self.manifest.record(
+            file_path,
+            check['sha256'],
+            check['size'],
+            check['mtime_ns'],
+            pending['ids'],
+            sorted(pending['duplicate_of'])
+        )
+        self._delete_chunks(file_path, check['previous'], stats, keep=set(pending['ids']))
+
+    def _iter_chunks(
+        self,
+        plan: Dict[str, Dict[str, Any]],
+        workers: Optional[int],
+        stats: IngestionStats,
+        pending: Dict[str, Dict[str, Any]],
+        progress: Optional[Callable[[IngestionStats], None]],
+        use_cache: bool,
+        dedup: Optional[Dict[str, Any]],
+        strip_boilerplate: bool
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (file_path, chunk) pairs file by file, recording parse time and failures."""
+        results = self.processor.iter_files(list(plan), workers, use_cache)
+        while True:
+            started = time.perf_counter()
+            result = next(results, None)
+            stats.add_time('parse', time.perf_counter() - started)
+            if result is None:
+                return
+
+            file_path = result['file']
+            stats.dropped_pages.extend(
+                {'file': file_path, **dropped} for dropped in result['dropped_pages']
+            )
+            if result['error']:
+                logger.error(f"Failed to process {file_path}: {result['error']}")
+                stats.failures.append({'file': file_path, 'error': result['error']})
+                continue
+
+            stats.files_processed += 1
+            stats.pages += len(result['sections'])
+            if progress:
+                progress(stats)
+
+            started = time.perf_counter()
+            sections = result['sections']
+            if strip_boilerplate:
+                sections, strip_stats = self.boilerplate.strip(self.manifest.key(file_path), sections)
+                stats.boilerplate_lines_removed += strip_stats['lines_removed']
+                stats.tokens_before_strip += strip_stats['tokens_before']
+                stats.tokens_after_strip += strip_stats['tokens_after']
+            chunks = self.processor.chunk_sections(sections)
+            stats.add_time('chunk', time.perf_counter() - started)
+            doc_id = document_id(file_path)
+            for chunk in chunks:
+                chunk['metadata']['doc_id'] = doc_id
+                chunk['id'] = chunk_id(doc_id, chunk['metadata'], chunk['text'])
+            matched = set()
+            if dedup is not None:
+                chunks, matched = self._drop_duplicates(file_path, chunks, dedup, stats)
+
+            stored = plan[file_path]['stored']
+            resumed = [chunk['id'] for chunk in chunks if chunk['id'] in stored]
+            chunks = [chunk for chunk in chunks if chunk['id'] not in stored]
+            stats.chunks_resumed += len(resumed)
+            # Checkpointed chunks this run no longer produces (e.g. chunk size changed)
+            self._delete_ids(stored - set(resumed) - self._live_ids(plan[file_path]), stats)
+            pending[file_path] = {
+                'check': plan[file_path],
+                'ids': resumed,
+                'duplicate_of': matched,
+                'remaining': len(chunks)
+            }
+            if not chunks:
+                self._commit_file(file_path, pending.pop(file_path), stats)
+            for chunk in chunks:
+                yield file_path, chunk
+
+    @staticmethod
+    def _batched(
+        chunks: Iterator[Tuple[str, Dict[str, Any]]],
+        batch_size: int
+    ) -> Iterator[Tuple[List[str], List[str], List[str], List[Dict[str, Any]]]]:
+        """Group a chunk stream into (file_paths, ids, texts, metadatas) batches."""
+        paths: List[str] = []
+        ids: List[str] = []
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for file_path, chunk in chunks:
+            paths.append(file_path)
+            ids.append(chunk['id'])
+            texts.append(chunk['text'])
+            metadatas.append(chunk['metadata'])
+            if len(texts) >= batch_size:
+                yield paths, ids, texts, metadatas
+                paths, ids, texts, metadatas = [], [], [], []
+        if texts:
+            yield paths, ids, texts, metadatas
+
+    def _store_batch(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        stats: IngestionStats
+    ):
+        """Embed and upsert a single batch under its deterministic ids."""
+        embedding_service = self.chroma.embedding_service
+        started = time.perf_counter()
+        embeddings = embedding_service.embed_texts(texts)
+        stats.add_time('embed', time.perf_counter() - started)
+
+        started = time.perf_counter()
+        self.chroma.upsert_documents(
+            texts, metadatas, ids, embeddings=embeddings, model_key=embedding_service.model_key
+        )
+        stats.add_time('store', time.perf_counter() - started)
+
+        stats.embeddings += len(embeddings)
+        stats.chunks += len(ids)
+        stats.batches += 1
+
+    def ingest_files(
+        self,
+        file_paths: List[str],
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        force: bool = False,
+        reparse: bool = False,
+        dedup: Optional[bool] = None,
+        strip_boilerplate: Optional[bool] = None,
+        prune_directory: Optional[str] = None,
+        progress: Optional[Callable[[IngestionStats], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        resume: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Incrementally ingest files into the vector store batch by batch.
+
+        After every stored batch the manifest is saved with a checkpoint of
+        each partly stored file, so a crashed or killed run resumes where it
+        stopped and only embeds the chunks that were not yet written.
+
+        Args:
+            file_paths: Files to ingest
+            workers: Parser processes (defaults to settings.INGEST_WORKERS)
+            batch_size: Chunks per embed/store batch (defaults to settings.INGEST_BATCH_SIZE)
+            force: Re-ingest files even if the manifest says they are unchanged
+            reparse: Bypass the parse cache and run the parsers again (implies force)
+            dedup: Drop near-duplicate chunks (defaults to settings.DEDUP_ENABLED)
+            strip_boilerplate: Remove repeated footer/header lines before chunking
+                (defaults to settings.BOILERPLATE_STRIP_ENABLED)
+            prune_directory: Delete chunks of manifest files under this
+                directory that are no longer in ``file_paths``
+            progress: Called with the running stats after each parsed file
+                and each stored batch
+            cancel_event: When set, the run stops before the next batch and
+                the new chunks of files that were only partly stored are
+                removed; their previous versions stay indexed
+            resume: Reuse chunks checkpointed by an interrupted run; False
+                discards checkpoints and re-embeds those files
+
+        Returns:
+            Summary dict with counts, failures and per-stage throughput
+
+        Raises:
+            IngestionCancelled: If ``cancel_event`` was set during the run
+        """
+        with self._run_lock:
+            batch_size = batch_size or settings.INGEST_BATCH_SIZE
+            stats = IngestionStats()
+            pending: Dict[str, Dict[str, Any]] = {}
+
+            self._load_lexical_index()
+            plan = self._plan(file_paths, force or reparse, prune_directory, stats, resume)
+            stats.files_planned = len(plan)
+            dedup_state = None
+            if plan and (settings.DEDUP_ENABLED if dedup is None else dedup):
+                dedup_state = {
+                    'index': self._duplicate_index(),
+                    'replacing': {document_id(file_path) for file_path in plan},
+                    'fresh': set()
+                }
+            if strip_boilerplate is None:
+                strip_boilerplate = settings.BOILERPLATE_STRIP_ENABLED
+            # Decided once for the whole run: a large enough corpus embeds in worker processes
+            corpus_bytes = sum(check['size'] for check in plan.values())
+            with self.chroma.embedding_service.process_pool(corpus_bytes):
+                try:
+                    chunks = self._iter_chunks(
+                        plan, workers, stats, pending, progress, not reparse, dedup_state, strip_boilerplate
+                    )
+                    for paths, ids, texts, metadatas in self._batched(chunks, batch_size):
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise IngestionCancelled()
+                        self._store_batch(ids, texts, metadatas, stats)
+                        if dedup_state is None and self._duplicates is not None:
+                            for chunk_id, text in zip(ids, texts):
+                                self._duplicates.add(text, chunk_id)
+                        for file_path, chunk_id in zip(paths, ids):
+                            entry = pending[file_path]
+                            entry['ids'].append(chunk_id)
+                            entry['remaining'] -= 1
+                            if entry['remaining'] == 0:
+                                self._commit_file(file_path, pending.pop(file_path), stats)
+                        for file_path in set(paths) & set(pending):
+                            entry = pending[file_path]
+                            self.manifest.checkpoint(file_path, entry['check']['sha256'], entry['ids'])
+                        self.manifest.save()
+                        if progress:
+                            progress(stats)
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise IngestionCancelled()
+                except IngestionCancelled:
+                    # New chunks of unfinished files go; ids shared with the live version stay
+                    partial_ids = sorted({
+                        chunk_id
+                        for entry in pending.values()
+                        for chunk_id in set(entry['ids']) - self._live_ids(entry['check'])
+                    })
+                    self.chroma.delete_documents(partial_ids)
+                    for file_path in pending:
+                        self.manifest.discard_checkpoint(file_path)
+                    self._reset_duplicates()
+                    logger.warning(f"Ingestion cancelled; removed {len(partial_ids)} partially stored chunks")
+                    raise
+                except Exception:
+                    self._reset_duplicates()
+                    raise
+                finally:
+                    self.manifest.save()
+                    if strip_boilerplate:
+                        self.boilerplate.save()
+                    if self.chroma.lexical_index is not None:
+                        self.chroma.lexical_index.save()
+
+            stats.files_rechecked = self._recheck_duplicates(stats.deleted_ids, list(plan))
+            summary = stats.to_dict()
+            logger.info(
+                f"Ingested {summary['chunks_indexed']} chunks from {summary['files_processed']} files "
+                f"({summary['files_unchanged']} unchanged, {summary['files_removed']} removed) "
+                f"in {summary['elapsed_seconds']}s ({summary['throughput']})"
+            )
+            return summary
+
+    def clear(self):
+        """Delete every chunk and forget all indexed files, once no run is in progress."""
+        with self._run_lock:
+            self.chroma.delete_all()
+            self.manifest.clear()
+            self.boilerplate.clear()
+            self._reset_duplicates()
+
+    def ingest_directory(
+        self,
+        directory_path: str,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        force: bool = False,
+        reparse: bool = False,
+        dedup: Optional[bool] = None,
+        strip_boilerplate: Optional[bool] = None,
+        progress: Optional[Callable[[IngestionStats], None]] = None,
+        resume: bool = True
+    ) -> Dict[str, Any]:
+        """Incrementally ingest every supported document under a directory."""
+        return self.ingest_files(
+            self.processor.list_files(directory_path),
+            workers=workers,
+            batch_size=batch_size,
+            force=force,
+            reparse=reparse,
+            dedup=dedup,
+            strip_boilerplate=strip_boilerplate,
+            prune_directory=directory_path,
+            progress=progress,
+            resume=resume
+        )
+
+    def estimate(
+        self,
+        file_paths: List[str],
+        workers: Optional[int] = None,
+        force: bool = False,
+        reparse: bool = False,
+        strip_boilerplate: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Parse and chunk the files an ingest would process, without embedding
+        or storing anything, and report chunk and token totals.
+
+        Near-duplicate dropping is not applied, so the chunk count is an
+        upper bound on what would be embedded.
+        """
+        if strip_boilerplate is None:
+            strip_boilerplate = settings.BOILERPLATE_STRIP_ENABLED
+        to_parse: List[str] = []
+        files_unchanged = 0
+        failures: List[Dict[str, str]] = []
+        for file_path in file_paths:
+            try:
+                status = self.manifest.check(file_path)['status']
+            except OSError as e:
+                failures.append({'file': file_path, 'error': f"{type(e).__name__}: {e}"})
+                continue
+            if status == 'unchanged' and not (force or reparse):
+                files_unchanged += 1
+            else:
+                to_parse.append(file_path)
+
+        per_file = []
+        for result in self.processor.iter_files(to_parse, workers, not reparse):
+            if result['error']:
+                failures.append({'file': result['file'], 'error': result['error']})
+                continue
+            sections = result['sections']
+            if strip_boilerplate:
+                sections, _ = self.boilerplate.strip(
+                    self.manifest.key(result['file']), sections, record=False
+                )
+            chunks = self.processor.chunk_sections(sections)
+            per_file.append({
+                'file': result['file'],
+                'pages': len(result['sections']),
+                'chunks': len(chunks),
+                'tokens': sum(count_tokens(chunk['text']) for chunk in chunks)
+            })
+
+        return {
+            'files_to_process': len(per_file),
+            'files_unchanged': files_unchanged,
+            'failures': failures,
+            'pages': sum(item['pages'] for item in per_file),
+            'chunks': sum(item['chunks'] for item in per_file),
+            'tokens': sum(item['tokens'] for item in per_file),
+            'per_file': per_file
+        }
+
+# Singleton instance
+ingestion_pipeline = IngestionPipeline(
+    document_processor, chroma_service, ingest_manifest, boilerplate_filter
+)
@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence, Set, Tuple
+from loguru import logger
+from config import settings
+
+# Keeps version and key-length style tokens whole: "802.1x", "3des", "x.509"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+_STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it its of on or
+that the their there these this to was what when where which who why will with you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over the stored chunks.
+
+    Catches exact-term questions ("IKE port", "3DES key length") that the
+    MiniLM vectors rank poorly. Postings map each term to the chunks that
+    contain it with their term frequencies. Only the per-chunk term counts
+    are persisted (``bm25_index.json`` in CHROMA_DB_PATH), and the postings
+    are rebuilt from them on load.
+
+    ChromaDBService applies every add/upsert/delete to the index once it is
+    loaded. The ingestion pipeline loads it before writing and saves it when
+    a run ends, so it is built incrementally during ingestion; queries load
+    it too. Loading reconciles it with the collection by id, which repairs
+    a file left stale by a crash or missing on an older database.
+    """
+    def __init__(self, index_path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        self.index_path = Path(index_path or os.path.join(settings.CHROMA_DB_PATH, 'bm25_index.json'))
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._terms: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._dirty = False
+        self.loaded = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lengths)
+
+    def ensure_loaded(self, collection):
+        """Load the persisted index and bring it in line with the collection."""
+        with self._lock:
+            if self.loaded:
+                return
+            self._read()
+            stored = set(collection.get(include=[])['ids'])
+            stale = [chunk_id for chunk_id in self._lengths if chunk_id not in stored]
+            missing = [chunk_id for chunk_id in stored if chunk_id not in self._lengths]
+            self._remove(stale)
+            for start in range(0, len(missing), 1000):
+                page = collection.get(ids=missing[start:start + 1000], include=["documents"])
+                self._add(page['ids'], page['documents'])
+            self.loaded = True
+            if stale or missing:
+                logger.info(f"BM25 index reconciled: {len(missing)} chunks added, {len(stale)} removed")
+                self._dirty = True
+                self.save()
+            logger.info(f"BM25 index ready: {len(self._lengths)} chunks, {len(self._postings)} terms")
+
+    def _read(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable BM25 index {self.index_path}: {e}")
+            return
+        for chunk_id, counts in data.get('chunks', {}).items():
+            self._insert(chunk_id, counts)
+
+    def save(self):
+        """Atomically write the per-chunk term counts if anything changed."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = json.dumps({'version': 1, 'chunks': self._terms}, separators=(',', ':'))
+                self._dirty = False
+            try:
+                self.index_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.index_path)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def _insert(self, chunk_id: str, counts: Dict[str, int]):
+        self._terms[chunk_id] = counts
+        length = sum(counts.values())
+        self._lengths[chunk_id] = length
+        self._total_length += length
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+
+    def _add(self, ids: Sequence[str], texts: Sequence[str]):
+        self._remove(ids)
+        for chunk_id, text in zip(ids, texts):
+            self._insert(chunk_id, dict(Counter(tokenize(text or ''))))
+        self._dirty = True
+
+    def _remove(self, ids: Sequence[str]):
+        for chunk_id in ids:
+            counts = self._terms.pop(chunk_id, None)
+            if counts is None:
+                continue
+            self._total_length -= self._lengths.pop(chunk_id)
+            for term in counts:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._dirty = True
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]):
+        """Index (or re-index) chunks; ignored until loaded, as loading reconciles with Chroma."""
+        with self._lock:
+            if self.loaded:
+                self._add(ids, texts)
+
+    def remove(self, ids: Sequence[str]):
+        with self._lock:
+            if self.loaded:
+                self._remove(ids)
+
+    def clear(self):
+        with self._lock:
+            self._terms, self._lengths, self._postings = {}, {}, {}
+            self._total_length = 0
+            self._dirty = True
+        self.save()
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 10,
+        allowed_ids: Optional[Set[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top chunks by BM25 score for a query.
+
+        Args:
+            query: Free-text query, tokenized like the chunks
+            n_results: Maximum hits to return
+            allowed_ids: Restrict hits to these chunk ids (metadata filters)
+
+        Returns:
+            (chunk id, score) pairs, best first; chunks sharing no term are omitted
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._lengths)
+            if not count or not terms:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, frequency in postings.items():
+                    if allowed_ids is not None and chunk_id not in allowed_ids:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'chunks': len(self._lengths),
+                'terms': len(self._postings),
+                'path': str(self.index_path)
+            }
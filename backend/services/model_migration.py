@@ -0,0 +1,274 @@
+import threading
+from datetime import datetime
+from typing import Callable, List, Dict, Any, Optional, Set
+from loguru import logger
+from config import settings
+from services.embedding_service import EmbeddingService, ChromaDBService, chroma_service
+from services.collection_registry import CollectionRegistry
+
+class MigrationCancelled(Exception):
+    """Raised inside a migration when it is cancelled; the partial build is kept for resuming."""
+
+class ModelMigration:
+    """
+    Moves the vector store to another embedding model without downtime.
+
+    A new versioned collection is filled in the background by re-embedding
+    the documents already stored in the active collection, so nothing is
+    re-parsed. The active collection keeps serving reads and receiving
+    writes meanwhile. Once the bulk copy is done, further passes copy
+    whatever was written or deleted since then. The last pass runs under
+    the store's write lock and is followed by the switch, so no write is
+    lost. The replaced collection is kept as ``previous`` for rollback. An
+    interrupted build is resumed from the chunks it already copied.
+    """
+    def __init__(
+        self,
+        chroma: ChromaDBService,
+        registry: CollectionRegistry,
+        batch_size: Optional[int] = None
+    ):
+        self.chroma = chroma
+        self.registry = registry
+        self.batch_size = batch_size or settings.MIGRATION_BATCH_SIZE
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._cancel_event = threading.Event()
+        # Embedding service of the collection replaced by the last switch, so
+        # a rollback does not have to load that model again
+        self._previous_service: Optional[EmbeddingService] = None
+        self._rolling_back = False
+        self.state = "idle"
+        self.target: Optional[Dict[str, Any]] = None
+        self.documents_total = 0
+        self.documents_copied = 0
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._rolling_back or (self._thread is not None and self._thread.is_alive())
+
+    def pending(self) -> bool:
+        """Whether EMBEDDING_MODEL/EMBEDDING_BACKEND differ from the model of the active collection."""
+        return not self.registry.same_model(
+            self.registry.active, settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND
+        )
+
+    def start_if_pending(self) -> bool:
+        """
+        Start migrating to the configured model if the active collection uses
+        another one. A configuration that was rolled back from is left alone.
+        """
+        if not self.pending() or self.running:
+            return False
+        if self.registry.same_model(self.registry.previous, settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND):
+            logger.warning(
+                f"EMBEDDING_MODEL {settings.EMBEDDING_MODEL} was rolled back; serving "
+                f"{self.registry.active['model']} until a migration is started explicitly"
+            )
+            return False
+        self.start()
+        return True
+
+    def start(self, model_name: Optional[str] = None, backend: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start building a collection for a model in the background.
+
+        Args:
+            model_name: Target model (defaults to settings.EMBEDDING_MODEL)
+            backend: Target backend (defaults to settings.EMBEDDING_BACKEND)
+
+        Returns:
+            The migration status
+
+        Raises:
+            ValueError: If the active collection already uses that model
+            RuntimeError: If a migration or rollback is already running
+        """
+        model_name = model_name or settings.EMBEDDING_MODEL
+        backend = (backend or settings.EMBEDDING_BACKEND).lower()
+        if self.registry.same_model(self.registry.active, model_name, backend):
+            raise ValueError(f"Active collection already uses {model_name} ({backend})")
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A migration is already running")
+            self.target = self.registry.begin_build(model_name, backend)
+            self._cancel_event.clear()
+            self.state = "building"
+            self.documents_total = self.documents_copied = 0
+            self.started_at, self.finished_at, self.error = datetime.now(), None, None
+            self._thread = threading.Thread(target=self._run, name="model-migration", daemon=True)
+            self._thread.start()
+        logger.info(f"Started embedding migration to {model_name} ({backend}) in '{self.target['name']}'")
+        return self.status()
+
+    def cancel(self) -> Dict[str, Any]:
+        """Stop a running build before its next batch; what was copied is reused by the next start."""
+        self._cancel_event.set()
+        return self.status()
+
+    @staticmethod
+    def _all_ids(collection) -> Set[str]:
+        ids: Set[str] = set()
+        page = 5000
+        offset = 0
+        while True:
+            batch = collection.get(include=[], limit=page, offset=offset)['ids']
+            ids.update(batch)
+            if len(batch) < page:
+                return ids
+            offset += page
+
+    def _sync(self, source, target, embedding_service: EmbeddingService) -> int:
+        """
+        Make ``target`` hold exactly the ids of ``source``, embedding missing
+        documents with ``embedding_service``. Chunk ids are content hashes,
+        so an id present in both holds the same text.
+
+        Returns:
+            Number of documents copied or deleted
+        """
+        source_ids = self._all_ids(source)
+        target_ids = self._all_ids(target)
+        stale = list(target_ids - source_ids)
+        if stale:
+            target.delete(ids=stale)
+        missing: List[str] = sorted(source_ids - target_ids)
+        self.documents_total = len(source_ids)
+        self.documents_copied = len(source_ids) - len(missing)
+        for start in range(0, len(missing), self.batch_size):
+            if self._cancel_event.is_set():
+                raise MigrationCancelled()
+            page = source.get(ids=missing[start:start + self.batch_size], include=["documents", "metadatas"])
+            target.upsert(
+                ids=page['ids'],
+                documents=page['documents'],
+                metadatas=page['metadatas'],
+                embeddings=embedding_service.embed_texts(page['documents'])
+            )
+            self.documents_copied += len(page['ids'])
+        return len(missing) + len(stale)
+
+    def _converge(self, name: str, embedding_service: EmbeddingService, record: Callable[[], Any]) -> Any:
+        """
+        Copy the active collection into ``name``, then switch to it once it
+        has caught up. ``record`` updates the registry in the same critical
+        section as the switch, and its result is returned.
+        """
+        target = self.chroma.get_collection(name)
+        # Chunk texts are not stored with a size; a full chunk is about 4 bytes per token
+        pending = max(0, self.chroma.collection.count() - target.count())
+        with embedding_service.process_pool(pending * settings.CHUNK_TOKENS * 4):
+            # Catch-up passes shrink to the writes made during the previous one
+            for _ in range(settings.MIGRATION_CATCHUP_PASSES):
+                if self._sync(self.chroma.collection, target, embedding_service) <= self.batch_size:
+                    break
+            self.state = "switching"
+            with self.chroma.write_lock:
+                self._sync(self.chroma.collection, target, embedding_service)
+                previous_service = self.chroma.embedding_service
+                self.chroma.switch(name, embedding_service)
+                self._previous_service = previous_service
+                return record()
+
+    def _drop(self, entry: Optional[Dict[str, Any]]):
+        if not entry or entry['name'] == self.registry.active['name']:
+            return
+        try:
+            self.chroma.client.delete_collection(name=entry['name'])
+            logger.info(f"Dropped collection '{entry['name']}' ({entry['model']})")
+        except Exception as e:
+            logger.warning(f"Could not drop collection '{entry['name']}': {e}")
+
+    def _run(self):
+        target = self.target
+        try:
+            embedding_service = EmbeddingService(
+                model_name=target['model'], backend=target['backend'], preload=False
+            )
+            embedding_service.ensure_model_loaded()
+            released = self._converge(target['name'], embedding_service, self.registry.activate_build)
+            # Only one collection is kept for rollback
+            self._drop(released)
+            self.state = "completed"
+            logger.info(f"Embedding migration to {target['model']} completed: {self.documents_total} documents")
+        except MigrationCancelled:
+            self.state = "cancelled"
+            logger.warning(f"Embedding migration to {target['model']} cancelled; progress kept for resuming")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Embedding migration to {target['model']} failed: {e}")
+        finally:
+            self.finished_at = datetime.now()
+
+    def rollback(self) -> Dict[str, Any]:
+        """
+        Switch reads back to the previous collection, first copying into it
+        whatever was written to the active one since the switch.
+
+        Raises:
+            ValueError: If there is no previous collection
+            RuntimeError: If a migration is running
+        """
+        previous = self.registry.previous
+        if not previous:
+            raise ValueError("No previous collection to roll back to")
+        with self._lock:
+            if self.running:
+                raise RuntimeError("Cannot roll back while a migration is running")
+            self.state = "rolling_back"
+            self._rolling_back = True
+            self._cancel_event.clear()
+            self.started_at, self.finished_at, self.error = datetime.now(), None, None
+        try:
+            embedding_service = self._previous_service
+            if embedding_service is None or not self.registry.same_model(
+                previous, embedding_service.model_name, embedding_service.backend
+            ):
+                embedding_service = EmbeddingService(
+                    model_name=previous['model'], backend=previous['backend'], preload=False
+                )
+            embedding_service.ensure_model_loaded()
+            self._converge(previous['name'], embedding_service, self.registry.swap_previous)
+            self.state = "rolled_back"
+            logger.info(f"Rolled back to collection '{previous['name']}' ({previous['model']})")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Rollback to '{previous['name']}' failed: {e}")
+            raise
+        finally:
+            self._rolling_back = False
+            self.finished_at = datetime.now()
+        return self.status()
+
+    def drop_previous(self) -> Optional[Dict[str, Any]]:
+        """Delete the collection kept for rollback to free its disk space."""
+        if self.running:
+            raise RuntimeError("Cannot drop collections while a migration is running")
+        previous = self.registry.release_previous()
+        self._drop(previous)
+        self._previous_service = None
+        return previous
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'running': self.running,
+            'target': self.target,
+            'progress': {
+                'documents_total': self.documents_total,
+                'documents_copied': self.documents_copied
+            },
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+            'pending': self.pending(),
+            'collections': self.registry.to_dict()
+        }
+
+# Singleton instance
+model_migration = ModelMigration(chroma_service, chroma_service.registry)
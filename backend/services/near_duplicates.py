@@ -0,0 +1,134 @@
+import re
+import hashlib
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from config import settings
+
+_WORD_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)*")
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+
+def numbers(text: str) -> Tuple[str, ...]:
+    """The numeric tokens of a text in order ("802.1x" and "443" included)."""
+    return tuple(_NUMBER_RE.findall(text))
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    64-bit SimHash of a text over lowercased word shingles.
+
+    Numbers are kept as they are: in this corpus ports, key lengths and
+    RFC numbers are the content ("3DES 168-bit" is not "DES 56-bit").
+    Page and slide numbers are removed earlier by the boilerplate filter.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return 0
+    if len(words) < shingle_size:
+        shingles = [' '.join(words)]
+    else:
+        shingles = [' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles],
+        dtype=np.uint64
+    )
+    # A bit is set when it is set in the majority of shingle hashes
+    ones = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).sum(axis=0)
+    fingerprint = 0
+    for bit in np.flatnonzero(ones * 2 > len(shingles)):
+        fingerprint |= 1 << int(bit)
+    return fingerprint
+
+class NearDuplicateIndex:
+    """
+    Finds chunks whose SimHash is within ``max_distance`` bits of one seen before.
+
+    Fingerprints are split into ``max_distance + 1`` bands; by the pigeonhole
+    principle two fingerprints within the distance share at least one band
+    exactly, so only fingerprints in matching band buckets are compared.
+    A near match only counts as a duplicate if both chunks contain exactly
+    the same numbers, since a few changed digits barely move a SimHash.
+
+    Entries are keyed by chunk id and can be removed again, so one index
+    can follow the collection across ingestion runs.
+    """
+    def __init__(self, max_distance: Optional[int] = None):
+        self.max_distance = settings.DEDUP_MAX_HAMMING if max_distance is None else max_distance
+        bands = self.max_distance + 1
+        width = 64 // bands
+        self._bands = [
+            (i * width, 64 if i == bands - 1 else (i + 1) * width)
+            for i in range(bands)
+        ]
+        # Band value -> chunk ids (a dict used as an insertion-ordered set)
+        self._buckets: List[Dict[int, Dict[str, None]]] = [{} for _ in self._bands]
+        self._entries: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def _band_values(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> lo) & ((1 << (hi - lo)) - 1) for lo, hi in self._bands]
+
+    def _find(
+        self,
+        fingerprint: int,
+        text_numbers: Tuple[str, ...],
+        skip: Optional[Callable[[str], bool]]
+    ) -> Optional[str]:
+        for buckets, value in zip(self._buckets, self._band_values(fingerprint)):
+            for key in buckets.get(value, ()):
+                candidate, candidate_numbers = self._entries[key]
+                if (bin(candidate ^ fingerprint).count('1') <= self.max_distance
+                        and candidate_numbers == text_numbers
+                        and not (skip and skip(key))):
+                    return key
+        return None
+
+    def _add(self, fingerprint: int, key: str, text_numbers: Tuple[str, ...]):
+        self._remove(key)
+        self._entries[key] = (fingerprint, text_numbers)
+        for buckets, value in zip(self._buckets, self._band_values(fingerprint)):
+            buckets.setdefault(value, {})[key] = None
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for buckets, value in zip(self._buckets, self._band_values(entry[0])):
+            bucket = buckets[value]
+            del bucket[key]
+            if not bucket:
+                del buckets[value]
+
+    def add(self, text: str, key: str):
+        """Register a chunk without checking it."""
+        with self._lock:
+            self._add(simhash(text), key, numbers(text))
+
+    def remove(self, keys: Iterable[str]):
+        """Forget chunks that were deleted from the collection."""
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def check_and_add(
+        self,
+        text: str,
+        key: str,
+        skip: Optional[Callable[[str], bool]] = None
+    ) -> Optional[str]:
+        """
+        Register a chunk, or return the key of the near-duplicate it matches.
+        Stored chunks for which ``skip`` returns True are not matched against.
+        """
+        fingerprint = simhash(text)
+        text_numbers = numbers(text)
+        with self._lock:
+            duplicate_of = self._find(fingerprint, text_numbers, skip)
+            if duplicate_of is None:
+                self._add(fingerprint, key, text_numbers)
+            return duplicate_of
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,55 @@
+import os
+import gzip
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from loguru import logger
+from config import settings
+
+class ParseCache:
+    """
+    On-disk cache of text extracted from documents.
+
+    Entries are keyed by the file's SHA-256 and the parser version and stored
+    as gzip-compressed JSON, so re-chunking or re-embedding a corpus (e.g.
+    after changing EMBEDDING_MODEL) never has to run the parsers again.
+    Bump the parser version whenever extraction output changes.
+    """
+    def __init__(self, cache_path: Optional[str] = None, enabled: Optional[bool] = None):
+        self.cache_path = Path(cache_path or settings.PARSE_CACHE_PATH)
+        self.enabled = settings.PARSE_CACHE_ENABLED if enabled is None else enabled
+
+    def _entry_path(self, sha256: str, parser_version: str) -> Path:
+        # Fan out by hash prefix to keep directories small
+        return self.cache_path / sha256[:2] / f"{sha256}.v{parser_version}.json.gz"
+
+    def get(self, sha256: str, parser_version: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached sections, or None on a miss or unreadable entry."""
+        if not self.enabled:
+            return None
+        path = self._entry_path(sha256, parser_version)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parse cache entry {path}: {e}")
+            return None
+
+    def put(self, sha256: str, parser_version: str, sections: List[Dict[str, Any]]):
+        """Store extracted sections atomically."""
+        if not self.enabled:
+            return
+        path = self._entry_path(sha256, parser_version)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump(sections, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write parse cache entry {path}: {e}")
+
+# Singleton instance
+parse_cache = ParseCache()
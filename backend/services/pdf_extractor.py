@@ -0,0 +1,190 @@
+import time
+import multiprocessing
+from typing import List, Dict, Any, Optional, Tuple
+from loguru import logger
+from config import settings
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; the memory cap is skipped there
+    resource = None
+
+def _address_space_bytes() -> Optional[int]:
+    """Current virtual size of this process, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _limit_memory(memory_limit_mb: Optional[int]):
+    """
+    Let the current process grow by at most ``memory_limit_mb`` where the OS
+    allows it. The worker is forked from the server, whose address space
+    (torch, the embedding model) is inherited and may already exceed any
+    fixed cap, so the limit is set on top of the size at fork time.
+    """
+    if resource is None or not memory_limit_mb:
+        return
+    current = _address_space_bytes()
+    if current is None:
+        return
+    limit = current + memory_limit_mb * 1024 * 1024
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+def _page_worker(file_path: str, start_page: int, conn, memory_limit_mb: Optional[int]):
+    """
+    Child process: open the PDF and stream ('page', number, text) messages
+    back to the parent, starting at ``start_page`` (1-based).
+    """
+    _limit_memory(memory_limit_mb)
+    try:
+        from pypdf import PdfReader
+
+        reader = PdfReader(file_path)
+        conn.send(('count', len(reader.pages), None))
+        for page_num in range(start_page, len(reader.pages) + 1):
+            try:
+                text = reader.pages[page_num - 1].extract_text() or ''
+                conn.send(('page', page_num, text))
+            except MemoryError:
+                conn.send(('error', page_num, 'memory limit exceeded'))
+                return
+            except Exception as e:
+                conn.send(('error', page_num, f"{type(e).__name__}: {e}"))
+        conn.send(('done', None, None))
+    except MemoryError:
+        conn.send(('fatal', None, 'memory limit exceeded'))
+    except Exception as e:
+        conn.send(('fatal', None, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+class PDFExtractionError(Exception):
+    """Raised when a PDF cannot be opened at all."""
+
+class _PageFailed(Exception):
+    """The current page hung or crashed the worker."""
+
+class _FileTimeout(Exception):
+    """The per-file time budget ran out."""
+
+class IsolatedPDFExtractor:
+    """
+    Extracts PDF pages in a child process under time and memory budgets.
+
+    Each page must arrive within ``page_timeout`` seconds and the whole file
+    within ``file_timeout``. A page that hangs or crashes the child is
+    dropped, the child is killed, and a fresh one resumes at the next page,
+    so one pathological page or file cannot stall ingestion.
+    """
+    def __init__(
+        self,
+        page_timeout: Optional[float] = None,
+        file_timeout: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None
+    ):
+        self.page_timeout = page_timeout or settings.PDF_PAGE_TIMEOUT
+        self.file_timeout = file_timeout or settings.PDF_FILE_TIMEOUT
+        self.memory_limit_mb = settings.PDF_WORKER_MEMORY_MB if memory_limit_mb is None else memory_limit_mb
+
+    def _start(self, file_path: str, start_page: int):
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_page_worker,
+            args=(file_path, start_page, child_conn, self.memory_limit_mb),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    @staticmethod
+    def _stop(process, conn):
+        conn.close()
+        if process.is_alive():
+            process.kill()
+        process.join(timeout=5)
+
+    def extract(self, file_path: str) -> Tuple[List[Tuple[int, str]], List[Dict[str, Any]]]:
+        """
+        Extract text page by page.
+
+        Returns:
+            (pages, dropped) where pages is a list of (page_number, text) and
+            dropped lists {'page', 'reason'} for pages that were skipped
+
+        Raises:
+            PDFExtractionError: If the document cannot be opened
+        """
+        deadline = time.monotonic() + self.file_timeout
+        pages: List[Tuple[int, str]] = []
+        dropped: List[Dict[str, Any]] = []
+        page_count: Optional[int] = None
+        next_page = 1
+
+        while page_count is None or next_page <= page_count:
+            process, conn = self._start(file_path, next_page)
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise _FileTimeout()
+                    if not conn.poll(min(self.page_timeout, remaining)):
+                        if remaining <= self.page_timeout:
+                            raise _FileTimeout()
+                        raise _PageFailed('page time budget exceeded')
+                    try:
+                        kind, page_num, payload = conn.recv()
+                    except EOFError:
+                        process.join(timeout=1)
+                        if process.exitcode == 0 and page_count is not None:
+                            # Worker bailed out after reporting an error; resume
+                            break
+                        reason = 'extraction worker crashed'
+                        if process.exitcode is not None and process.exitcode < 0:
+                            reason = f"extraction worker killed by signal {-process.exitcode}"
+                        raise _PageFailed(reason)
+
+                    if kind == 'count':
+                        page_count = page_num
+                    elif kind == 'page':
+                        if payload.strip():
+                            pages.append((page_num, payload))
+                        next_page = page_num + 1
+                    elif kind == 'error':
+                        dropped.append({'page': page_num, 'reason': payload})
+                        next_page = page_num + 1
+                    elif kind == 'fatal':
+                        raise PDFExtractionError(payload)
+                    elif kind == 'done':
+                        next_page = (page_count or 0) + 1
+                        break
+            except (_PageFailed, _FileTimeout) as e:
+                reason = str(e) or 'file time budget exceeded'
+                if page_count is None:
+                    raise PDFExtractionError(f"could not open PDF: {reason}")
+                if isinstance(e, _FileTimeout):
+                    dropped.extend(
+                        {'page': page_num, 'reason': reason}
+                        for page_num in range(next_page, page_count + 1)
+                    )
+                    next_page = page_count + 1
+                else:
+                    dropped.append({'page': next_page, 'reason': reason})
+                    next_page += 1
+            finally:
+                self._stop(process, conn)
+
+        for item in dropped:
+            logger.warning(f"Dropped page {item['page']} of {file_path}: {item['reason']}")
+        return pages, dropped
+
+# Singleton instance
+pdf_extractor = IsolatedPDFExtractor()
@@ -0,0 +1,227 @@
+import threading
+from typing import List, Dict, Any, Optional, Sequence
+import numpy as np
+from loguru import logger
+
+_LOAD_PAGE = 5000
+_COMPARATORS = {
+    '$eq': lambda column, value: column == value,
+    '$ne': lambda column, value: column != value,
+    '$gt': lambda column, value: _compare(column, value, np.greater),
+    '$gte': lambda column, value: _compare(column, value, np.greater_equal),
+    '$lt': lambda column, value: _compare(column, value, np.less),
+    '$lte': lambda column, value: _compare(column, value, np.less_equal),
+    '$in': lambda column, values: np.array([item in values for item in column], dtype=bool),
+    '$nin': lambda column, values: np.array([item not in values for item in column], dtype=bool),
+}
+
+def _compare(column: np.ndarray, value, op) -> np.ndarray:
+    """Ordered comparison that is False (rather than an error) for rows missing the field or of another type."""
+    numeric = np.array([isinstance(item, (int, float)) and not isinstance(item, bool) for item in column], dtype=bool)
+    result = np.zeros(len(column), dtype=bool)
+    if numeric.any():
+        result[numeric] = op(column[numeric].astype(np.float64), float(value))
+    return result
+
+class ExactVectorIndex:
+    """
+    Brute-force cosine search over every chunk embedding held in memory.
+
+    For a corpus of a few thousand chunks one matrix-vector product is
+    cheaper than an HNSW walk plus Chroma's SQLite round-trips, and it is
+    exact. Embeddings live in one contiguous float32 matrix, normalized
+    once on insert, with documents and metadata in parallel lists. Top-k
+    uses ``argpartition``; ``where`` filters (Chroma's operator syntax) are
+    evaluated as boolean masks over cached metadata columns.
+
+    The index mirrors one Chroma collection: it is loaded from it on the
+    first query and ChromaDBService applies every later write to both. A
+    collection switch or clear starts a fresh index.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._columns: Dict[str, np.ndarray] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size
+
+    def load(self, collection):
+        """Replace the index contents with everything stored in a collection."""
+        with self._lock:
+            self._reset()
+            offset = 0
+            while True:
+                page = collection.get(
+                    include=["embeddings", "documents", "metadatas"], limit=_LOAD_PAGE, offset=offset
+                )
+                if page['ids']:
+                    self._upsert(page['ids'], page['embeddings'], page['documents'], page['metadatas'])
+                if len(page['ids']) < _LOAD_PAGE:
+                    break
+                offset += _LOAD_PAGE
+            self.loaded = True
+        logger.info(f"Exact vector index loaded {self._size} embeddings from '{collection.name}'")
+
+    def ensure_loaded(self, collection):
+        with self._lock:
+            if not self.loaded:
+                self.load(collection)
+
+    def _reset(self):
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids, self._rows, self._documents, self._metadatas = [], {}, [], []
+        self._columns = {}
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def _reserve(self, rows: int, dimension: int):
+        """Grow the matrix geometrically so appends are amortized O(1)."""
+        if self._matrix.shape[1] != dimension:
+            if self._size:
+                raise ValueError(f"Embedding dimension {dimension} does not match index dimension {self._matrix.shape[1]}")
+            self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        if rows <= self._matrix.shape[0]:
+            return
+        grown = np.zeros((max(rows, 2 * self._matrix.shape[0], 1024), dimension), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings,
+        documents: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]]
+    ):
+        """Insert or overwrite rows by id. Ignored until the index is loaded, since the load reads them from Chroma."""
+        with self._lock:
+            if self.loaded:
+                self._upsert(ids, embeddings, documents, metadatas)
+
+    def _upsert(self, ids, embeddings, documents, metadatas):
+        if not len(ids):
+            return
+        vectors = self._normalize(embeddings)
+        self._reserve(self._size + len(ids), vectors.shape[1])
+        for position, chunk_id in enumerate(ids):
+            row = self._rows.get(chunk_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._rows[chunk_id] = row
+                self._ids.append(chunk_id)
+                self._documents.append(documents[position])
+                self._metadatas.append(metadatas[position] or {})
+            else:
+                self._documents[row] = documents[position]
+                self._metadatas[row] = metadatas[position] or {}
+            self._matrix[row] = vectors[position]
+        self._columns = {}
+
+    def delete(self, ids: Sequence[str]):
+        """Remove rows by id, moving the last row into each freed slot."""
+        with self._lock:
+            if not self.loaded:
+                return
+            for chunk_id in ids:
+                row = self._rows.pop(chunk_id, None)
+                if row is None:
+                    continue
+                last = self._size - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = moved
+                    self._documents[row] = self._documents[last]
+                    self._metadatas[row] = self._metadatas[last]
+                    self._rows[moved] = row
+                self._ids.pop()
+                self._documents.pop()
+                self._metadatas.pop()
+                self._size = last
+            self._columns = {}
+
+    def _column(self, field: str) -> np.ndarray:
+        """Metadata values of one field as an object array (None where missing), cached until the next write."""
+        column = self._columns.get(field)
+        if column is None:
+            column = np.empty(self._size, dtype=object)
+            column[:] = [metadata.get(field) for metadata in self._metadatas]
+            self._columns[field] = column
+        return column
+
+    def _mask(self, where: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(self._size, dtype=bool)
+        for key, condition in where.items():
+            if key == '$and':
+                for clause in condition:
+                    mask &= self._mask(clause)
+            elif key == '$or':
+                any_mask = np.zeros(self._size, dtype=bool)
+                for clause in condition:
+                    any_mask |= self._mask(clause)
+                mask &= any_mask
+            elif isinstance(condition, dict):
+                column = self._column(key)
+                for operator, value in condition.items():
+                    if operator not in _COMPARATORS:
+                        raise ValueError(f"Unsupported where operator: {operator}")
+                    mask &= np.asarray(_COMPARATORS[operator](column, value), dtype=bool)
+            else:
+                mask &= np.asarray(self._column(key) == condition, dtype=bool)
+        return mask
+
+    def query(
+        self,
+        query_embedding,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Exact top-k by cosine similarity, shaped like ``collection.query``
+        for a single query (distances are cosine distances, 1 - similarity).
+        """
+        query = self._normalize(query_embedding)[0]
+        with self._lock:
+            if not self._size:
+                return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+            scores = self._matrix[:self._size] @ query
+            candidates = np.flatnonzero(self._mask(where)) if where else None
+            if candidates is not None:
+                scores = scores[candidates]
+            k = min(n_results, len(scores))
+            if k <= 0:
+                return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind='stable')]
+            rows = candidates[top] if candidates is not None else top
+            return {
+                'ids': [[self._ids[row] for row in rows]],
+                'documents': [[self._documents[row] for row in rows]],
+                'metadatas': [[self._metadatas[row] for row in rows]],
+                'distances': [[float(1.0 - scores[i]) for i in top]]
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'embeddings': self._size,
+                'dimension': self._matrix.shape[1] if self._size else None,
+                'bytes': self._size * self._matrix.shape[1] * 4 if self._size else 0
+            }
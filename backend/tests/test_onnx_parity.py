@@ -0,0 +1,85 @@
+"""
+ONNX / SentenceTransformer parity test.
+
+Exports EMBEDDING_MODEL to a temporary directory and checks that
+OnnxSentenceEncoder (fp32 and int8) embeds like the PyTorch
+SentenceTransformer. Skipped when onnxruntime, sentence-transformers or
+the model itself is not available.
+
+Usage (from the backend directory):
+    python -m pytest tests/test_onnx_parity.py
+    python -m unittest tests.test_onnx_parity
+"""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Add backend to path
+sys.path.insert(0, str(BACKEND_DIR))
+
+TEXTS = [
+    "What is the difference between symmetric and asymmetric encryption?",
+    "A stateful firewall tracks connections and only admits packets that belong to one.",
+    "HMAC combines a secret key with a hash function to provide message integrity.",
+    "firewall",
+    "During a SYN flood the attacker sends many TCP SYN segments and never completes "
+    "the handshake, exhausting the server's half-open connection table. " * 8,
+]
+
+# Same thresholds as benchmarks/bench_onnx_embeddings.py uses to gate the backend
+MIN_COSINE = {'fp32': 0.999, 'int8': 0.98}
+
+class OnnxParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            import onnxruntime  # noqa: F401
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise unittest.SkipTest(f"ONNX backend dependencies not installed: {e}")
+        from config import settings
+        from onnx_embedder import export_onnx
+        try:
+            cls.reference = SentenceTransformer(settings.EMBEDDING_MODEL, device='cpu')
+        except Exception as e:
+            raise unittest.SkipTest(f"Embedding model {settings.EMBEDDING_MODEL} not available: {e}")
+        cls.model_name = settings.EMBEDDING_MODEL
+        cls._workdir = tempfile.TemporaryDirectory(prefix='onnx-parity-')
+        cls.export_dir = export_onnx(cls.model_name, cls._workdir.name, quantize=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._workdir.cleanup()
+
+    def encoder(self, variant):
+        from onnx_embedder import OnnxSentenceEncoder
+        return OnnxSentenceEncoder(self.model_name, model_dir=str(self.export_dir), quantized=variant == 'int8')
+
+    def assert_parity(self, variant):
+        import numpy as np
+        expected = self.reference.encode(TEXTS, convert_to_numpy=True)
+        actual = self.encoder(variant).encode(TEXTS, batch_size=2, convert_to_numpy=True)
+        self.assertEqual(actual.shape, expected.shape)
+        self.assertEqual(actual.dtype, np.float32)
+        expected = expected / np.linalg.norm(expected, axis=1, keepdims=True)
+        actual = actual / np.linalg.norm(actual, axis=1, keepdims=True)
+        cosines = (expected * actual).sum(axis=1)
+        self.assertGreaterEqual(float(cosines.min()), MIN_COSINE[variant], f"{variant} cosines: {cosines}")
+
+    def test_fp32_matches_sentence_transformer(self):
+        self.assert_parity('fp32')
+
+    def test_int8_matches_sentence_transformer(self):
+        self.assert_parity('int8')
+
+    def test_single_text_and_dimension(self):
+        encoder = self.encoder('fp32')
+        vector = encoder.encode(TEXTS[0])
+        self.assertEqual(vector.shape, (self.reference.get_sentence_embedding_dimension(),))
+        self.assertEqual(encoder.get_sentence_embedding_dimension(), self.reference.get_sentence_embedding_dimension())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -60,6 +60,27 @@ export const documentAPI = {
     return response.data;
   },
   
+  getJob: async (jobId) => {
+    const response = await api.get(`/api/documents/jobs/${jobId}`);
+    return response.data;
+  },
+
+  cancelJob: async (jobId) => {
+    const response = await api.post(`/api/documents/jobs/${jobId}/cancel`);
+    return response.data;
+  },
+
+  // Poll a background ingestion job until it completes, fails or is cancelled
+  waitForJob: async (jobId, intervalMs = 1000) => {
+    for (;;) {
+      const job = await documentAPI.getJob(jobId);
+      if (['completed', 'failed', 'cancelled'].includes(job.status)) {
+        return job;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+  
   ingestDirectory: async (directoryPath = null) => {
     const response = await api.post('/api/documents/ingest-directory', null, {
       params: { directory_path: directoryPath },
@@ -76,6 +97,23 @@ export const documentAPI = {
     const response = await api.delete('/api/documents/clear');
     return response.data;
   },
+
+  listDocuments: async () => {
+    const response = await api.get('/api/documents');
+    return response.data;
+  },
+
+  deleteDocument: async (docId, deleteFile = false) => {
+    const response = await api.delete(`/api/documents/${docId}`, {
+      params: { delete_file: deleteFile },
+    });
+    return response.data;
+  },
+
+  reindexDocument: async (docId) => {
+    const response = await api.post(`/api/documents/${docId}/reindex`);
+    return response.data;
+  },
 };
 
 // Health API
@@ -85,8 +85,19 @@ function DocumentUpload() {
           }));
         });
 
-        results.push(result);
-        totalChunks += result.chunks_indexed;
+        // Identical content that is already indexed comes back without a job
+        if (!result.job_id) {
+          results.push(result);
+          continue;
+        }
+
+        const job = await documentAPI.waitForJob(result.job_id);
+        if (job.status !== 'completed') {
+          throw new Error(job.errors.join('; ') || `Indexing ${job.status}`);
+        }
+
+        results.push(job);
+        totalChunks += job.progress.chunks_embedded;
       } catch (error) {
         console.error(`Error uploading ${file.name}:`, error);
         errors.push(file.name);